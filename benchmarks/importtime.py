@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Author: Kabilan Tamilmani
+# E-mail: kavikabilan37@gmail.com
+# Github: Kabilan-T
+
+''' Import time of each bot entry point with lazy dependencies versus all of them warmed up
+
+Each entry point (src/auto.py, eve.py, mo.py, go4.py) is imported and its extensions loaded
+in a fresh interpreter run with -X importtime, without logging in. "lazy" is the startup as
+it runs now; "eager" also loads every lazy dependency right after the extensions, which is
+what the startup paid for when the cogs imported them at the top level.
+Run from the repository root:
+    python benchmarks/importtime.py [bot ...] [--repeat N] [--top N]
+'''
+
+#-------------------------------------------------------------------------------
+
+import os
+import sys
+import argparse
+import subprocess
+
+src_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+entry_points = {'auto': 'AutoBot', 'eve': 'EveBot', 'mo': 'MoBot', 'go4': 'Go4Bot'}
+
+child_code = '''
+import asyncio, tempfile
+import bots.log, bots.base
+bots.log.base_log_dir = tempfile.mkdtemp()
+bots.base.data = tempfile.mkdtemp()
+from bots import lazy
+from {module} import {cls}
+async def main():
+    bot = {cls}()
+    await bot.setup_hook()
+    if {eager}:
+        lazy.warm_up()
+    await bot.close()
+asyncio.run(main())
+'''
+
+def parse_importtime(output: str) -> dict:
+    '''Cumulative import time in microseconds per top-level module import from -X importtime output'''
+    modules = dict()
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if name.startswith("  "):
+            continue # nested import, counted in its parent
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+def measure(name: str, eager: bool, repeat: int) -> dict:
+    '''Import the entry point of a bot and load its extensions in fresh interpreters, keeps the fastest run'''
+    code = child_code.format(module=name, cls=entry_points[name], eager=eager)
+    runs = list()
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=src_dir, capture_output=True, text=True)
+        runs.append(parse_importtime(result.stderr))
+    return min(runs, key=lambda modules: sum(modules.values()))
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the import time of the bots with lazy and eager dependencies.")
+    parser.add_argument("bots", nargs='*', default=None, help="Bots to measure (default: all)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per bot and mode, the fastest is kept")
+    parser.add_argument("--top", type=int, default=5, help="Deferred imports to list per bot")
+    args = parser.parse_args()
+    names = args.bots or list(entry_points)
+    for name in names:
+        lazy, eager = measure(name, False, args.repeat), measure(name, True, args.repeat)
+        lazy_total, eager_total = sum(lazy.values()), sum(eager.values())
+        print(f"{name:<6} lazy {lazy_total / 1e3:8.1f} ms  eager {eager_total / 1e3:8.1f} ms  "
+              f"saved {(eager_total - lazy_total) / 1e3:8.1f} ms")
+        deferred = sorted(((time, module) for module, time in eager.items() if module not in lazy), reverse=True)
+        for time, module in deferred[:args.top]:
+            print(f"         deferred {module:<32} {time / 1e3:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Author: Kabilan Tamilmani
+# E-mail: kavikabilan37@gmail.com
+# Github: Kabilan-T
+
+''' Memory and startup time of the bots, one process per bot versus the single-process launcher
+
+The bots are built and their extensions loaded without logging in (no tokens needed),
+which covers the imports, data loading and cog constructors but not the gateway session.
+Run from the repository root:
+    python benchmarks/launcher.py [bot ...]
+'''
+
+#-------------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+src_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+async def build(names: list, shared: bool) -> dict:
+    '''Build the bots and load their extensions, returns per-bot timings and memory'''
+    start = time.perf_counter()
+    import bots.log
+    bots.log.base_log_dir = tempfile.mkdtemp()
+    import bots.base
+    data_dir = tempfile.TemporaryDirectory()   # The bots create and save their data here, not in src/data
+    bots.base.data = data_dir.name
+    from bots.base import BaseBot
+    from bots.shared import SharedResources, memory_usage
+    result = {'import': time.perf_counter() - start, 'baseline': memory_usage(), 'bots': dict()}
+    resources = None
+    if shared:
+        resources = SharedResources()
+        await resources.open()
+    instances = list()
+    for name in names:
+        memory_before = memory_usage()
+        start = time.perf_counter()
+        bot = BaseBot(name, resources)
+        await bot.setup_hook()
+        instances.append(bot)
+        result['bots'][name] = {'startup': time.perf_counter() - start,
+                                'memory': memory_usage() - memory_before,
+                                'extensions': f"{len(bot.extensions)}/{len(bot.extensions_to_load)}"}
+    result['total'] = memory_usage()
+    for bot in instances:
+        await bot.close()
+    if resources is not None:
+        await resources.close()
+    data_dir.cleanup()
+    return result
+
+def child(names: list, shared: bool):
+    '''Measure in this process and print the result as JSON'''
+    sys.path.insert(0, src_dir)
+    result = asyncio.run(build(names, shared))
+    print(json.dumps(result))
+
+def measure(names: list, shared: bool) -> dict:
+    '''Measure in a fresh interpreter'''
+    command = [sys.executable, os.path.abspath(__file__), "--child"] + (["--shared"] if shared else []) + names
+    output = subprocess.run(command, cwd=src_dir, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare one process per bot against the single-process launcher.")
+    parser.add_argument("bots", nargs='*', default=None, help="Bots to measure (default: all)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--shared", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.bots, args.shared)
+        return
+    names = args.bots or ['auto', 'eve', 'mo', 'go4']
+
+    print("One process per bot")
+    total = 0
+    for name in names:
+        result = measure([name], False)
+        entry = result['bots'][name]
+        total += result['total']
+        print(f"  {name:<6} import {result['import']:6.2f} s  startup {entry['startup']:6.2f} s  "
+              f"extensions {entry['extensions']:<5}  process RSS {result['total'] / 2**20:7.1f} MiB")
+    print(f"  total RSS {total / 2**20:.1f} MiB")
+
+    print("Single process (shared loop, cache, executor and connector)")
+    result = measure(names, True)
+    print(f"  import {result['import']:.2f} s, baseline RSS {result['baseline'] / 2**20:.1f} MiB")
+    for name, entry in result['bots'].items():
+        print(f"  {name:<6} startup {entry['startup']:6.2f} s  extensions {entry['extensions']:<5}  "
+              f"RSS +{entry['memory'] / 2**20:6.1f} MiB")
+    print(f"  total RSS {result['total'] / 2**20:.1f} MiB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Author: Kabilan Tamilmani
+# E-mail: kavikabilan37@gmail.com
+# Github: Kabilan-T
+
+''' Micro-benchmark of the data file parsers, dumpers and compiled snapshots
+
+Run from the repository root:
+    python benchmarks/serialization.py [--repeat N]
+'''
+
+#-------------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import time
+import yaml
+import random
+import argparse
+import tempfile
+
+src_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+sys.path.insert(0, src_dir)
+from bots import codec
+
+data_dir = os.path.join(src_dir, 'data')
+holidays_file = os.path.join(data_dir, 'AUTO', 'bot', 'holidays_2025.yml')
+thirukkural_file = os.path.join(data_dir, 'GO-4', 'bot', 'thirukkural.json')
+
+def best_of(repeat, fn, *args):
+    '''Best wall time of a call in milliseconds'''
+    timings = list()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+def synthetic_warns(entries=10000):
+    '''Warns document shaped like moderation's warns.yml: {member_id: count}'''
+    rng = random.Random(0)
+    return {rng.randrange(10**17, 10**18): rng.randint(1, 5) for _ in range(entries)}
+
+def read_text(file_path):
+    '''Read a source file'''
+    with open(file_path, 'r', encoding="utf-8") as file:
+        return file.read()
+
+def bench_yaml(name, text, repeat):
+    '''Compare the pure Python and libyaml loaders/dumpers on a YAML document'''
+    data = yaml.load(text, Loader=yaml.SafeLoader)
+    rows = [(name, "parse SafeLoader", best_of(repeat, yaml.load, text, yaml.SafeLoader)),
+            (name, "dump SafeDumper", best_of(repeat, lambda: yaml.dump(data, Dumper=yaml.SafeDumper)))]
+    if codec.libyaml:
+        rows.append((name, "parse CSafeLoader", best_of(repeat, yaml.load, text, yaml.CSafeLoader)))
+        rows.append((name, "dump CSafeDumper", best_of(repeat, lambda: yaml.dump(data, Dumper=yaml.CSafeDumper))))
+    return rows
+
+def bench_snapshot(name, file_path, repeat):
+    '''Compare parsing a source file against loading its compiled snapshot'''
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        codec.load_compiled(file_path, snapshot_dir)
+        return [(name, "parse source file", best_of(repeat, codec.load_file, file_path)),
+                (name, "load snapshot", best_of(repeat, codec.load_compiled, file_path, snapshot_dir))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the data file serialization paths.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (best is reported)")
+    args = parser.parse_args()
+
+    rows = list()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        warns_file = os.path.join(tmp_dir, 'warns.yml')
+        with open(warns_file, 'w') as file:
+            codec.dump_yaml(synthetic_warns(), file)
+        sources = [("holidays_2025.yml", holidays_file), ("warns.yml (10k)", warns_file)]
+        for name, file_path in sources:
+            rows += bench_yaml(name, read_text(file_path), args.repeat)
+        text = read_text(thirukkural_file)
+        rows.append(("thirukkural.json", "parse json", best_of(args.repeat, json.loads, text)))
+        for name, file_path in sources + [("thirukkural.json", thirukkural_file)]:
+            rows += bench_snapshot(name, file_path, args.repeat)
+
+    print(f"Python {sys.version.split()[0]}, PyYAML {yaml.__version__}, libyaml {'yes' if codec.libyaml else 'no'}, best of {args.repeat}")
+    for name, case, ms in rows:
+        print(f"{name:<20} {case:<20} {ms:>10.2f} ms")
+
+if __name__ == "__main__":
+    main()
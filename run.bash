@@ -66,8 +66,11 @@ case "$bot_name" in
     "go4")
         python src/go4.py
         ;;
+    "all")
+        python src/launcher.py
+        ;;
     *)
-        echo "Invalid bot name. Available bots: auto, eve, mo and go4"
+        echo "Invalid bot name. Available bots: auto, eve, mo and go4 (or all to run them in one process)"
         exit 1
         ;;
 esac
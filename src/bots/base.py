@@ -10,40 +10,165 @@
 #-------------------------------------------------------------------------------
 
 import os
-import yaml
+import sys
+import ast
+import json
+import time
+import hashlib
+import asyncio
+import inspect
+import importlib
+import importlib.util
 import shutil
 import discord
 from discord.ext import commands
 from discord.ext.commands import Context
 from bots.log import Logger
+from bots.logindex import log_context
+from bots.cache import DocumentCache, CacheView
+from bots.writer import DocumentWriter
+from bots.locks import KeyedLocks
+from bots.storage import create_storage
+from bots.codec import load_yaml, load_compiled
+from bots.gateway import GatewayStats, build_intents, build_member_cache_flags, check_listeners
+from bots.shared import memory_usage
+from bots.metrics import CommandMetrics, MetricsServer
+from bots.sender import SendScheduler
+from bots.httpclient import HttpClient
+from bots.responsecache import ResponseCache
+from bots.router import MessageRouter, MessageInfo
+from bots.registry import GuildRegistry
+from bots.guildstate import GuildState
+from bots.settings import SettingsService, GuildSettings
+from bots import lazy
+from bots.watchdog import LoopWatchdog
 
 config_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.yml')
 data = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
 
+def extension_dependencies(extension: str) -> list:
+    '''Modules imported at the top level of an extension, found without executing it'''
+    spec = importlib.util.find_spec(extension)
+    if spec is None or spec.origin is None or not spec.origin.endswith('.py'):
+        return []
+    with open(spec.origin, 'r') as file:
+        tree = ast.parse(file.read(), spec.origin)
+    modules = list()
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            module = importlib.util.resolve_name('.' * node.level + (node.module or ''), spec.parent) if node.level else node.module
+            modules.append(module)
+            # Imported names may be submodules (from package import module)
+            modules.extend(f"{module}.{alias.name}" for alias in node.names if alias.name != '*')
+    return modules
+
+def module_origin(module: str) -> str:
+    '''Source file of a module, None for names that are not modules with a source file'''
+    try:
+        spec = importlib.util.find_spec(module)
+    except (ImportError, ValueError, AttributeError):
+        return None
+    if spec is None or spec.origin is None or not spec.origin.endswith('.py'):
+        return None
+    return spec.origin
+
+def module_fingerprints(extension: str) -> dict:
+    '''Source hash of an extension and of the cog modules it imports, recursively: {module: hash}'''
+    fingerprints = dict()
+    pending = [extension]
+    while pending:
+        module = pending.pop()
+        if module in fingerprints:
+            continue
+        origin = module_origin(module)
+        if origin is None:
+            continue
+        with open(origin, 'rb') as file:
+            fingerprints[module] = hashlib.sha1(file.read()).hexdigest()
+        # Only the cog helpers are reloaded with the cogs, the core modules of the bot are not
+        pending.extend(dependency for dependency in extension_dependencies(module) if dependency.startswith('bots.cogs.'))
+    return fingerprints
+
+def import_dependencies(modules: list):
+    '''Import modules ahead of their extension, ignoring the names that are not modules or fail'''
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except Exception:
+            pass # load_extension reports the real import errors
+
 class BaseBot(commands.Bot):
     ''' Base class for all bots '''
 
-    def __init__(self, bot_name: str):
-        ''' Initialize the bot '''
+    log_suffix = None   # Tells apart the log files of the processes of a cluster
+
+    def __init__(self, bot_name: str, shared=None, **options):
+        ''' Initialize the bot (shared: SharedResources when running with other bots in one process) '''
         self.bot_name = bot_name
+        self.shared = shared
+        self.created = time.perf_counter()
+        self.startup_report = {'extensions': dict(), 'on_ready': dict(), 'setup': None, 'ready': None}
         self.load_config()
-        self.prefix = dict()
-        self.log = Logger(self.name)
+        self.log = Logger(self.name, self.log_suffix, self.log_rotation)
+        self.log.set_levels(self.log_levels.get('file', None), self.log_levels.get('channel', None))
         self.log.info(f"Loaded config for {self.name}")
         self.data_dir = os.path.join(data, self.name)
         if not os.path.exists(self.data_dir):
             os.makedirs(self.data_dir)
-        # Create discord bot
+        self.storage = create_storage(self.storage_backend, self.data_dir)
+        self.log.info(f"Using {self.storage.name} storage backend")
+        self.registry = GuildRegistry(self.storage, self.owns_guild)
+        self.reconcile_task = None
+        self.warm_up_task = None
+        self.fingerprints = dict()   # extension -> {module: source hash} when it was loaded
+        self.guild_states = dict()   # name -> GuildState of the loaded cogs
+        if shared is not None:
+            self.cache = CacheView(shared.cache, self.name)
+            self.writer = DocumentWriter(self.storage, self.log, self.write_delay, shared.executor)
+        else:
+            self.cache = DocumentCache(self.cache_size)
+            self.writer = DocumentWriter(self.storage, self.log, self.write_delay)
+        self.locks = KeyedLocks()
+        self.settings = SettingsService(self)
+        self.settings.subscribe('log_channel', self.apply_log_channel)
+        self.settings.subscribe('log_levels', self.apply_log_levels)
+        self.gateway_stats = GatewayStats()
+        self.command_metrics = CommandMetrics(self.name)
+        self.metrics_server = None
+        self.sender = SendScheduler(self.name)
+        self.router = MessageRouter(self.name, self.log)
+        self.http_client = HttpClient(self.name, self.http_timeout, limit_per_host=self.http_limit_per_host)
+        self.response_cache = ResponseCache(self.bot_data_path("responses.db"), self.response_cache_size,
+                                            self.response_cache_ttl, self.log)
+        self.log.channel_queue.sender = self.sender
+        # One watchdog per loop, the launcher shares its own with the bots
+        self.watchdog = shared.watchdog if shared is not None else None
+        self.owns_watchdog = self.watchdog is None and bool(self.loop_lag_threshold)
+        if self.owns_watchdog:
+            self.watchdog = LoopWatchdog(self.log, self.loop_lag_threshold)
+        if self.watchdog is not None:
+            self.watchdog.attach(self)
+        # Create discord bot with the gateway profile of config.yml
+        intents = build_intents(self.intents_config)
+        if self.chunk_guilds_at_startup is not None:
+            options['chunk_guilds_at_startup'] = self.chunk_guilds_at_startup
         super().__init__(description="Discord bot : "+self.name,
                          command_prefix=self.get_prefix,
-                         intents=discord.Intents.all(),
+                         intents=intents,
+                         member_cache_flags=build_member_cache_flags(self.member_cache_flags_config, intents),
+                         max_messages=self.max_messages,
+                         enable_debug_events=self.gateway_bytes,
                          help_command=None,
-                         application_id=self.client_id)
+                         application_id=self.client_id,
+                         connector=shared.connector if shared is not None else None,
+                         **options)
         
     def load_config(self):
         '''Load the configuration file'''
         with open(config_file, 'r') as file:
-            config = yaml.safe_load(file).get(self.bot_name, None)
+            config = load_yaml(file).get(self.bot_name, None)
         if config is None:
             raise ValueError(f"Configuration not found for {self.bot_name}")
         self.name = config.get('name', None)
@@ -52,34 +177,178 @@ class BaseBot(commands.Bot):
         self.default_prefix = config.get('default_prefix', None)
         self.default_color = config.get('default_color', discord.Color.dark_theme())
         self.extensions_to_load = config.get('extensions', list())
+        self.cache_size = config.get('cache_size', 1024)
+        self.write_delay = config.get('write_delay', 0.5)
+        self.storage_backend = config.get('storage', 'yaml')
+        self.snapshots = config.get('snapshots', True)
+        self.intents_config = config.get('intents', 'all')
+        self.member_cache_flags_config = config.get('member_cache_flags', 'from_intents')
+        self.max_messages = config.get('max_messages', 1000)
+        self.chunk_guilds_at_startup = config.get('chunk_guilds_at_startup', None)
+        self.gateway_bytes = config.get('gateway_bytes', False)
+        self.metrics_port = config.get('metrics_port', None)
+        self.log_rotation = config.get('log_rotation', None)
+        self.log_levels = config.get('log_levels', None) or dict()
+        self.loop_lag_threshold = config.get('loop_lag_threshold', 0.25)
+        self.http_timeout = config.get('http_timeout', 15)
+        self.http_limit_per_host = config.get('http_limit_per_host', 10)
+        self.response_cache_size = config.get('response_cache_size', 512)
+        self.response_cache_ttl = config.get('response_cache_ttl', None) or dict()
+        self.guild_reconcile_interval = config.get('guild_reconcile_interval', 600)
+        self.guild_state_size = config.get('guild_state_size', 256)
+        self.guild_state_idle = config.get('guild_state_idle', 1800)
+        self.warm_up_dependencies = config.get('warm_up', True)
 
     async def setup_hook(self):
         '''Setup hook executed before bot execution'''
-        # Load cogs
-        for extension in self.extensions_to_load:
-            try:
-                await self.load_extension(f"bots.{extension}")
-                self.log.info(f"Loaded extension {extension}")
-            except Exception as e:
-                exception = f"{type(e).__name__}: {e}"
+        await self.http_client.open()
+        await self.response_cache.open()
+        # Load cogs concurrently, their blocking init runs in worker threads (cog_load)
+        start = time.perf_counter()
+        results = await asyncio.gather(*[self.load_timed_extension(f"bots.{extension}") for extension in self.extensions_to_load],
+                                       return_exceptions=True)
+        for extension, result in zip(self.extensions_to_load, results):
+            if isinstance(result, BaseException):
+                exception = f"{type(result).__name__}: {result}"
                 self.log.error(f"Failed to load extension {extension}\n{exception}")
-    
-    async def reload_extensions(self):
-        '''Reload the bot cogs'''
+            else:
+                self.log.info(f"Loaded extension {extension}")
+        self.startup_report['setup'] = time.perf_counter() - start
+        self.check_intents()
+        await self.start_metrics_server()
+        if self.owns_watchdog:
+            self.watchdog.start()
+        if self.guild_reconcile_interval:
+            self.reconcile_task = asyncio.create_task(self.reconcile_guilds())
+
+    async def start_metrics_server(self):
+        '''Serve the command metrics on localhost if metrics_port is set in config.yml'''
+        port = self.metrics_server_port()
+        if port is None or self.metrics_server is not None:
+            return
+        server = MetricsServer(self.render_metrics, port)
+        try:
+            await server.start()
+        except OSError as e:
+            self.log.warning(f"Metrics endpoint not started on port {port}\n{type(e).__name__}: {e}")
+            return
+        self.metrics_server = server
+        self.log.info(f"Metrics served on http://127.0.0.1:{port}/metrics")
+
+    def metrics_server_port(self):
+        '''Port of the metrics endpoint of this process (None to disable it)'''
+        return self.metrics_port
+
+    def render_metrics(self) -> str:
+        '''Command, send queue, HTTP and message handler metrics in Prometheus text format'''
+        return (self.command_metrics.prometheus() + self.sender.prometheus() + self.http_client.prometheus() +
+                self.router.prometheus())
+
+    async def send(self, target, *args, priority: str = 'reply', reply: bool = False, **kwargs):
+        '''Send a message through the scheduler (target: context, message, channel or member; see bots.sender.priorities)'''
+        return await self.sender.send(target, *args, priority=priority, reply=reply, **kwargs)
+
+    def check_intents(self):
+        '''Warn about loaded listeners that the configured intents don't deliver'''
+        for problem in check_listeners(self):
+            self.log.warning(problem)
+
+    async def load_timed_extension(self, extension: str):
+        '''Load an extension recording its import, constructor and cog_load times in the startup report'''
+        timings = self.startup_report['extensions'][extension] = dict()
+        start = time.perf_counter()
+        # Import the dependencies off the loop, load_extension then executes the module body only once
+        def prepare():
+            import_dependencies(extension_dependencies(extension))
+            return module_fingerprints(extension)
+        fingerprints = await asyncio.to_thread(prepare)
+        timings['dependencies'] = time.perf_counter() - start
+        timings['started'] = time.perf_counter()
+        try:
+            await self.load_extension(extension)
+            self.fingerprints[extension] = fingerprints
+        except Exception as e:
+            timings['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            timings['total'] = time.perf_counter() - start
+
+    async def add_cog(self, cog, /, **kwargs):
+        '''Add a cog, timing its module, constructor, cog_load and on_ready listeners for the startup report'''
+        self.time_ready_listeners(cog)
+        timings = self.startup_report['extensions'].get(cog.__module__, None)
+        if timings is None or 'started' not in timings or 'constructor' in timings:
+            await super().add_cog(cog, **kwargs)
+        else:
+            start = time.perf_counter()
+            timings['constructor'] = start - timings['started']
+            try:
+                await super().add_cog(cog, **kwargs)
+            finally:
+                timings['cog_load'] = time.perf_counter() - start
+        self.router.register(cog)
+
+    async def remove_cog(self, name, /, **kwargs):
+        '''Remove a cog and its message handlers'''
+        cog = await super().remove_cog(name, **kwargs)
+        if cog is not None:
+            self.router.unregister(cog)
+            self.settings.unsubscribe(cog)
+        return cog
+
+    def time_ready_listeners(self, cog):
+        '''Wrap the on_ready listeners of a cog (before it registers them) to time the first ready'''
+        for event, method_name in cog.__cog_listeners__:
+            if event != 'on_ready':
+                continue
+            listener = getattr(cog, method_name)
+            # The instance attribute shadows the method, so add_cog and remove_cog both see the wrapper
+            setattr(cog, method_name, self.timed_ready_listener(listener, cog.__module__))
+
+    def timed_ready_listener(self, listener, module: str):
+        '''Wrap an on_ready listener to add its run time to the startup report until the bot is ready'''
+        async def timed(*args, **kwargs):
+            if self.startup_report['ready'] is not None:
+                return await listener(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return await listener(*args, **kwargs)
+            finally:
+                self.startup_report['on_ready'][module] = self.startup_report['on_ready'].get(module, 0.0) + time.perf_counter() - start
+        return timed
+
+    def dispatch(self, event_name, /, *args, **kwargs):
+        '''Dispatch an event, counting the gateway traffic on the way'''
+        if event_name == 'socket_event_type':
+            self.gateway_stats.on_event_type(args[0])
+        elif event_name == 'socket_raw_receive':
+            self.gateway_stats.on_raw_receive(args[0])
+        super().dispatch(event_name, *args, **kwargs)
+
+    async def reload_extensions(self, force: bool = False):
+        '''Reload the bot cogs whose source or cog helper modules changed (all of them if forced)'''
         self.load_config()
         self.log.info(f"Reloading extensions for {self.name}")
         self.succeeded = list()
         self.failed = list()
         self.unloaded = list()
+        self.unchanged = list()
         for extension_to_load in self.extensions_to_load:
             try:
                 extension = "bots."+extension_to_load
+                fingerprints = await asyncio.to_thread(module_fingerprints, extension)
                 if extension in self.extensions:
-                    await self.reload_extension(extension)
-                    self.log.info(f"Reloaded extension {extension}")
+                    previous = self.fingerprints.get(extension, dict())
+                    changed = [module for module, digest in fingerprints.items() if previous.get(module, None) != digest]
+                    if not changed and not force:
+                        self.unchanged.append(extension)
+                        continue
+                    await self.reload_with_state(extension, changed)
+                    self.log.info(f"Reloaded extension {extension}" + (f" (changed: {', '.join(changed)})" if changed else ""))
                 else:
                     await self.load_extension(extension)
                     self.log.info(f"Loaded extension {extension}")
+                self.fingerprints[extension] = fingerprints
                 self.succeeded.append(extension)
             except Exception as e:
                 exception = f"{type(e).__name__}: {e}"
@@ -89,14 +358,45 @@ class BaseBot(commands.Bot):
         for extension in available_extensions:
             if extension.replace('bots.', '') not in self.extensions_to_load:
                 await self.unload_extension(extension)
+                self.fingerprints.pop(extension, None)
                 self.unloaded.append(extension)
                 self.log.info(f"Unloaded extension {extension}")
-        return (self.succeeded, self.failed, self.unloaded)
+        self.check_intents()
+        return (self.succeeded, self.failed, self.unloaded, self.unchanged)
+
+    async def reload_with_state(self, extension: str, changed: list):
+        '''Reload an extension, handing the state of its cogs to their successors
+
+        A cog can define export_state() returning its live state and import_state(state) to take
+        it over after the reload (also when the reload fails and the previous module is restored).
+        The changed cog helper modules are imported again along with the extension.
+        '''
+        states = dict()
+        for cog in list(self.cogs.values()):
+            if cog.__module__ == extension and hasattr(cog, 'export_state'):
+                try:
+                    states[cog.qualified_name] = cog.export_state()
+                except Exception as e:
+                    self.log.warning(f"Could not export the state of {cog.qualified_name}\n{type(e).__name__}: {e}")
+        for module in changed:
+            if module != extension:
+                sys.modules.pop(module, None)
+        try:
+            await self.reload_extension(extension)
+        finally:
+            for name, state in states.items():
+                cog = self.get_cog(name)
+                if cog is not None and hasattr(cog, 'import_state'):
+                    try:
+                        cog.import_state(state)
+                    except Exception as e:
+                        self.log.warning(f"Could not import the state of {name}\n{type(e).__name__}: {e}")
     
     async def unload_specific_extension(self, extension: str):
         '''Unload a specific extension'''
         if extension in self.extensions:
             await self.unload_extension(extension)
+            self.fingerprints.pop(extension, None)
             self.log.info(f"Unloaded extension {extension}")
         else:
             self.log.warning(f"Extension {extension} not found")
@@ -105,33 +405,60 @@ class BaseBot(commands.Bot):
     async def load_specific_extension(self, extension: str):
         '''Load a specific extension'''
         try:
+            fingerprints = await asyncio.to_thread(module_fingerprints, extension)
             await self.load_extension(extension)
+            self.fingerprints[extension] = fingerprints
             self.log.info(f"Loaded extension {extension}")
         except Exception as e:
             exception = f"{type(e).__name__}: {e}"
             self.log.error(f"Failed to load extension {extension}\n{exception}")
         return extension
     
+    async def on_message(self, message):
+        '''Classify a message once, run the message handlers interested in it and process its command'''
+        prefix = self.settings.prefix(message.guild.id if message.guild is not None else None)
+        info = MessageInfo(message, prefix, self.user)
+        self.router.dispatch(info)
+        # Commands of other bots are relayed by the General cog
+        if info.prefixed and not info.from_bot:
+            await self.process_commands(message)
+
     async def get_prefix(self, message):
         '''Get the prefix for the bot'''
-        if message.guild is None:
-            return self.default_prefix
-        return self.prefix.get(message.guild.id, self.default_prefix)
+        return self.settings.prefix(message.guild.id if message.guild is not None else None)
 
     def guild_dir(self, guild_id) -> str:
-        '''Get the data directory for a guild'''
+        '''Get the directory of a guild's files (memes and other non-document data)'''
         return os.path.join(self.data_dir, "guilds", str(guild_id))
 
     def guild_path(self, guild_id, *parts) -> str:
         '''Get a path inside a guild's data directory'''
         return os.path.join(self.guild_dir(guild_id), *parts)
 
-    def ensure_guild_dir(self, guild_id) -> str:
-        '''Create the guild's data directory if it doesn't exist'''
-        guild_dir = self.guild_dir(guild_id)
-        if not os.path.exists(guild_dir):
-            os.makedirs(guild_dir)
-        return guild_dir
+    def ensure_guild(self, guild_id) -> bool:
+        '''Register the guild with the storage backend (unless the registry knows it), True if it is new'''
+        return self.registry.ensure(guild_id)
+
+    def has_guild(self, guild_id) -> bool:
+        '''Whether the guild is registered'''
+        return self.registry.contains(guild_id)
+
+    async def reconcile_guilds(self):
+        '''Rescan the storage backend now and then, in case guild data changed outside the bot'''
+        while True:
+            await asyncio.sleep(self.guild_reconcile_interval)
+            try:
+                added, removed = await asyncio.to_thread(self.registry.reconcile)
+            except Exception as e:
+                self.log.warning(f"Guild registry reconcile failed\n{type(e).__name__}: {e}")
+                continue
+            if added or removed:
+                self.log.info(f"Guild registry reconciled: {len(added)} added, {len(removed)} removed")
+
+    def guild_state(self, name: str, loader) -> GuildState:
+        '''Create the lazy per-guild state of a cog (replaces the state of the same name on reload)'''
+        state = self.guild_states[name] = GuildState(name, loader, self.guild_state_size, self.guild_state_idle)
+        return state
 
     def bot_data_path(self, *parts) -> str:
         '''Get a path inside the bot-level (non-guild-specific) data directory'''
@@ -140,29 +467,44 @@ class BaseBot(commands.Bot):
             os.makedirs(bot_dir)
         return os.path.join(bot_dir, *parts)
 
+    def load_bot_data(self, filename):
+        '''Load a static bot-level data file (YAML or JSON) through its compiled snapshot'''
+        snapshot_dir = os.path.join(self.data_dir, "snapshots") if self.snapshots else None
+        return load_compiled(self.bot_data_path(filename), snapshot_dir)
+
+    def owns_guild(self, guild_id) -> bool:
+        '''Whether the guild is served by this process (always, unless sharded across a cluster)'''
+        return True
+
     def list_guild_ids(self) -> list:
-        '''List all guild IDs that have a data directory'''
-        guilds_dir = os.path.join(self.data_dir, "guilds")
-        if not os.path.exists(guilds_dir):
-            return []
-        return [int(guild_id) for guild_id in os.listdir(guilds_dir)
-                if guild_id.isdigit() and os.path.isdir(os.path.join(guilds_dir, guild_id))]
+        '''List the IDs of the guilds served by this process that are registered (from the guild registry)'''
+        return self.registry.list()
+
+    def local_query(self, query: str):
+        '''Answer the local part of a cross-shard query'''
+        if query == 'guilds':
+            return [{'id': guild.id, 'name': guild.name, 'member_count': guild.member_count, 'shard_id': guild.shard_id}
+                    for guild in self.guilds]
+        if query == 'metrics':
+            return {'guilds': len(self.guilds),
+                    'shards': list(getattr(self, 'shard_ids', None) or []),
+                    'latency': self.latency,
+                    'events': sum(self.gateway_stats.events.values()),
+                    'memory': memory_usage()}
+        raise ValueError(f"Unknown query {query}")
+
+    async def cluster_query(self, query: str):
+        '''Answer a query over every shard of the bot (only this process unless clustered)'''
+        data = self.local_query(query)
+        return {'0': data} if query == 'metrics' else data
 
     def load_guild_yaml(self, guild_id, filename, default=None):
-        '''Load a YAML file from a guild's data directory'''
-        if default is None:
-            default = dict()
-        file_path = self.guild_path(guild_id, filename)
-        if not os.path.exists(file_path):
-            return default
-        with open(file_path, 'r') as file:
-            return yaml.safe_load(file) or default
+        '''Load a YAML document of a guild from the storage backend'''
+        return self._load_yaml(self.cache.make_key(guild_id, filename), default)
 
     def save_guild_yaml(self, guild_id, filename, data):
-        '''Save a YAML file to a guild's data directory'''
-        self.ensure_guild_dir(guild_id)
-        with open(self.guild_path(guild_id, filename), 'w+') as file:
-            yaml.dump(data, file)
+        '''Save a YAML document of a guild to the storage backend (which registers the guild)'''
+        self._save_yaml(self.cache.make_key(guild_id, filename), data)
 
     def update_guild_yaml(self, guild_id, filename, update_fn, default=None):
         '''Load, mutate and save a guild's YAML file in one step'''
@@ -170,60 +512,181 @@ class BaseBot(commands.Bot):
         self.save_guild_yaml(guild_id, filename, data)
         return data
 
+    async def update_guild_yaml_async(self, guild_id, filename, update_fn, default=None):
+        '''Load, mutate and save a guild's YAML document while holding its lock (update_fn may be async)'''
+        async with self.locks.hold(self.cache.make_key(guild_id, filename)):
+            data = update_fn(self.load_guild_yaml(guild_id, filename, default))
+            if inspect.isawaitable(data):
+                data = await data
+            self.save_guild_yaml(guild_id, filename, data)
+            return data
+
     def delete_guild_file(self, guild_id, filename):
-        '''Delete a file from a guild's data directory'''
-        file_path = self.guild_path(guild_id, filename)
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        '''Delete a YAML document of a guild from the storage backend'''
+        key = self.cache.make_key(guild_id, filename)
+        self.cache.invalidate(key)
+        self.writer.delete(key)
 
     def clear_guild_data(self, guild_id):
         '''Clear all data for a guild'''
         guild_dir = self.guild_dir(guild_id)
+        guild_key = self.cache.make_key(guild_id, None)[0]
+        self.writer.discard([key for key in self.writer.keys() if key[0] == guild_key])
+        self.cache.invalidate_guild(guild_id)
+        self.storage.clear(guild_id)
         if os.path.exists(guild_dir):
             shutil.rmtree(guild_dir)
-        self.ensure_guild_dir(guild_id)
+        self.registry.forget(guild_id)
+        self.settings.forget(guild_id)
+        for state in self.guild_states.values():
+            state.invalidate(guild_id)
+        self.ensure_guild(guild_id)
 
     def load_bot_yaml(self, filename, default=None):
-        '''Load a YAML file from the bot-level data directory'''
+        '''Load a bot-level YAML document from the storage backend'''
+        return self._load_yaml(self.cache.make_key(None, filename), default)
+
+    def save_bot_yaml(self, filename, data):
+        '''Save a bot-level YAML document to the storage backend'''
+        self._save_yaml(self.cache.make_key(None, filename), data)
+
+    def _load_yaml(self, key, default=None):
+        '''Load a YAML document through the document cache'''
         if default is None:
             default = dict()
-        file_path = self.bot_data_path(filename)
-        if not os.path.exists(file_path):
-            return default
-        with open(file_path, 'r') as file:
-            return yaml.safe_load(file) or default
+        found, data = self.writer.lookup(key)
+        if not found:
+            found, data = self.cache.get(key, self.storage.signature(*key))
+        if not found:
+            signature = self.storage.signature(*key)
+            data = self.storage.load(*key)
+            if data is None:
+                return default
+            self.cache.put(key, signature, data)
+        return data or default
 
-    def save_bot_yaml(self, filename, data):
-        '''Save a YAML file to the bot-level data directory'''
-        with open(self.bot_data_path(filename), 'w+') as file:
-            yaml.dump(data, file)
+    def _save_yaml(self, key, data):
+        '''Queue a write of a YAML document and refresh its cache entry once written'''
+        self.cache.invalidate(key)
+        if key[0] is not None:
+            self.registry.add(key[0])
+        self.writer.write(key, data, on_written=lambda written: self.cache.put(key, self.storage.signature(*key), written))
+
+    def command_tree_hash(self) -> str:
+        '''Stable hash of the global application command payload'''
+        payload = [command.to_dict(self.tree) for command in self.tree.get_commands()]
+        payload.sort(key=lambda command: (command.get('type', 1), command.get('name', '')))
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    async def sync_command_tree(self, force: bool = False) -> bool:
+        '''Sync the application commands only if they changed since the last sync (or if forced)'''
+        command_hash = self.command_tree_hash()
+        synced = self.load_bot_yaml('command_tree.yml')
+        if not force and synced.get('hash', None) == command_hash and synced.get('application_id', None) == str(self.application_id):
+            self.log.info(f"Application commands unchanged, skipping sync")
+            return False
+        commands = await self.tree.sync()
+        self.save_bot_yaml('command_tree.yml', {'hash': command_hash, 'application_id': str(self.application_id), 'commands': len(commands)})
+        self.log.info(f"Synced {len(commands)} application commands")
+        return True
+
+    def load_guild_settings(self, guild_ids: list) -> dict:
+        '''Register the new guilds and load the settings of the others: {guild_id: (is_new, settings)}'''
+        guild_settings = dict()
+        for guild_id in guild_ids:
+            is_new = self.ensure_guild(guild_id)
+            guild_settings[guild_id] = (is_new, GuildSettings(guild_id) if is_new else self.settings.load(guild_id))
+        return guild_settings
 
     async def on_ready(self):
         ''' Called when the bot is ready '''
+        start = time.perf_counter()
         self.log.info(f"Logged in as {self.user.name} ({self.user.id})")
+        guild_settings = await asyncio.to_thread(self.load_guild_settings, [guild.id for guild in self.guilds])
         for guild in self.guilds:
-            self.prefix[guild.id] = self.default_prefix
-            is_new = not os.path.exists(self.guild_dir(guild.id))
-            self.ensure_guild_dir(guild.id)
-            if is_new:
-                self.log.info(f"Data directory created for {guild.name}")
-            else:
-                self.log.info(f"Data directory for {guild.name} already exists")
-                settings = self.load_guild_yaml(guild.id, 'settings.yml')
-                if settings:
-                    self.log.info(f"Loaded custom settings for {guild.name}")
-                    self.prefix[guild.id] = settings.get('prefix', self.default_prefix)
-                    if settings.get('log_channel', None) is not None:
-                        self.log.set_log_channel(guild.id, self.get_channel(settings.get('log_channel', None)))
-                else:
-                    self.log.info(f"No custom settings found for {guild.name}")
-            self.log.info(f"{self.name} is ready in {guild.name}; prefix: {self.prefix[guild.id]}", guild)
-        await self.tree.sync()
+            self.apply_guild_settings(guild, *guild_settings[guild.id])
+        await self.sync_command_tree()
+        if self.startup_report['ready'] is None:
+            self.startup_report['on_ready']['core'] = time.perf_counter() - start
+            self.startup_report['ready'] = time.perf_counter() - self.created
+            self.log.info(f"{self.name} ready {self.startup_report['ready']:.2f} s after launch (extensions loaded in {self.startup_report['setup'] or 0:.2f} s)")
+            if self.warm_up_dependencies:
+                self.warm_up_task = asyncio.create_task(self.warm_up())
+
+    async def warm_up(self):
+        '''Import the lazy dependencies of the extensions and build their clients in a worker thread'''
+        start = time.perf_counter()
+        results = await asyncio.to_thread(lazy.warm_up)
+        for name, result in results.items():
+            if isinstance(result, Exception):
+                self.log.warning(f"Could not warm up {name}, it loads on first use\n{type(result).__name__}: {result}")
+        self.startup_report['warm_up'] = time.perf_counter() - start
+        if results:
+            self.log.info(f"Warmed up {len(results)} lazy dependencies in {self.startup_report['warm_up']:.2f} s")
                           
+    def apply_guild_settings(self, guild, is_new: bool, settings: GuildSettings):
+        '''Apply the settings of a guild loaded by load_guild_settings'''
+        self.settings.put(settings)
+        if is_new:
+            self.log.info(f"Guild data registered for {guild.name}")
+        else:
+            self.log.info(f"Guild data for {guild.name} already exists")
+            if settings.document():
+                self.log.info(f"Loaded custom settings for {guild.name}")
+                self.apply_log_channel(guild.id, None, settings.log_channel)
+                self.apply_log_levels(guild.id, None, settings.log_levels)
+            else:
+                self.log.info(f"No custom settings found for {guild.name}")
+        self.log.info(f"{self.name} is ready in {guild.name}; prefix: {self.settings.prefix(guild.id)}", guild)
+
+    def apply_log_channel(self, guild_id, old, channel_id):
+        '''Send the logs of a guild to its log channel (settings subscriber)'''
+        if channel_id is None:
+            self.log.remove_log_channel(guild_id)
+        else:
+            self.log.set_log_channel(guild_id, self.get_channel(channel_id))
+
+    def apply_log_levels(self, guild_id, old, levels: dict):
+        '''Apply the log levels of a guild (settings subscriber)'''
+        self.log.set_guild_levels(guild_id, levels)
+
+    async def on_guild_join(self, guild):
+        ''' Called when the bot joins a guild '''
+        guild_settings = await asyncio.to_thread(self.load_guild_settings, [guild.id])
+        self.apply_guild_settings(guild, *guild_settings[guild.id])
+
+    async def on_guild_remove(self, guild):
+        ''' Called when the bot leaves a guild (its data is kept) '''
+        self.registry.leave(guild.id)
+        self.log.remove_log_channel(guild.id)
+        self.settings.forget(guild.id)
+        self.log.info(f"Removed from {guild.name}, its data is kept")
+
     async def close(self):
         '''Execute when bot is closed'''
+        if self.is_closed():
+            return
+        if self.reconcile_task is not None:
+            self.reconcile_task.cancel()
+            self.reconcile_task = None
+        if self.warm_up_task is not None:
+            self.warm_up_task.cancel()
+            self.warm_up_task = None
+        await self.writer.flush()
+        await self.log.flush()
+        await self.sender.close()
+        await self.response_cache.close()
+        await self.http_client.close()
+        self.storage.close()
+        if self.metrics_server is not None:
+            await self.metrics_server.close()
+        if self.watchdog is not None:
+            self.watchdog.detach(self)
+            if self.owns_watchdog:
+                await self.watchdog.stop()
         self.log.info("Bot execution terminated.", None, False)
         await super().close()
+        self.log.close()
     
     def run(self, token=None):
         '''Starts the bot execution'''
@@ -233,18 +696,41 @@ class BaseBot(commands.Bot):
         else:
             self.log.error(f"Token not found for {self.name}. Please set the TOKEN as environment variable.")
 
+    async def invoke(self, context: Context):
+        '''Invoke a command with its guild, channel, user and name attached to every record it logs'''
+        if context.command is None:
+            return await super().invoke(context)
+        token = log_context.set({'guild_id': context.guild.id if context.guild is not None else None,
+                                 'channel_id': context.channel.id,
+                                 'user_id': context.author.id,
+                                 'command': context.command.qualified_name})
+        start = time.perf_counter()
+        try:
+            await super().invoke(context)
+        finally:
+            duration = time.perf_counter() - start
+            self.log.info(f"Command {context.command.qualified_name} finished in {duration * 1000:.0f} ms", None, False,
+                          duration=round(duration, 4))
+            log_context.reset(token)
+
     async def on_command(self, context: Context):
         ''' Called when a command is used '''
+        self.command_metrics.start(context)
         info = f"Command {context.command.name} used by @{context.author.name}"
         info += f" in #{context.channel.name} of {context.guild.name}" if context.guild is not None else f" in DMs."
         self.log.info(info, context.guild)
 
+    async def on_command_completion(self, context: Context):
+        ''' Called when a command completed successfully '''
+        self.command_metrics.finish(context)
+
     async def on_command_error(self, context : Context, e : Exception):
         '''Execute when a command error occurs'''
+        self.command_metrics.finish(context, failed=True)
         if isinstance(e, commands.CommandNotFound):
             embed = discord.Embed(
                 title="Command not found :confused:",
-                description=f"Use `{self.prefix[context.guild.id]}help` to see all available commands.",
+                description=f"Use `{self.settings.prefix(context.guild.id if context.guild else None)}help` to see all available commands.",
                 color=self.default_color,
             )
             self.log.warning(f"Incorrect command used by @{context.author.name} in #{context.channel.name} of {context.guild.name}\nException: `{e}`", context.guild)
@@ -260,7 +746,7 @@ class BaseBot(commands.Bot):
         elif isinstance(e, commands.MissingRequiredArgument):
             embed = discord.Embed(
                 title="Missing argument :confused:",
-                description=f"Use `{self.prefix[context.guild.id]}help {context.command.name}` to see the usage.",
+                description=f"Use `{self.settings.prefix(context.guild.id if context.guild else None)}help {context.command.name}` to see the usage.",
                 color=self.default_color,
             )
             self.log.warning(f"Missing argument for command '{context.command.name}' by @{context.author.name} in #{context.channel.name} of {context.guild.name}\nException:`{e}`", context.guild)
@@ -292,3 +778,43 @@ class BaseBot(commands.Bot):
    
 
 
+
+class ShardedBot(BaseBot, commands.AutoShardedBot):
+    ''' Bot running a range of the shards, as a worker of a cluster '''
+
+    def __init__(self, bot_name: str, shard_ids: list = None, shard_count: int = None):
+        ''' Initialize the bot for the given shards (all of them when shard_ids is None) '''
+        self.cluster = None
+        if shard_ids:
+            self.log_suffix = f"shards{shard_ids[0]}-{shard_ids[-1]}"
+        super().__init__(bot_name, shard_ids=shard_ids, shard_count=shard_count)
+
+    def owns_guild(self, guild_id) -> bool:
+        '''Whether the guild belongs to one of the shards of this worker'''
+        if self.shard_ids is None or not self.shard_count:
+            return True
+        return ((int(guild_id) >> 22) % self.shard_count) in self.shard_ids
+
+    def metrics_server_port(self):
+        '''Each worker of a cluster serves its metrics on metrics_port + worker id'''
+        if self.metrics_port is None or self.cluster is None:
+            return self.metrics_port
+        return self.metrics_port + self.cluster.worker_id
+
+    async def sync_command_tree(self, force: bool = False) -> bool:
+        '''Only the first worker of a cluster syncs the application commands'''
+        if self.cluster is not None and self.cluster.worker_id != 0:
+            return False
+        return await super().sync_command_tree(force)
+
+    async def cluster_query(self, query: str):
+        '''Answer a query over every worker of the cluster through the coordinator'''
+        if self.cluster is None:
+            return await super().cluster_query(query)
+        return await self.cluster.request(query)
+
+    async def close(self):
+        '''Close the bot and the link to the coordinator'''
+        await super().close()
+        if self.cluster is not None:
+            await self.cluster.close()
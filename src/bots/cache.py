@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Author: Kabilan Tamilmani
+# E-mail: kavikabilan37@gmail.com
+# Github: Kabilan-T
+
+''' In-memory document cache for the bot data documents '''
+
+#-------------------------------------------------------------------------------
+
+import copy
+import threading
+from collections import OrderedDict
+
+class DocumentCache():
+    ''' Bounded LRU cache of parsed data documents keyed by (guild_id, filename) '''
+
+    def __init__(self, max_entries: int = 1024):
+        ''' Initialize the cache '''
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()   # Extensions load their data from worker threads
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(guild_id, filename) -> tuple:
+        '''Build the cache key (guild ids may come in as int or str)'''
+        return (str(guild_id) if guild_id is not None else None, filename)
+
+    def get(self, key, signature):
+        '''Get a copy of the cached document if the stored signature is unchanged'''
+        with self.lock:
+            entry = self.entries.get(key, None)
+            if entry is not None:
+                cached_signature, data = entry
+                if cached_signature == signature:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return True, copy.deepcopy(data)
+                del self.entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, signature, data):
+        '''Store a copy of the document along with its storage signature'''
+        data = copy.deepcopy(data)
+        with self.lock:
+            if signature is None:
+                self.entries.pop(key, None)
+                return
+            self.entries[key] = (signature, data)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        '''Drop a single document from the cache'''
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def invalidate_guild(self, guild_id):
+        '''Drop every cached document of a guild'''
+        guild_key = self.make_key(guild_id, None)[0]
+        self.drop(lambda key: key[0] == guild_key)
+
+    def drop(self, predicate):
+        '''Drop every cached document whose key matches the predicate'''
+        with self.lock:
+            for key in [key for key in self.entries if predicate(key)]:
+                del self.entries[key]
+
+    def count(self, predicate) -> int:
+        '''Number of cached documents whose key matches the predicate'''
+        with self.lock:
+            return sum(1 for key in self.entries if predicate(key))
+
+    def clear(self):
+        '''Drop every cached document'''
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> dict:
+        '''Get the cache counters'''
+        lookups = self.hits + self.misses
+        return {'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits / lookups) if lookups else 0.0}
+
+class CacheView():
+    ''' Per-bot view of a DocumentCache shared by several bots, keys are prefixed with the bot namespace '''
+
+    make_key = staticmethod(DocumentCache.make_key)
+
+    def __init__(self, cache: DocumentCache, namespace: str):
+        ''' Initialize the view '''
+        self.cache = cache
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, signature):
+        '''Get a copy of the cached document if the stored signature is unchanged'''
+        found, data = self.cache.get((self.namespace, key), signature)
+        if found:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return found, data
+
+    def put(self, key, signature, data):
+        '''Store a copy of the document along with its storage signature'''
+        self.cache.put((self.namespace, key), signature, data)
+
+    def invalidate(self, key):
+        '''Drop a single document from the cache'''
+        self.cache.invalidate((self.namespace, key))
+
+    def invalidate_guild(self, guild_id):
+        '''Drop every cached document of a guild'''
+        guild_key = self.make_key(guild_id, None)[0]
+        self.cache.drop(lambda key: key[0] == self.namespace and key[1][0] == guild_key)
+
+    def clear(self):
+        '''Drop every cached document of this bot'''
+        self.cache.drop(lambda key: key[0] == self.namespace)
+
+    def stats(self) -> dict:
+        '''Get the counters of this bot (capacity and evictions are shared)'''
+        lookups = self.hits + self.misses
+        return {'entries': self.cache.count(lambda key: key[0] == self.namespace),
+                'max_entries': self.cache.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.cache.evictions,
+                'hit_rate': (self.hits / lookups) if lookups else 0.0}
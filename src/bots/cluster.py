@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Author: Kabilan Tamilmani
+# E-mail: kavikabilan37@gmail.com
+# Github: Kabilan-T
+
+''' Local coordinator and worker link of a sharded bot cluster
+
+The coordinator listens on localhost, the workers connect to it and exchange
+newline-delimited JSON messages:
+    hello    worker -> coordinator   worker id, shard ids and the cluster secret
+    log      worker -> coordinator   forwarded log record
+    metrics  worker -> coordinator   periodic worker counters
+    request  worker -> coordinator   cross-shard query, answered with a reply
+    query    coordinator -> worker   local part of a cross-shard query, answered with a reply
+    shutdown coordinator -> worker   close the bot
+'''
+
+#-------------------------------------------------------------------------------
+
+import json
+import asyncio
+import logging
+import itertools
+
+query_timeout = 10 # seconds to wait for the workers to answer a query
+
+def shard_ranges(shard_count: int, workers: int) -> list:
+    '''Split the shard ids into contiguous ranges, one per worker'''
+    workers = max(1, min(workers, shard_count))
+    size, extra = divmod(shard_count, workers)
+    ranges = list()
+    start = 0
+    for worker in range(workers):
+        end = start + size + (1 if worker < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+async def send_message(writer: asyncio.StreamWriter, message: dict):
+    '''Send one message on a cluster connection'''
+    writer.write(json.dumps(message, default=str).encode() + b"\n")
+    await writer.drain()
+
+class Coordinator():
+    ''' Collects the logs and metrics of the workers and answers their cross-shard queries '''
+
+    def __init__(self, log, secret: str):
+        ''' Initialize the coordinator '''
+        self.log = log
+        self.secret = secret
+        self.workers = dict()   # worker id -> stream writer
+        self.shards = dict()    # worker id -> shard ids
+        self.metrics = dict()   # worker id -> latest metrics
+        self.pending = dict()   # query id -> (future, replies)
+        self.ids = itertools.count()
+        self.server = None
+        self.port = None
+
+    async def start(self):
+        '''Listen on an ephemeral localhost port'''
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.log.info(f"Cluster coordinator listening on 127.0.0.1:{self.port}")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        '''Serve one worker connection'''
+        worker_id = None
+        try:
+            hello = json.loads(await reader.readline() or b"{}")
+            if hello.get('type') != 'hello' or hello.get('secret') != self.secret:
+                self.log.warning("Rejected a cluster connection without the cluster secret")
+                return
+            worker_id = hello['worker']
+            self.workers[worker_id] = writer
+            self.shards[worker_id] = hello['shards']
+            self.log.info(f"Worker {worker_id} connected with shards {hello['shards']}")
+            while line := await reader.readline():
+                try:
+                    message = json.loads(line)
+                except json.JSONDecodeError as e:
+                    self.log.warning(f"Invalid message from worker {worker_id}\n{type(e).__name__}: {e}")
+                    continue
+                await self.dispatch(worker_id, writer, message)
+        except (ConnectionError, json.JSONDecodeError, KeyError) as e:
+            self.log.warning(f"Worker {worker_id} connection failed\n{type(e).__name__}: {e}")
+        finally:
+            if worker_id is not None and self.workers.get(worker_id, None) is writer:
+                del self.workers[worker_id]
+                self.log.warning(f"Worker {worker_id} disconnected")
+            writer.close()
+
+    async def dispatch(self, worker_id: int, writer: asyncio.StreamWriter, message: dict):
+        '''Handle one message of a worker'''
+        kind = message.get('type')
+        if kind == 'log':
+            self.log.log.log(message['level'], f"[worker {worker_id}] {message['message']}")
+        elif kind == 'metrics':
+            self.metrics[worker_id] = message['metrics']
+        elif kind == 'reply':
+            pending = self.pending.get(message.get('id'), None)
+            if pending is not None:
+                future, replies, errors = pending
+                if 'error' in message:
+                    errors[worker_id] = message['error']
+                else:
+                    replies[worker_id] = message['data']
+                if len(replies) + len(errors) >= len(self.workers) and not future.done():
+                    future.set_result(replies)
+        elif kind == 'request':
+            asyncio.create_task(self.answer(writer, message))
+
+    async def answer(self, writer: asyncio.StreamWriter, request: dict):
+        '''Answer a cross-shard request of a worker'''
+        reply = {'type': 'reply', 'id': request.get('id')}
+        if request.get('query') == 'metrics':
+            reply['data'] = {str(worker_id): metrics for worker_id, metrics in self.metrics.items()}
+        else:
+            replies, errors = await self.query(request.get('query'))
+            if errors and not replies:
+                reply['error'] = next(iter(errors.values()))
+            reply['data'] = [item for worker_id in sorted(replies) for item in replies[worker_id]]
+        try:
+            await send_message(writer, reply)
+        except ConnectionError:
+            pass
+
+    async def query(self, query: str) -> tuple:
+        '''Ask every worker for its part of a query: ({worker_id: data}, {worker_id: error})'''
+        query_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        replies = dict()
+        errors = dict()
+        self.pending[query_id] = (future, replies, errors)
+        try:
+            for writer in list(self.workers.values()):
+                await send_message(writer, {'type': 'query', 'id': query_id, 'query': query})
+            await asyncio.wait_for(future, timeout=query_timeout)
+        except asyncio.TimeoutError:
+            self.log.warning(f"Query {query} answered by {len(replies)} of {len(self.workers)} workers")
+        finally:
+            del self.pending[query_id]
+        for worker_id, error in errors.items():
+            self.log.warning(f"Query {query} failed on worker {worker_id}\n{error}")
+        return replies, errors
+
+    async def shutdown(self):
+        '''Ask every worker to close its bot and stop listening'''
+        for writer in list(self.workers.values()):
+            try:
+                await send_message(writer, {'type': 'shutdown'})
+            except ConnectionError:
+                pass
+        if self.server is not None:
+            self.server.close()
+
+    def summary(self) -> str:
+        '''One line summary of the latest worker metrics'''
+        guilds = sum(metrics.get('guilds', 0) for metrics in self.metrics.values())
+        events = sum(metrics.get('events', 0) for metrics in self.metrics.values())
+        memory = sum(metrics.get('memory', 0) for metrics in self.metrics.values())
+        return (f"{len(self.workers)} workers, {guilds} guilds, {events} events, "
+                f"{memory / 2**20:.1f} MiB")
+
+class ClusterLogHandler(logging.Handler):
+    ''' Forwards the log records of a worker to the coordinator '''
+
+    def __init__(self, client):
+        ''' Initialize the handler '''
+        super().__init__(level=logging.INFO)
+        self.client = client
+
+    def emit(self, record: logging.LogRecord):
+        '''Queue the record on the worker connection (records may come from any thread)'''
+        try:
+            message = {'type': 'log', 'level': record.levelno, 'message': record.getMessage()}
+            self.client.loop.call_soon_threadsafe(self.client.post, message)
+        except RuntimeError:
+            pass # loop closed
+
+class ClusterClient():
+    ''' Link of a worker to the coordinator '''
+
+    def __init__(self, bot, worker_id: int, port: int, secret: str, metrics_interval: float = 30):
+        ''' Initialize the link '''
+        self.bot = bot
+        self.worker_id = worker_id
+        self.port = port
+        self.secret = secret
+        self.metrics_interval = metrics_interval
+        self.loop = None
+        self.reader = None
+        self.writer = None
+        self.pending = dict()   # request id -> future
+        self.ids = itertools.count()
+        self.tasks = list()
+
+    async def connect(self):
+        '''Connect to the coordinator and start forwarding logs and metrics'''
+        self.loop = asyncio.get_running_loop()
+        self.reader, self.writer = await asyncio.open_connection("127.0.0.1", self.port)
+        await send_message(self.writer, {'type': 'hello', 'worker': self.worker_id,
+                                         'shards': self.bot.shard_ids, 'secret': self.secret})
+        self.bot.log.log.addHandler(ClusterLogHandler(self))
+        self.tasks.append(asyncio.create_task(self.listen()))
+        self.tasks.append(asyncio.create_task(self.report_metrics()))
+
+    def post(self, message: dict):
+        '''Send a message without waiting (called on the loop)'''
+        if self.writer is not None and not self.writer.is_closing():
+            self.writer.write(json.dumps(message, default=str).encode() + b"\n")
+
+    async def listen(self):
+        '''Handle the messages of the coordinator'''
+        while line := await self.reader.readline():
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError as e:
+                self.bot.log.warning(f"Invalid message from the cluster coordinator\n{type(e).__name__}: {e}")
+                continue
+            kind = message.get('type')
+            if kind == 'query':
+                try:
+                    reply = {'type': 'reply', 'id': message['id'], 'data': self.bot.local_query(message['query'])}
+                except Exception as e:
+                    self.bot.log.warning(f"Cluster query {message.get('query')} failed\n{type(e).__name__}: {e}")
+                    reply = {'type': 'reply', 'id': message.get('id'), 'data': [], 'error': f"{type(e).__name__}: {e}"}
+                await send_message(self.writer, reply)
+            elif kind == 'reply':
+                future = self.pending.pop(message.get('id'), None)
+                if future is None or future.done():
+                    continue
+                if 'error' in message:
+                    future.set_exception(RuntimeError(message['error']))
+                else:
+                    future.set_result(message['data'])
+            elif kind == 'shutdown':
+                asyncio.create_task(self.bot.close())
+        # Coordinator is gone, nobody aggregates this worker anymore
+        if not self.bot.is_closed():
+            asyncio.create_task(self.bot.close())
+
+    async def report_metrics(self):
+        '''Send the worker counters periodically'''
+        while True:
+            self.post({'type': 'metrics', 'metrics': self.bot.local_query('metrics')})
+            await asyncio.sleep(self.metrics_interval)
+
+    async def request(self, query: str):
+        '''Run a cross-shard query through the coordinator'''
+        request_id = next(self.ids)
+        future = self.loop.create_future()
+        self.pending[request_id] = future
+        await send_message(self.writer, {'type': 'request', 'id': request_id, 'query': query})
+        try:
+            return await asyncio.wait_for(future, timeout=query_timeout + 5)
+        finally:
+            self.pending.pop(request_id, None)
+
+    async def close(self):
+        '''Stop the link'''
+        for task in self.tasks:
+            task.cancel()
+        if self.writer is not None:
+            self.writer.close()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Author: Kabilan Tamilmani
+# E-mail: kavikabilan37@gmail.com
+# Github: Kabilan-T
+
+''' YAML/JSON serialization helpers and compiled snapshots of the static data files '''
+
+#-------------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import yaml
+import marshal
+import tempfile
+
+# libyaml bindings are much faster, fall back to the pure Python classes if PyYAML was built without them
+SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+SafeDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+libyaml = SafeLoader is not yaml.SafeLoader
+
+snapshot_tag = f"{sys.implementation.cache_tag}-marshal{marshal.version}"
+
+def load_yaml(stream):
+    '''Parse a YAML document (string or file)'''
+    return yaml.load(stream, Loader=SafeLoader)
+
+def dump_yaml(data, stream=None):
+    '''Serialize a YAML document, returns the string if no stream is given'''
+    return yaml.dump(data, stream, Dumper=SafeDumper)
+
+def load_json(stream):
+    '''Parse a JSON document (string or file)'''
+    if isinstance(stream, str):
+        return json.loads(stream)
+    return json.load(stream)
+
+def parser_for(file_path):
+    '''Pick the parser from the file extension'''
+    if file_path.endswith('.json'):
+        return load_json
+    return load_yaml
+
+def load_file(file_path, encoding="utf-8"):
+    '''Parse a YAML or JSON file'''
+    with open(file_path, 'r', encoding=encoding) as file:
+        return parser_for(file_path)(file)
+
+def snapshot_path(file_path, snapshot_dir) -> str:
+    '''Get the snapshot path of a source file'''
+    return os.path.join(snapshot_dir, os.path.basename(file_path) + ".snapshot")
+
+def source_signature(file_path) -> tuple:
+    '''Get the (mtime, size) signature of a source file'''
+    stat = os.stat(file_path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def read_snapshot(file_path, snapshot_dir):
+    '''Get the snapshot of a source file: (found, data), stale or unreadable snapshots are not found'''
+    try:
+        with open(snapshot_path(file_path, snapshot_dir), 'rb') as file:
+            tag, signature, data = marshal.loads(file.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return False, None
+    if tag != snapshot_tag or signature != source_signature(file_path):
+        return False, None
+    return True, data
+
+def write_snapshot(file_path, snapshot_dir, signature, data) -> bool:
+    '''Write the snapshot of a source file, False if the data can't be marshalled (e.g. dates)'''
+    try:
+        payload = marshal.dumps((snapshot_tag, signature, data))
+    except ValueError:
+        return False
+    os.makedirs(snapshot_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=snapshot_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(payload)
+        os.replace(tmp_path, snapshot_path(file_path, snapshot_dir))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return True
+
+def load_compiled(file_path, snapshot_dir=None, encoding="utf-8"):
+    '''Load a static YAML/JSON file from its snapshot, re-parsing and rebuilding it when the source changed'''
+    if snapshot_dir is None:
+        return load_file(file_path, encoding)
+    found, data = read_snapshot(file_path, snapshot_dir)
+    if found:
+        return data
+    signature = source_signature(file_path)
+    data = load_file(file_path, encoding)
+    write_snapshot(file_path, snapshot_dir, signature, data)
+    return data
@@ -10,7 +10,6 @@
 #-------------------------------------------------------------------------------
 
 import os
-import yaml
 import discord
 import typing
 import datetime
@@ -53,7 +52,7 @@ class Announcements(commands.Cog, name="Announcements"):
             if general_channel is not None:
                 embed.set_author(name=self.bot.name+", The Autopilot", icon_url=self.bot.user.avatar.url)
                 embed.set_footer(text=f"Earth Date: {today} \t\t\t\tStar Date: {(discord.utils.utcnow() - guild.created_at).days} days")
-                await general_channel.send(embed=embed)
+                await self.bot.send(general_channel, embed=embed, priority='broadcast')
                 self.bot.log.info(f"Sending today's highlights to {guild.name} in {general_channel.name}", guild)
             else:
                 self.bot.log.warning(f"No general channel found in {guild.name}", guild)
@@ -72,8 +71,7 @@ class Announcements(commands.Cog, name="Announcements"):
             self.bot.log.warning(f"Holidays file not found in {data_fpath}")
             return None
         try:
-            with open(data_fpath, "r") as file:
-                holidays = yaml.load(file, Loader=yaml.FullLoader) or None
+            holidays = self.bot.load_bot_data("holidays_2026.yml") or None
             self.bot.log.info(f"Loaded {len(holidays)} holidays from {data_fpath}")
             return holidays
         except Exception as e:
@@ -88,11 +86,11 @@ class Announcements(commands.Cog, name="Announcements"):
         self.bot.log.info(f"New member {member.display_name} joined {guild.name}", guild)
         if guild.system_channel is not None:
             embed = await self.get_welcome_message(guild, member)
-            await guild.system_channel.send(embed=embed)
+            await self.bot.send(guild.system_channel, embed=embed, priority='broadcast')
             self.bot.log.info(f"Sending greeting message to {member.display_name} in {guild.system_channel.name}", guild)
         try:
             embed = await self.get_welcome_dm_message(guild, member)
-            await member.send(embed=embed)
+            await self.bot.send(member, embed=embed, priority='broadcast')
             self.bot.log.info(f"Sending greeting message to {member.display_name} in DM", guild)
         except discord.Forbidden:
             self.bot.log.warning(f"Failed to send greeting message to {member.display_name} in DM", guild)
@@ -106,11 +104,11 @@ class Announcements(commands.Cog, name="Announcements"):
         self.bot.log.info(f"Member {member.display_name} left {guild.name}", guild)
         if guild.system_channel is not None:
             embed = await self.get_goodbye_message(guild, member)
-            await guild.system_channel.send(embed=embed)
+            await self.bot.send(guild.system_channel, embed=embed, priority='broadcast')
             self.bot.log.info(f"Sending goodbye message to {member.display_name} in {guild.system_channel.name}", guild)
         try:
             embed = await self.get_goodbye_dm_message(guild, member)
-            await member.send(embed=embed)
+            await self.bot.send(member, embed=embed, priority='broadcast')
             self.bot.log.info(f"Sending goodbye message to {member.display_name} in DM", guild)
         except discord.Forbidden:
             self.bot.log.warning(f"Failed to send goodbye message to {member.display_name} in DM", guild)
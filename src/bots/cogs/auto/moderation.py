@@ -9,7 +9,6 @@
 
 #-------------------------------------------------------------------------------
 
-import asyncio
 import discord
 import typing
 import datetime
@@ -29,8 +28,11 @@ PermissionBasic = discord.Permissions(send_messages=True)
 class Moderation(commands.Cog, name="Moderation"):
     def __init__(self, bot):
         self.bot = bot
-        self.warns = dict()
-        self.read_warns()
+        self.warns = self.bot.guild_state("Moderation.warns", self.read_warns)
+
+    async def cog_before_invoke(self, context: Context):
+        '''Read the warns of the guild off the event loop'''
+        await self.warns.hydrate(context.guild.id if context.guild else None)
 
     def check(self, context: Context, permission):
         # Check if the user has the required permissions
@@ -54,7 +56,7 @@ class Moderation(commands.Cog, name="Moderation"):
         if reason is not None:
             embed.add_field(name="Reason", value=reason, inline=False)
         try:
-            await member.send(embed=embed)
+            await self.bot.send(member, embed=embed, priority='moderation')
         except discord.DiscordException:
             self.bot.log.warning(f"Could not send DM to @{member.name} about {action} activity in {context.guild.name}", context.guild)
             pass
@@ -69,7 +71,7 @@ class Moderation(commands.Cog, name="Moderation"):
                 description=f"{member.mention} is not in a voice channel.",
                 color=self.bot.default_color,
                 )
-            await context.send(embed=embed)
+            await self.bot.send(context, embed=embed, priority='moderation')
             return
         await member.edit(mute=True, reason=reason)
         self.bot.log.info(f"{context.author.name} muted {member.name} in {context.guild.name}", context.guild)
@@ -79,7 +81,7 @@ class Moderation(commands.Cog, name="Moderation"):
             color=self.bot.default_color,
             )
         if reason is not None: embed.add_field(name="Reason", value=reason, inline=False)
-        await context.send(embed=embed)
+        await self.bot.send(context, embed=embed, priority='moderation')
     
     @commands.command( name="unmute", description="Unmute a member in the server.")
     async def unmute(self, context: Context, member: discord.Member, *, reason: str = None):
@@ -91,7 +93,7 @@ class Moderation(commands.Cog, name="Moderation"):
                 description=f"{member.mention} is not in a voice channel.",
                 color=self.bot.default_color,
                 )
-            await context.send(embed=embed)
+            await self.bot.send(context, embed=embed, priority='moderation')
             return
         await member.edit(mute=False, reason=reason)
         self.bot.log.info(f"{context.author.name} unmuted {member.name} in {context.guild.name}", context.guild)
@@ -101,7 +103,7 @@ class Moderation(commands.Cog, name="Moderation"):
             color=self.bot.default_color,
             )
         if reason is not None: embed.add_field(name="Reason", value=reason, inline=False)
-        await context.send(embed=embed)
+        await self.bot.send(context, embed=embed, priority='moderation')
     
     @commands.command( name="deafen", description="Deafen a member in the server.")
     async def deafen(self, context: Context, member: discord.Member, *, reason: str = None):
@@ -113,7 +115,7 @@ class Moderation(commands.Cog, name="Moderation"):
                 description=f"{member.mention} is not in a voice channel.",
                 color=self.bot.default_color,
                 )
-            await context.send(embed=embed)
+            await self.bot.send(context, embed=embed, priority='moderation')
             return
         await member.edit(deafen=True, reason=reason)
         self.bot.log.info(f"{context.author.name} deafened {member.name} in {context.guild.name}", context.guild)
@@ -123,7 +125,7 @@ class Moderation(commands.Cog, name="Moderation"):
             color=self.bot.default_color,
             )
         if reason is not None: embed.add_field(name="Reason", value=reason, inline=False)
-        await context.send(embed=embed)
+        await self.bot.send(context, embed=embed, priority='moderation')
     
     @commands.command( name="undeafen", description="Undeafen a member in the server.")
     async def undeafen(self, context: Context, member: discord.Member, *, reason: str = None):
@@ -135,7 +137,7 @@ class Moderation(commands.Cog, name="Moderation"):
                 description=f"{member.mention} is not in a voice channel.",
                 color=self.bot.default_color,
                 )
-            await context.send(embed=embed)
+            await self.bot.send(context, embed=embed, priority='moderation')
             return
         await member.edit(deafen=False, reason=reason)
         self.bot.log.info(f"{context.author.name} undeafened {member.name} in {context.guild.name}", context.guild)
@@ -145,7 +147,7 @@ class Moderation(commands.Cog, name="Moderation"):
             color=self.bot.default_color,
             )
         if reason is not None: embed.add_field(name="Reason", value=reason, inline=False)
-        await context.send(embed=embed)
+        await self.bot.send(context, embed=embed, priority='moderation')
     
     @commands.command( name="timeout", description="Timeout a member in the server.")
     async def timeout(self, context: Context, member: discord.Member, duration: int, *, reason: str = None):
@@ -160,7 +162,7 @@ class Moderation(commands.Cog, name="Moderation"):
             color=self.bot.default_color,
             )
         if reason is not None: embed.add_field(name="Reason", value=reason, inline=False)
-        await context.send(embed=embed)
+        await self.bot.send(context, embed=embed, priority='moderation')
     
     @commands.command( name="remove_timeout", description="Remove the timeout of a member in the server.")
     async def removetimeout(self, context: Context, member: discord.Member, *, reason: str = None):
@@ -174,12 +176,11 @@ class Moderation(commands.Cog, name="Moderation"):
             color=self.bot.default_color,
             )
         if reason is not None: embed.add_field(name="Reason", value=reason, inline=False)
-        await context.send(embed=embed)
+        await self.bot.send(context, embed=embed, priority='moderation')
 
-    def read_warns(self):
-        '''Read the warns from the file'''
-        for guild_id in self.bot.list_guild_ids():
-            self.warns[guild_id] = self.bot.load_guild_yaml(guild_id, "warns.yml")
+    def read_warns(self, guild_id: int):
+        '''Read the warns of a guild from the file'''
+        return self.bot.load_guild_yaml(guild_id, "warns.yml")
 
     def save_warns(self, guild_id: int):
         '''Save the warns to the file'''
@@ -207,7 +208,7 @@ class Moderation(commands.Cog, name="Moderation"):
             color=self.bot.default_color,
             )
         if reason is not None: embed.add_field(name="Reason", value=reason, inline=False)
-        await context.send(embed=embed)
+        await self.bot.send(context, embed=embed, priority='moderation')
         await self.send_dm(context, member, "warned", reason)
      
     @commands.command( name="check_warns", description="Check the number of warns of one or all members in the server.")
@@ -229,7 +230,7 @@ class Moderation(commands.Cog, name="Moderation"):
                 description="No members have warns.",
                 color=self.bot.default_color,
                 )
-            await context.send(embed=embed)
+            await self.bot.send(context, embed=embed, priority='moderation')
             return
         embed = discord.Embed(
             title="Warns :warning:",
@@ -250,7 +251,7 @@ class Moderation(commands.Cog, name="Moderation"):
                 embed.description += f"{member.mention} has {self.warns[context.guild.id][member.id]} warns."
             else:
                 embed.description += f"{member.mention} has no warns."
-        await context.send(embed=embed)
+        await self.bot.send(context, embed=embed, priority='moderation')
 
     @commands.command( name="remove_warn", description="Remove a certain number of warns of a member in the server.")
     async def removewarn(self, context: Context, member: typing.Union[discord.Member, int], amount: int, *, reason: str = None):
@@ -266,7 +267,7 @@ class Moderation(commands.Cog, name="Moderation"):
                 description=f"{member.mention} has no warns.",
                 color=self.bot.default_color,
                 )
-            await context.send(embed=embed)
+            await self.bot.send(context, embed=embed, priority='moderation')
             return
         if self.warns[context.guild.id][member.id] >= amount:
             self.warns[context.guild.id][member.id] -= amount 
@@ -284,14 +285,14 @@ class Moderation(commands.Cog, name="Moderation"):
                 color=self.bot.default_color,
                 )
             if reason is not None: embed.add_field(name="Reason", value=reason, inline=False)
-            await context.send(embed=embed)
+            await self.bot.send(context, embed=embed, priority='moderation')
         else:
             embed = discord.Embed(
                 title="Warns :confused:",
                 description=f"{member.mention} has only {self.warns[context.guild.id][member.id]} warns.",
                 color=self.bot.default_color,
                 )
-            await context.send(embed=embed)
+            await self.bot.send(context, embed=embed, priority='moderation')
             await self.send_dm(context, member, "removed " + str(amount) + " warns", reason)
         
     @commands.command( name="clear_warns", description="Clear all warns of a member in the server.")
@@ -308,7 +309,7 @@ class Moderation(commands.Cog, name="Moderation"):
                 description=f"{member.mention} has no warns.",
                 color=self.bot.default_color,
                 )
-            await context.send(embed=embed)
+            await self.bot.send(context, embed=embed, priority='moderation')
             return
         self.warns[context.guild.id][member.id] = 0
         del self.warns[context.guild.id][member.id]
@@ -324,7 +325,7 @@ class Moderation(commands.Cog, name="Moderation"):
             color=self.bot.default_color,
             )
         if reason is not None: embed.add_field(name="Reason", value=reason, inline=False)
-        await context.send(embed=embed)
+        await self.bot.send(context, embed=embed, priority='moderation')
         await self.send_dm(context, member, "cleared all warns", reason)
 
     @commands.command( name="kick", description="Kick a member from the server.")
@@ -340,7 +341,7 @@ class Moderation(commands.Cog, name="Moderation"):
             color=self.bot.default_color,
             )
         if reason is not None: embed.add_field(name="Reason", value=reason, inline=False)
-        await context.send(embed=embed)
+        await self.bot.send(context, embed=embed, priority='moderation')
     
     @commands.command( name="softban", description="Softban a member from the server.")
     async def softban(self, context: Context, member: discord.Member, *, reason: str = None):
@@ -358,7 +359,7 @@ class Moderation(commands.Cog, name="Moderation"):
             color=self.bot.default_color,
             )
         if reason is not None: embed.add_field(name="Reason", value=reason, inline=False)
-        await context.send(embed=embed)
+        await self.bot.send(context, embed=embed, priority='moderation')
 
     @commands.command( name="ban", description="Ban a member from the server.")
     async def ban(self, context: Context, member: discord.Member, *, reason: str = None):
@@ -373,7 +374,7 @@ class Moderation(commands.Cog, name="Moderation"):
             color=self.bot.default_color,
             )
         if reason is not None: embed.add_field(name="Reason", value=reason, inline=False)
-        await context.send(embed=embed)
+        await self.bot.send(context, embed=embed, priority='moderation')
 
     @commands.command( name="unban", description="Unban a member from the server.")
     async def unban(self, context: Context, member_id: int, *, reason: str = None):
@@ -389,7 +390,7 @@ class Moderation(commands.Cog, name="Moderation"):
             color=self.bot.default_color,
             )
         if reason is not None: embed.add_field(name="Reason", value=reason, inline=False)
-        await context.send(embed=embed)
+        await self.bot.send(context, embed=embed, priority='moderation')
                  
 async def setup(bot):
     await bot.add_cog(Moderation(bot))
\ No newline at end of file
@@ -17,18 +17,17 @@ class Roles(commands.Cog, name="Roles"):
     def __init__(self, bot):
         '''Initializes the role cog'''
         self.bot = bot
-        self.role_channel = dict()
-        self.default_role = dict()
-        self.reaction_roles = dict()
-        self.read_config()
-        self.read_reaction_roles()
+        self.reaction_roles = self.bot.guild_state("Roles.reaction_roles", self.read_reaction_roles)
+
+    async def cog_before_invoke(self, context: Context):
+        '''Reads the reaction roles of the guild off the event loop'''
+        await self.reaction_roles.hydrate(context.guild.id if context.guild else None)
 
     @commands.command(name="set_default_role", description="Set the default role for the new members joining the server")
     @commands.has_permissions(administrator=True)
     async def setdefaultrole(self, context: Context, role: discord.Role):
         '''Set the default role for the new members joining the server'''
-        self.default_role[context.guild.id] = role.id
-        self.bot.update_guild_yaml(context.guild.id, 'settings.yml', lambda settings: {**settings, 'default_role': role.id})
+        await self.bot.settings.update(context.guild.id, default_role=role.id)
         self.bot.log.info(f"Default role set to {role.name} by {context.author.name}", context.guild)
         embed = discord.Embed(
             title="Default Role Set",
@@ -41,8 +40,7 @@ class Roles(commands.Cog, name="Roles"):
     @commands.has_permissions(administrator=True)
     async def setrolechannel(self, context: Context, channel: discord.TextChannel):
         '''Set the channel for reaction roles'''
-        self.role_channel[context.guild.id] = channel.id
-        self.bot.update_guild_yaml(context.guild.id, 'settings.yml', lambda settings: {**settings, 'role_channel': channel.id})
+        await self.bot.settings.update(context.guild.id, role_channel=channel.id)
         self.bot.log.info(f"Role channel set to {channel.mention} by {context.author.name}", context.guild)
         embed = discord.Embed(
             title="Role Channel Set",
@@ -55,7 +53,8 @@ class Roles(commands.Cog, name="Roles"):
     @commands.has_permissions(administrator=True)
     async def addrole(self, context: Context, message: str, role: discord.Role, emoji: str):
         '''Add a role to the reaction roles'''
-        if context.guild.id not in self.role_channel.keys():
+        role_channel = self.bot.settings.get(context.guild.id).role_channel
+        if role_channel is None:
             embed = discord.Embed(
                 title="Role Channel Not Set",
                 description="Please set the role channel and try again",
@@ -65,7 +64,7 @@ class Roles(commands.Cog, name="Roles"):
             return
         if context.guild.id not in self.reaction_roles.keys():
             self.reaction_roles[context.guild.id] = dict()
-        channel = context.guild.get_channel(self.role_channel[context.guild.id])
+        channel = context.guild.get_channel(role_channel)
         embed = discord.Embed(
             title=f"React to get the {role.name} role",
             description=message,
@@ -88,14 +87,16 @@ class Roles(commands.Cog, name="Roles"):
         '''Add default role to the new member'''
         if member.bot:
             return
-        if member.guild.id in self.default_role.keys():
-            role = member.guild.get_role(self.default_role[member.guild.id])
+        default_role = self.bot.settings.get(member.guild.id).default_role
+        if default_role is not None:
+            role = member.guild.get_role(default_role)
             await member.add_roles(role)
             self.bot.log.info(f"Default community role {role.name} added to {member.display_name}", member.guild)
     
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, payload):
         '''Add role to the member when they react to the message'''
+        await self.reaction_roles.hydrate(payload.guild_id)
         if payload.guild_id in self.reaction_roles.keys():
             if payload.message_id in self.reaction_roles[payload.guild_id].keys():
                 guild = self.bot.get_guild(payload.guild_id)
@@ -110,6 +111,7 @@ class Roles(commands.Cog, name="Roles"):
     @commands.Cog.listener()
     async def on_raw_reaction_remove(self, payload):
         '''Remove role from the member when they remove the reaction'''
+        await self.reaction_roles.hydrate(payload.guild_id)
         if payload.guild_id in self.reaction_roles.keys():
             if payload.message_id in self.reaction_roles[payload.guild_id].keys():
                 guild = self.bot.get_guild(payload.guild_id)
@@ -121,17 +123,8 @@ class Roles(commands.Cog, name="Roles"):
                 await member.remove_roles(role)
                 self.bot.log.info(f"Role {role.name} removed from {member.display_name} by removing the reaction", guild)
         
-    def read_config(self):
-        for guild_id in self.bot.list_guild_ids():
-            settings = self.bot.load_guild_yaml(guild_id, 'settings.yml')
-            self.role_channel[guild_id] = settings.get("role_channel")
-            self.default_role[guild_id] = settings.get("default_role")
-
-    def read_reaction_roles(self):
-        for guild_id in self.bot.list_guild_ids():
-            reaction_roles = self.bot.load_guild_yaml(guild_id, 'reaction_roles.yml')
-            if reaction_roles:
-                self.reaction_roles[guild_id] = reaction_roles
+    def read_reaction_roles(self, guild_id: int):
+        return self.bot.load_guild_yaml(guild_id, 'reaction_roles.yml')
 
 
 async def setup(bot):
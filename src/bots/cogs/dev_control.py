@@ -85,8 +85,8 @@ class DevControl(commands.Cog, name="Developer Control"):
             await context.send(embed=embed)
             return
         guilds_info = []
-        for guild in self.bot.guilds:
-            guilds_info.append(f"{guild.name} (ID: `{guild.id}`) - Members: {guild.member_count}")
+        for guild in await self.bot.cluster_query('guilds'):
+            guilds_info.append(f"{guild['name']} (ID: `{guild['id']}`) - Members: {guild['member_count']} - Shard: {guild['shard_id']}")
         guilds_text = "\n".join(guilds_info)
         if len(guilds_text) > 2000:
             # If the text exceeds Discord's message limit, send it as a file
@@ -100,6 +100,32 @@ class DevControl(commands.Cog, name="Developer Control"):
             )
             await context.send(embed=embed)
 
+    @commands.command(name="cluster_stats", description="Show the metrics of every worker of the bot. Developer only command.", hidden=True)
+    async def cluster_stats(self, context: Context):
+        '''Show the metrics of every worker of the bot. Developer only command.'''
+        # Only allow the bot owner to use this command
+        if context.author.id != self.owner_id:
+            embed = discord.Embed(
+                title="Unauthorized",
+                description="You are not authorized to use this command.",
+                color=discord.Color.red()
+            )
+            await context.send(embed=embed)
+            return
+        workers = await self.bot.cluster_query('metrics')
+        embed = discord.Embed(
+            title="Cluster",
+            description=f"{len(workers)} workers, {sum(metrics['guilds'] for metrics in workers.values())} guilds",
+            color=self.bot.default_color
+        )
+        for worker_id, metrics in sorted(workers.items()):
+            embed.add_field(name=f"Worker {worker_id}",
+                            value=f"Shards: {metrics['shards'] or 'all'}\nGuilds: {metrics['guilds']}\n"
+                                  f"Latency: {metrics['latency'] * 1000:.0f} ms\nEvents: {metrics['events']}\n"
+                                  f"Memory: {metrics['memory'] / 2**20:.1f} MiB",
+                            inline=True)
+        await context.send(embed=embed)
+
     @commands.command(name="developer_announcement", description="Send an announcement to a specified channel in a specified guild. Developer only command.", aliases=["dev_announce"], hidden=True)
     async def developer_announcement(self, context: Context, guild_id: int, channel_id: int, title: str, *, message: str):
         '''Send an announcement to a specified channel in a specified guild. Developer only command.'''
@@ -202,9 +228,7 @@ class DevControl(commands.Cog, name="Developer Control"):
             return
         hostname = socket.gethostname()
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get("https://api.ipify.org", timeout=aiohttp.ClientTimeout(total=10)) as response:
-                    public_ip = await response.text()
+            public_ip = await self.bot.http_client.get_text("https://api.ipify.org", timeout=aiohttp.ClientTimeout(total=10))
         except (aiohttp.ClientError, TimeoutError):
             embed = discord.Embed(
                 title="Error",
@@ -11,17 +11,21 @@
 
 import os
 import regex
-import asyncio
 import discord
-from fuzzywuzzy import process
 from discord.ext import commands
 from discord.ext.commands import Context
+from bots.lazy import lazy_import
+
+process = lazy_import('fuzzywuzzy.process')
 
 class Meme(commands.Cog, name="Meme Maintainer"):
     def __init__(self, bot):
         self.bot = bot
-        self.meme_templates = dict()
-        self.load_meme_templates()  # Load memes on startup
+        self.meme_templates = self.bot.guild_state("Meme.meme_templates", self.load_meme_templates)
+
+    async def cog_before_invoke(self, context: Context):
+        """Load the memes of the guild off the event loop."""
+        await self.meme_templates.hydrate(str(context.guild.id) if context.guild else None)
 
     @commands.command( name="insert", description="Insert a meme template")
     async def insert_meme(self, context: Context, *, meme_name: str):
@@ -219,12 +223,11 @@ class Meme(commands.Cog, name="Meme Maintainer"):
         await context.reply(embed=embed)
         self.bot.log.info(f"Renamed meme template {old_name} to {new_name} in guild {guild_id}", context.guild)
 
-    def load_meme_templates(self):
-        """Load meme templates for each guild from YAML files."""
-        for guild_id in self.bot.list_guild_ids():
-            guild_id = str(guild_id)
-            self.meme_templates[guild_id] = self.bot.load_guild_yaml(guild_id, "meme_templates.yml")
-            self.bot.log.info(f"Loaded meme templates for guild {guild_id}")
+    def load_meme_templates(self, guild_id):
+        """Load meme templates of a guild from its YAML file."""
+        meme_templates = self.bot.load_guild_yaml(guild_id, "meme_templates.yml")
+        self.bot.log.debug(lambda: f"Loaded meme templates for guild {guild_id}")
+        return meme_templates
 
     def save_meme_templates(self, guild_id):
         """Save meme templates for a specific guild to a YAML file."""
@@ -11,12 +11,15 @@
 
 import os
 import regex
-import gtts
 import asyncio
-import requests
+import aiohttp
 import discord
 from discord.ext import commands
 from discord.ext.commands import Context
+from bots.lazy import lazy_import, lazy_value
+
+gtts = lazy_import('gtts')
+tts_languages = lazy_value(lambda: gtts.lang.tts_langs(), 'tts_languages')   # {code: name} of the TTS languages
 
 tmp = "tmp"
 
@@ -27,15 +30,27 @@ class Voice(commands.Cog, name="Voice Features"):
         self.language = 'ta'
         self.domain = 'co.in'
         self.called_channel = dict()
-        self.available_languages = gtts.lang.tts_langs()
+        self.available_domains = [self.domain]
+        self.greet_messages = self.bot.guild_state("Voice.greet_messages", self.load_greet_messages)
+
+    async def cog_load(self):
+        ''' Fetch the domains off the event loop '''
+        await self.load_voice_options()
+        self.bot.log.info(f"Voice features initialized with volume {self.volume}, language {self.language} and domain {self.domain}")
+
+    async def cog_before_invoke(self, context: Context):
+        ''' Load the greet messages of the guild off the event loop '''
+        await self.greet_messages.hydrate(str(context.guild.id) if context.guild else None)
+
+    async def load_voice_options(self):
+        ''' Load the available google domains (the TTS languages are loaded with gtts on first use) '''
         try:
-            response = requests.get("https://www.google.com/supported_domains").text.splitlines()
+            response = (await self.bot.response_cache.fetch('google_domains', 'supported_domains',
+                                                            lambda: self.bot.http_client.get_text("https://www.google.com/supported_domains"),
+                                                            ttl=7 * 24 * 3600, stale=30 * 24 * 3600)).splitlines()
             self.available_domains = [domain.removeprefix(".google.") for domain in response]
-        except:
+        except (aiohttp.ClientError, asyncio.TimeoutError):
             self.available_domains = [self.domain]
-        self.greet_messages = dict()
-        self.load_greet_messages()
-        self.bot.log.info(f"Voice features initialized with volume {self.volume}, language {self.language} and domain {self.domain}")
 
     @commands.command(name="join", description="Join the voice channel of the user", aliases=["j"])
     async def join(self, context: Context, voice_channel: discord.VoiceChannel = None):
@@ -171,7 +186,7 @@ class Voice(commands.Cog, name="Voice Features"):
                 color=self.bot.default_color,
                 )
             await context.reply(embed=embed)
-            self.save_greet_messages()
+            self.save_greet_messages(context.guild.id)
             self.bot.log.info(f"{context.author} set the greet message for {member.display_name} to '{text}' in {context.guild.name}", context.guild)
 
     @commands.command(name="volume", description="Get or set the volume of the bot", aliases=["v"])
@@ -206,18 +221,19 @@ class Voice(commands.Cog, name="Voice Features"):
     @commands.command(name="lang", description="Get or set the language of the bot")
     async def language(self, context: Context, language: str = None):
         ''' Get or set the language of the bot '''
+        available_languages = await asyncio.to_thread(tts_languages.get)
         if language is None:
             embed = discord.Embed(
                 title="Language :globe_with_meridians:",
-                description=f"Language is '{self.language} - {self.available_languages[self.language]}'",
+                description=f"Language is '{self.language} - {available_languages[self.language]}'",
                 color=self.bot.default_color,
                 )
             await context.reply(embed=embed)
             self.bot.log.info(f"Current language is {self.language} checked by {context.author} in {context.guild.name}", context.guild)
-        elif language not in self.available_languages.keys():
+        elif language not in available_languages.keys():
             embed = discord.Embed(
                 title="Invalid language :confused:",
-                description="Please enter a valid language.The available languages are:\n" + ",\t".join([f"'{key} - {value}'" for key, value in self.available_languages.items()]),
+                description="Please enter a valid language.The available languages are:\n" + ",\t".join([f"'{key} - {value}'" for key, value in available_languages.items()]),
                 color=self.bot.default_color,
                 )
             await context.reply(embed=embed)
@@ -226,7 +242,7 @@ class Voice(commands.Cog, name="Voice Features"):
             self.language = language
             embed = discord.Embed(
                 title="Language set :globe_with_meridians:",
-                description=f"Language set to '{language} - {self.available_languages[language]}'",
+                description=f"Language set to '{language} - {available_languages[language]}'",
                 color=self.bot.default_color,
                 )
             await context.reply(embed=embed)
@@ -268,6 +284,7 @@ class Voice(commands.Cog, name="Voice Features"):
         if voice_client is None or voice_client.is_playing(): return # ignore if bot is not in a voice channel or is speaking
         if before.channel != after.channel and after.channel == voice_client.channel:
             greet_message = "Vanakkam " + f"{member.display_name}"
+            await self.greet_messages.hydrate(str(member.guild.id))
             if str(member.guild.id) in self.greet_messages.keys():
                 if str(member.id) in self.greet_messages[str(member.guild.id)].keys():
                     name = member.display_name.replace('_', ' ')
@@ -281,7 +298,7 @@ class Voice(commands.Cog, name="Voice Features"):
             voice_client.play(discord.FFmpegPCMAudio(file))
             voice_client.source = discord.PCMVolumeTransformer(voice_client.source)
             voice_client.source.volume = self.volume / 100
-            self.bot.log.info(f"{self.bot.name} greeted {member.display_name} in voice channel {voice_client.channel.name} in {member.guild.name}", member.guild)
+            self.bot.log.info(lambda: f"{self.bot.name} greeted {member.display_name} in voice channel {voice_client.channel.name} in {member.guild.name}", member.guild)
         elif before.channel != after.channel and before.channel == voice_client.channel:
             if len(before.channel.members) == 1:
                 await asyncio.sleep(5)
@@ -315,20 +332,15 @@ class Voice(commands.Cog, name="Voice Features"):
         except Exception:
             pass
     
-    def save_greet_messages(self):
-        ''' Save the greet messages to a file '''
-        for guild_id, greet_set in self.greet_messages.items():
-            self.bot.save_guild_yaml(guild_id, "greet_messages.yml", greet_set)
-            self.bot.log.info(f"Greet messages saved")
+    def save_greet_messages(self, guild_id):
+        ''' Save the greet messages of a guild to a file '''
+        guild_id = str(guild_id)
+        self.bot.save_guild_yaml(guild_id, "greet_messages.yml", self.greet_messages[guild_id])
+        self.bot.log.info(f"Greet messages saved")
 
-    def load_greet_messages(self):
-        ''' Load the greet messages from a file '''
-        for guild_id in self.bot.list_guild_ids():
-            guild_id = str(guild_id)
-            greet_set = self.bot.load_guild_yaml(guild_id, "greet_messages.yml", default=None)
-            if greet_set is not None:
-                self.greet_messages[guild_id] = greet_set
-        self.bot.log.info(f"Greet messages loaded")
+    def load_greet_messages(self, guild_id):
+        ''' Load the greet messages of a guild from a file '''
+        return self.bot.load_guild_yaml(guild_id, "greet_messages.yml", default=None)
 
 
 async def setup(bot):
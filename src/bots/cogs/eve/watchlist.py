@@ -13,20 +13,30 @@ import os
 import asyncio
 import typing
 import discord
-import requests
-from fuzzywuzzy import process
+import aiohttp
 from discord.ext import commands
 from discord.ext.commands import Context
+from bots.lazy import lazy_import
 
+process = lazy_import('fuzzywuzzy.process')
+
+omdb_ttl = 24 * 3600          # OMDb responses are fresh for a day
+omdb_stale = 7 * 24 * 3600    # then served while refreshed for a week
 
 class Watchlist(commands.Cog, name='Watchlist'):
     def __init__(self, bot):
         self.bot = bot
-        self.watchlist = dict()
-        self.announcement_config = dict()
-        self.load_watchlist()
+        self.watchlist = self.bot.guild_state('Watchlist.watchlist', lambda guild_id: self.load_watchlist(guild_id, 'watchlist.yml'))
+        self.announcement_config = self.bot.guild_state('Watchlist.announcement_config',
+                                                        lambda guild_id: self.load_watchlist(guild_id, 'announcement_config.yml'))
         self.api_key = os.getenv("OMDB_API_KEY")  # export OMDB_API_KEY=[your_omdb_api_key]
 
+    async def cog_before_invoke(self, context: Context):
+        ''' Load the watchlist of the guild off the event loop '''
+        if context.guild is not None:
+            await self.watchlist.hydrate(str(context.guild.id))
+            await self.announcement_config.hydrate(str(context.guild.id))
+
     @commands.command(name='watchlist', description="Show the watchlist", aliases=['list', 'wl'])
     async def show_watchlist(self, context: Context):
         ''' Show the watchlist '''
@@ -67,7 +77,7 @@ class Watchlist(commands.Cog, name='Watchlist'):
         link = ' '.join(title_or_link)
         if link.startswith('https://www.imdb.com/title/') :
             imdb_id = link.split('/')[4]
-            selected_item = self.get_movie_details(imdb_id)
+            selected_item = await self.get_movie_details(imdb_id)
             if selected_item is None:
                 embed = discord.Embed(
                     title="Sorry :confused:",
@@ -83,7 +93,7 @@ class Watchlist(commands.Cog, name='Watchlist'):
             else:
                 year = None
                 title = ' '.join(title_or_link)
-            search_results = self.search_movie(title, year)
+            search_results = await self.search_movie(title, year)
             if not search_results:
                 embed = discord.Embed(
                     title="Sorry :confused:",
@@ -101,7 +111,7 @@ class Watchlist(commands.Cog, name='Watchlist'):
         if str(context.guild.id) not in self.watchlist.keys():
             self.watchlist[str(context.guild.id)] = list()
         self.watchlist[str(context.guild.id)].append(entry)
-        self.save_watchlist()
+        self.save_watchlist(context.guild.id)
         self.bot.log.info(f"Added {entry['name']} to the watchlist in guild {context.guild.name} by {context.author.name}", context.guild)
         await self.show_detailed_info(context, selected_item['imdbID'], f"Added {entry['name']} to the watchlist :white_check_mark:")
     
@@ -172,7 +182,7 @@ class Watchlist(commands.Cog, name='Watchlist'):
             message = f"{role.mention}\n{watch_item['name']} is starting in {context.guild.name} in few minutes! :popcorn:"
         else:
             message = f"{watch_item['name']} is starting in {context.guild.name} in few minutes! :popcorn:"
-        detailed_info = self.get_movie_details(watch_item['imdb_id'])
+        detailed_info = await self.get_movie_details(watch_item['imdb_id'])
         if detailed_info is None:
             embed = discord.Embed(
                 title="Failed to retrieve detailed information :confused:",
@@ -198,7 +208,7 @@ class Watchlist(commands.Cog, name='Watchlist'):
             return
         if 1 <= index <= len(self.watchlist[str(context.guild.id)]):
             entry = self.watchlist[str(context.guild.id)].pop(index - 1)
-            self.save_watchlist()
+            self.save_watchlist(context.guild.id)
             self.bot.log.info(f"Removed {entry['name']} from the watchlist in guild {context.guild.name} by {context.author.name}", context.guild)
             await self.show_detailed_info(context, entry['imdb_id'], f"Removed {entry['name']} from the watchlist :white_check_mark:")
         else:
@@ -218,7 +228,7 @@ class Watchlist(commands.Cog, name='Watchlist'):
         else:
             year = None
             title = ' '.join(title)
-        search_results = self.search_movie(title, year)
+        search_results = await self.search_movie(title, year)
         if not search_results:
             embed = discord.Embed(
                 title="Sorry :confused:",
@@ -257,7 +267,7 @@ class Watchlist(commands.Cog, name='Watchlist'):
     async def clear_watchlist(self, context: Context):
         ''' Clear the watchlist '''
         self.delete_watchlist(str(context.guild.id))
-        self.save_watchlist()
+        self.save_watchlist(context.guild.id)
         embed = discord.Embed(
             title="Watchlist cleared :white_check_mark:",
             description="The watchlist is now empty.",
@@ -279,7 +289,7 @@ class Watchlist(commands.Cog, name='Watchlist'):
                 color=self.bot.default_color
             )
             await context.send(embed=embed)
-            self.save_watchlist()
+            self.save_watchlist(context.guild.id)
             self.bot.log.info(f"Announcement settings cleared for guild {context.guild.name}", context.guild)
             return
         channel = context.guild.get_channel(channel.id)
@@ -309,7 +319,7 @@ class Watchlist(commands.Cog, name='Watchlist'):
                 await context.send(embed=embed)
                 self.bot.log.info(f"Invalid role in guild {context.guild.name}", context.guild)
                 return
-        self.save_watchlist()
+        self.save_watchlist(context.guild.id)
         embed = discord.Embed(
             title="Announcement setting set :white_check_mark:",
             description=message,
@@ -319,7 +329,7 @@ class Watchlist(commands.Cog, name='Watchlist'):
         self.bot.log.info(f"Announcement settings setting set for guild {context.guild.name}", context.guild)
 
     async def show_detailed_info(self, context: Context, imdbID, embed_title=None):
-        detailed_info = self.get_movie_details(imdbID)
+        detailed_info = await self.get_movie_details(imdbID)
         if detailed_info is None:
             embed = discord.Embed(
                 title="Failed to retrieve detailed information :confused:",
@@ -398,47 +408,46 @@ class Watchlist(commands.Cog, name='Watchlist'):
             await context.send(embed=embed)
             return None
         
-    def search_movie(self, title, year=None):
+    async def search_movie(self, title, year=None):
+        params = {'s': title, 'apikey': self.api_key}
         if year:
-            url = f'http://www.omdbapi.com/?s={title}&y={year}&apikey={self.api_key}'
-        else:
-            url = f'http://www.omdbapi.com/?s={title}&apikey={self.api_key}'
-        response = requests.get(url).json()
+            params['y'] = year
+        response = await self.omdb_request(params)
         if response.get('Response') == 'True':
             return response.get('Search')
         return None
     
-    def get_movie_details(self, imdb_id):
-        url = f'http://www.omdbapi.com/?i={imdb_id}&apikey={self.api_key}'
-        response = requests.get(url).json()
+    async def get_movie_details(self, imdb_id):
+        response = await self.omdb_request({'i': imdb_id, 'apikey': self.api_key})
         if response.get('Response') == 'True':
             return response
         return None
+
+    async def omdb_request(self, params):
+        ''' Query the OMDb API through the response cache (an empty response on network errors) '''
+        request = "&".join(f"{key}={value}" for key, value in sorted(params.items()) if key != 'apikey')
+        try:
+            return await self.bot.response_cache.fetch('omdb', request,
+                                                       lambda: self.bot.http_client.get_json('http://www.omdbapi.com/', params=params),
+                                                       ttl=omdb_ttl, stale=omdb_stale)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.bot.log.warning(f"OMDb request failed: {type(e).__name__}: {e}")
+            return dict()
         
-    def save_watchlist(self):
-        # Save the watchlist to a file
-        for guild_id in self.bot.list_guild_ids():
-            guild_id = str(guild_id)
-            if guild_id in self.watchlist.keys():
-                self.bot.save_guild_yaml(guild_id, 'watchlist.yml', self.watchlist[guild_id])
-            if guild_id in self.announcement_config.keys():
-                self.bot.save_guild_yaml(guild_id, 'announcement_config.yml', self.announcement_config[guild_id])
-                self.bot.log.info(f"Saved watchlist for guild {guild_id}")
+    def save_watchlist(self, guild_id):
+        # Save the watchlist of a guild to a file
+        guild_id = str(guild_id)
+        if guild_id in self.watchlist.keys():
+            self.bot.save_guild_yaml(guild_id, 'watchlist.yml', self.watchlist[guild_id])
+        if guild_id in self.announcement_config.keys():
+            self.bot.save_guild_yaml(guild_id, 'announcement_config.yml', self.announcement_config[guild_id])
+            self.bot.log.info(f"Saved watchlist for guild {guild_id}")
 
-    def load_watchlist(self):
-        # Load the watchlist from a file
-        for guild_id in self.bot.list_guild_ids():
-            guild_id = str(guild_id)
-            watchlist = self.bot.load_guild_yaml(guild_id, 'watchlist.yml', default=None)
-            if watchlist is not None:
-                self.watchlist[guild_id] = watchlist
-                self.bot.log.info(f"Loaded watchlist for guild {guild_id}")
-            else:
-                self.bot.log.info(f"No watchlist found for guild {guild_id}")
-            announcement_config = self.bot.load_guild_yaml(guild_id, 'announcement_config.yml', default=None)
-            if announcement_config is not None:
-                self.announcement_config[guild_id] = announcement_config
-                self.bot.log.info(f"Loaded announcement config for guild {guild_id}")
+    def load_watchlist(self, guild_id, filename):
+        # Load the watchlist or the announcement config of a guild from a file
+        data = self.bot.load_guild_yaml(guild_id, filename, default=None)
+        self.bot.log.debug(lambda: f"Loaded {filename} for guild {guild_id}" if data else f"No {filename} found for guild {guild_id}")
+        return data
 
     def delete_watchlist(self, guild_id):
         # Delete the watchlist for a guild
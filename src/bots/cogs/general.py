@@ -16,6 +16,7 @@ import typing
 import discord
 from discord.ext import commands
 from discord.ext.commands import Context
+from bots.router import message_handler
 
 
 class General(commands.Cog, name="General"):
@@ -40,7 +41,7 @@ class General(commands.Cog, name="General"):
         if command is None:
             embed = discord.Embed(
                 title="Help",
-                description=f"Use `{self.bot.prefix[context.guild.id]}help <command>` to get help on a specific command.",
+                description=f"Use `{self.bot.settings.prefix(context.guild.id)}help <command>` to get help on a specific command.",
                 color=self.bot.default_color,
                 )
             for cog in self.bot.cogs:
@@ -70,7 +71,7 @@ class General(commands.Cog, name="General"):
                     )
                 embed.add_field(
                     name="Usage",
-                    value=f"`{self.bot.prefix[context.guild.id]}{command.name} {command.signature}`",
+                    value=f"`{self.bot.settings.prefix(context.guild.id)}{command.name} {command.signature}`",
                     inline=False,
                     )
                 await context.send(embed=embed)
@@ -146,20 +147,19 @@ class General(commands.Cog, name="General"):
         if prefix is None:
             embed = discord.Embed(
                 title="Prefix",
-                description=f"The current prefix is `{self.bot.prefix.get(context.guild.id, self.bot.default_prefix)}`",
+                description=f"The current prefix is `{self.bot.settings.prefix(context.guild.id)}`",
                 color=self.bot.default_color,
                 )
             await context.send(embed=embed)
         else:
-            self.bot.prefix[context.guild.id] = prefix
-            self.bot.update_guild_yaml(context.guild.id, 'settings.yml', lambda settings: {**settings, 'prefix': prefix})
+            await self.bot.settings.update(context.guild.id, prefix=prefix)
             embed = discord.Embed(
                 title="Prefix",
-                description=f"The prefix has been changed to `{self.bot.prefix.get(context.guild.id, self.bot.default_prefix)}`",
+                description=f"The prefix has been changed to `{self.bot.settings.prefix(context.guild.id)}`",
                 color=self.bot.default_color,
                 )
             await context.send(embed=embed)
-            self.bot.log.info(f"Prefix changed to {self.bot.prefix.get(context.guild.id, self.bot.default_prefix)}", context.guild)
+            self.bot.log.info(f"Prefix changed to {self.bot.settings.prefix(context.guild.id)}", context.guild)
 
     @commands.command( name="invite", description="Get the bot invite link.")
     @commands.has_permissions(send_messages=True)
@@ -235,18 +235,14 @@ class General(commands.Cog, name="General"):
         self.bot.log.warning(f"Feedback from {context.author.name} (ID: {context.author.id}) could not be sent to the owner.\n{feedback.to_dict()}",guild=context.guild)
         await context.send(embed=embed_default)
 
-    @commands.Cog.listener()
-    async def on_message(self, message):
+    @message_handler(from_bot=True, prefixed=True)
+    async def relay_bot_command(self, message):
         '''Convert message from other bots to commands (if begins with prefix)'''
-        # ignore messages from the dm channel
-        if isinstance(message.channel, discord.DMChannel):
-            return
-        if message.author.bot and message.content.startswith(self.bot.prefix.get(message.guild.id, self.bot.default_prefix)):
-            context = await self.bot.get_context(message)
-            if context.valid:
-                await self.bot.invoke(context)
-            else:
-                await self.bot.process_commands(message)
+        context = await self.bot.get_context(message)
+        if context.valid:
+            await self.bot.invoke(context)
+        else:
+            await self.bot.process_commands(message)
 
 
 async def setup(bot):
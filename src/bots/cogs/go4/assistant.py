@@ -17,6 +17,7 @@ from datetime import datetime
 from collections import OrderedDict
 from discord.ext import commands
 from discord.ext.commands import Context
+from bots.router import message_handler
 from .utils.llm_agent import get_agent_response
 
 
@@ -28,6 +29,15 @@ class Assistant(commands.Cog, name="Chatting Features"):
         # {bot_message_id: conv_id} — tracks which bot messages belong to which conversation
         self.message_to_conv = {}
 
+    def export_state(self) -> dict:
+        '''Hand the open conversations to the cog loaded by a reload'''
+        return {'conversations': self.conversations, 'message_to_conv': self.message_to_conv}
+
+    def import_state(self, state: dict):
+        '''Take over the conversations of the cog replaced by a reload'''
+        self.conversations = state['conversations']
+        self.message_to_conv = state['message_to_conv']
+
     def _make_conv_id(self, username: str) -> str:
         ts = datetime.now().strftime("%Y%m%d-%H%M%S-%f")  # microseconds avoids same-second collisions
         return f"{ts}-{username}"
@@ -89,25 +99,19 @@ class Assistant(commands.Cog, name="Chatting Features"):
         if isinstance(error, commands.MissingRequiredArgument):
             embed = discord.Embed(
                 title='Missing Question',
-                description=f'Usage: `{self.bot.prefix.get(context.guild.id, self.bot.default_prefix)}ask <your question>`',
+                description=f'Usage: `{self.bot.settings.prefix(context.guild.id if context.guild else None)}ask <your question>`',
                 color=self.bot.default_color,
             )
             await context.reply(embed=embed)
 
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        ''' Continue a conversation when someone replies to a bot response. '''
-        if message.author == self.bot.user:
-            return
-        if message.guild is None:
-            return
-        if message.content.startswith(self.bot.prefix.get(message.guild.id, self.bot.default_prefix)):
-            return
-        if not message.reference:
-            return
-        if not message.content.strip():
-            return  # attachment/sticker-only reply, nothing to send to LLM
+    def is_conversation_reply(self, info):
+        ''' Whether a message replies to a tracked bot response. '''
+        return info.message.reference.message_id in self.message_to_conv
 
+    # Attachment/sticker-only replies are left out, there is nothing to send to the LLM
+    @message_handler(from_bot=None, prefixed=False, reply=True, predicate=is_conversation_reply)
+    async def continue_conversation(self, message):
+        ''' Continue a conversation when someone replies to a bot response. '''
         conv_id = self.message_to_conv.get(message.reference.message_id)
         if not conv_id or conv_id not in self.conversations:
             return
@@ -135,7 +139,7 @@ class Assistant(commands.Cog, name="Chatting Features"):
         for msg in sent_messages:
             self.message_to_conv[msg.id] = conv_id
 
-        self.bot.log.info(f'Continued conversation {conv_id} by {message.author.name}', guild=message.guild)
+        self.bot.log.info(lambda: f'Continued conversation {conv_id} by {message.author.name}', guild=message.guild)
 
     @commands.command(name='chats', description='List all tracked conversations')
     async def list_chats(self, context: Context):
@@ -15,10 +15,13 @@ import discord
 import typing
 import random
 import datetime
-from pydub import AudioSegment
-from pydub.generators import Sine
 from discord.ext import commands
 from discord.ext.commands import Context
+from bots.router import message_handler
+from bots.lazy import lazy_import
+
+pydub = lazy_import('pydub')
+pydub_generators = lazy_import('pydub.generators')
 
 tmp = "tmp"
 
@@ -48,6 +51,16 @@ class CosmicCon(commands.Cog):
         self.linked_users = dict()
         self.ring_posessor = None
 
+    def export_state(self) -> dict:
+        ''' Hand the running effects (taunts, bewitchments, fusions, ring bearer) to the cog loaded by a reload '''
+        return {'taunt': self.taunt, 'foxy': self.foxy, 'linked_users': self.linked_users, 'ring_posessor': self.ring_posessor}
+
+    def import_state(self, state: dict):
+        ''' Take over the running effects of the cog replaced by a reload '''
+        self.taunt = state['taunt']
+        self.foxy = state['foxy']
+        self.linked_users = state['linked_users']
+        self.ring_posessor = state['ring_posessor']
 
     ## Star Wars reference
     @commands.command(name='order66', description = "Exterminate all the Jedi from the Galactic Republic")
@@ -344,32 +357,36 @@ class CosmicCon(commands.Cog):
         await context.send(embed=embed)
         self.bot.log.info(f"Player {member.name} has been surrounded by gifs by {context.author.name} in {context.guild.name}", context.guild)
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
+    def is_bewitched(self, info):
+        ''' Whether the author is under Tsukuyomi or the Foxy Magnet '''
+        return info.message.author.id in self.taunt or info.message.author.id in self.foxy
+
+    @message_handler(dm=None, from_bot=None, empty=None, predicate=is_bewitched)
+    async def taunt_bewitched(self, message: discord.Message):
         ''' Check if the user is taunted '''
         if message.author.id in self.taunt:
             if datetime.datetime.now(tz=datetime.timezone.utc) < self.taunt[message.author.id]:
                 gif = random.choice(self.taunt_gifs)
-                await message.reply(f"{gif}")
+                await self.bot.send(message, f"{gif}", reply=True, priority='broadcast')
             else:
                 self.taunt.pop(message.author.id, None)
                 embed = discord.Embed(title="Tsukuyomi",
                                     description=f"{message.author.mention} has been released from the Tsukuyomi",
                                     color=self.bot.default_color)
-                await message.channel.send(embed=embed)
-                self.bot.log.info(f"Shinobi {message.author.name} has been released from Tsukuyomi", message.guild)
+                await self.bot.send(message.channel, embed=embed, priority='broadcast')
+                self.bot.log.info(lambda: f"Shinobi {message.author.name} has been released from Tsukuyomi", message.guild)
 
         if message.author.id in self.foxy:
             if datetime.datetime.now(tz=datetime.timezone.utc) < self.foxy[message.author.id]:
                 gif = random.choice(self.foxy_gifs)
-                await message.reply(f"{gif}")
+                await self.bot.send(message, f"{gif}", reply=True, priority='broadcast')
             else:
                 self.foxy.pop(message.author.id, None)
                 embed = discord.Embed(title="Foxy Magnet",
                                     description=f"{message.author.mention} has been released from the Foxy Magnet",
                                     color=self.bot.default_color)
-                await message.channel.send(embed=embed)
-                self.bot.log.info(f"Player {message.author.name} has been released from Foxy Magnet", message.guild)
+                await self.bot.send(message.channel, embed=embed, priority='broadcast')
+                self.bot.log.info(lambda: f"Player {message.author.name} has been released from Foxy Magnet", message.guild)
 
     ## R2D2 reference
     @commands.command(name='r2d2', description = "Translate a message to R2D2's language")
@@ -378,9 +395,9 @@ class CosmicCon(commands.Cog):
         r2d2_message = [ f"{ord(char):08b}" for char in message]
         r2d2_message = ' '.join(r2d2_message)
         # Generate sound based on binary message
-        beep = Sine(1000).to_audio_segment(duration=200)  # 1000Hz tone for '1'
-        boop = Sine(500).to_audio_segment(duration=200)  # 500Hz tone for '0'
-        final_audio = AudioSegment.silent(duration=0)
+        beep = pydub_generators.Sine(1000).to_audio_segment(duration=200)  # 1000Hz tone for '1'
+        boop = pydub_generators.Sine(500).to_audio_segment(duration=200)  # 500Hz tone for '0'
+        final_audio = pydub.AudioSegment.silent(duration=0)
         for bit in r2d2_message:
             if bit == '1':
                 final_audio += beep
@@ -437,8 +454,8 @@ class CosmicCon(commands.Cog):
                 embed = discord.Embed(title="Fusion Dance :dragon:",
                                     description=f"{member.mention} and {linked_member.mention} have been unlinked",
                                     color=self.bot.default_color)
-                await after.channel.send(embed=embed)
-                self.bot.log.info(f"Saiyans {member.name} and {linked_member.name} have been unlinked", member.guild)
+                await self.bot.send(after.channel, embed=embed, priority='broadcast')
+                self.bot.log.info(lambda: f"Saiyans {member.name} and {linked_member.name} have been unlinked", member.guild)
 
     ## One Ring reference
     @commands.command(name='one_ring', description = "One ring to rule them all")
@@ -477,8 +494,8 @@ class CosmicCon(commands.Cog):
                 embed = discord.Embed(title="One Ring :ring:",
                                     description=f"{member.mention} has been relieved from the ring bearer duty",
                                     color=self.bot.default_color)
-                await after.channel.send(embed=embed)
-                self.bot.log.info(f"{member.name} has been relieved from the ring bearer duty", member.guild)
+                await self.bot.send(after.channel, embed=embed, priority='broadcast')
+                self.bot.log.info(lambda: f"{member.name} has been relieved from the ring bearer duty", member.guild)
 
     ## Matrix reference
     @commands.has_permissions(manage_nicknames=True)
@@ -10,8 +10,8 @@
 #-------------------------------------------------------------------------------
 
 import os
-import json
 import random
+import asyncio
 import typing
 import discord
 import datetime
@@ -22,9 +22,13 @@ from discord.ext.commands import Context
 class Thirukkural(commands.Cog, name="Thirukkural"):
     def __init__(self, bot):
         self.bot = bot
-        self.kurals = self.load_kurals()
+        self.kurals = None
         self.daily_kural.start()
 
+    async def cog_load(self):
+        """ Load the Kurals off the event loop """
+        self.kurals = await asyncio.to_thread(self.load_kurals)
+
     def load_kurals(self):
         """ Load Thirukkural data from JSON file """
         data_path = self.bot.bot_data_path("thirukkural.json")
@@ -32,8 +36,7 @@ class Thirukkural(commands.Cog, name="Thirukkural"):
             self.bot.log.warning(f"Thirukkural data file not found at {data_path}")
             return None
         try:
-            with open(data_path, "r", encoding="utf-8") as file:
-                data = json.load(file)
+            data = self.bot.load_bot_data("thirukkural.json")
             return data['kural']
         except Exception as e:
             self.bot.log.warning(f"Error loading Thirukkural data: {e}")
@@ -58,7 +61,7 @@ class Thirukkural(commands.Cog, name="Thirukkural"):
         for guild in self.bot.guilds:
             channel = discord.utils.find(lambda c: "general" in c.name.lower(), guild.text_channels)
             if channel:
-                await channel.send(embed=embed)
+                await self.bot.send(channel, embed=embed, priority='broadcast')
                 self.bot.log.info(f"Sent daily Thirukkural to {guild.name} in {channel.name}", guild)
             else:
                 self.bot.log.warning(f"No general channel found in {guild.name}", guild)
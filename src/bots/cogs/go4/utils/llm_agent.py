@@ -10,13 +10,12 @@
 #-------------------------------------------------------------------------------
 
 import os
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import HumanMessage, SystemMessage
+from bots.lazy import lazy_import, lazy_value
 
-google_api_key = os.environ['GOOGLE_API_KEY']
+langchain_google_genai = lazy_import('langchain_google_genai')
+langchain_messages = lazy_import('langchain_core.messages')
 
 _llm_kwargs = dict(
-    google_api_key=google_api_key,
     temperature=0.7,
     max_tokens=1024,
     timeout=30,
@@ -25,12 +24,18 @@ _llm_kwargs = dict(
 
 _google_search = [{'google_search': {}}]
 
-llm = ChatGoogleGenerativeAI(model='gemma-4-31b-it', **_llm_kwargs).bind_tools(_google_search)
+def _create_llm():
+    """Build the model client (needs GOOGLE_API_KEY), on first use or at warm-up."""
+    google_api_key = os.environ['GOOGLE_API_KEY']
+    return langchain_google_genai.ChatGoogleGenerativeAI(model='gemma-4-31b-it', google_api_key=google_api_key,
+                                                         **_llm_kwargs).bind_tools(_google_search)
+
+llm = lazy_value(_create_llm, 'llm')
 
 # Reserve ~28K for output, system prompt, and current message
 MAX_HISTORY_TOKENS = 900_000
 
-SYSTEM_MESSAGE = SystemMessage(content=(
+SYSTEM_PROMPT = (
     "You are GO-4, a helpful assistant in a Discord server. "
     "Be friendly and conversational, but keep responses concise — "
     "Discord messages have a 2000 character limit, so avoid long walls of text. "
@@ -40,7 +45,8 @@ SYSTEM_MESSAGE = SystemMessage(content=(
     "Do NOT prefix your own responses with your name or any label like '[GO-4]:'. Just reply directly. "
     "You have access to Google Search — use it for current events, news, live data, "
     "or anything that may have changed recently. When citing search results, mention the source briefly."
-))
+)
+SYSTEM_MESSAGE = lazy_value(lambda: langchain_messages.SystemMessage(content=SYSTEM_PROMPT), 'SYSTEM_MESSAGE')
 
 def approximate_tokens(messages: list) -> int:
     """Rough token estimate: 1 token ≈ 4 characters."""
@@ -69,8 +75,8 @@ def get_agent_response(user_message: str, user_name: str, history: list = None):
 
     history = trim_history(list(history))
 
-    user_msg = HumanMessage(content=f"[{user_name}]: {user_message}")
-    messages = [SYSTEM_MESSAGE] + history + [user_msg]
+    user_msg = langchain_messages.HumanMessage(content=f"[{user_name}]: {user_message}")
+    messages = [SYSTEM_MESSAGE.get()] + history + [user_msg]
 
     response = llm.invoke(messages)
 
@@ -11,25 +11,43 @@
 
 import os
 import io
+import shlex
 import zipfile
+import tempfile
 import asyncio
 import subprocess
 import discord
+from datetime import datetime, timedelta, timezone
 from discord.ext import commands
 from discord.ext.commands import Context
+from bots.codec import dump_yaml
+from bots.shared import memory_usage
+from bots.logfiles import tail_lines, lines_between
+from bots.log import level_names
+from bots import lazy
 
 tmp = "tmp"
+max_log_lines = 20000            # Lines get_logs sends at most
+max_log_upload = 8 * 2**20       # Bytes get_logs_between sends at most (below the upload limit)
+
+def parse_log_time(value: str) -> datetime:
+    '''Parse a relative time (30m, 2h, 7d) or a UTC time (YYYY-MM-DD HH:MM)'''
+    units = {'m': 'minutes', 'h': 'hours', 'd': 'days'}
+    if value[:-1].isdigit() and value[-1:] in units:
+        return datetime.now(timezone.utc) - timedelta(**{units[value[-1]]: int(value[:-1])})
+    return datetime.strptime(value, "%Y-%m-%d %H:%M").replace(tzinfo=timezone.utc)
 
 class Manage(commands.Cog, name="Manage"):
     def __init__(self, bot):
         '''Initializes the bot management cog'''
         self.bot = bot
+        self.owner_id = int(os.getenv("BOT_OWNER_ID", 0))  # export BOT_OWNER_ID=[your_discord_id]
 
-    @commands.command( name="reload", description="Reload the bot cogs.")
+    @commands.command( name="reload", description="Reload the changed bot cogs, or all of them with `reload all`.")
     @commands.has_permissions(administrator=True)
-    async def reload(self, context: Context):
-        '''Reload the bot cogs'''
-        (succeeded_reloads, failed_reloads, unloaded) = await self.bot.reload_extensions()
+    async def reload(self, context: Context, scope: str = None):
+        '''Reload the bot cogs whose source changed (all of them with "all")'''
+        (succeeded_reloads, failed_reloads, unloaded, unchanged) = await self.bot.reload_extensions(force=scope == "all")
         embed = discord.Embed(
             title="Cogs Reloaded :gear:",
             color=self.bot.default_color,
@@ -52,6 +70,12 @@ class Manage(commands.Cog, name="Manage"):
                 value=f"\n".join([f":x: `{cog}`" for cog in unloaded]),
                 inline=False,
                 )
+        if len(unchanged) > 0:
+            embed.add_field(
+                name="Unchanged",
+                value=f"\n".join([f":zzz: `{cog}`" for cog in unchanged]),
+                inline=False,
+                )
         await context.send(embed=embed)
 
     @commands.command( name="load_cog", description="Load a specific cog.")
@@ -120,8 +144,7 @@ class Manage(commands.Cog, name="Manage"):
     @commands.has_permissions(administrator=True)
     async def setlogchannel(self, context: Context, channel: discord.TextChannel):
         '''Set the log channel for the bot'''
-        self.bot.log.set_log_channel(context.guild.id, channel)
-        self.bot.update_guild_yaml(context.guild.id, 'settings.yml', lambda settings: {**settings, 'log_channel': channel.id})
+        await self.bot.settings.update(context.guild.id, log_channel=channel.id)
         embed = discord.Embed(
             title="Log Channel",
             description=f"Log channel has been set to {channel.mention}",
@@ -130,34 +153,184 @@ class Manage(commands.Cog, name="Manage"):
         await context.send(embed=embed)
         self.bot.log.info(f"Log channel set to {channel.mention}", context.guild)
 
-    @commands.command( name="get_logs", description="Send the recent log file.")
+    @commands.command( name="set_log_level", description="Set the minimum log level of the log file or channel (debug, info, warning, error or reset).")
+    @commands.has_permissions(administrator=True)
+    async def setloglevel(self, context: Context, sink: str, level: str):
+        '''Set the minimum log level of a sink for this guild'''
+        sink, level = sink.lower(), level.lower()
+        if sink not in ('file', 'channel') or (level != 'reset' and level not in level_names.values()):
+            embed = discord.Embed(
+                title="Log Level",
+                description="Usage: `set_log_level <file|channel> <debug|info|warning|error|reset>`",
+                color=discord.Color.red(),
+                )
+            await context.send(embed=embed)
+            return
+        levels = dict(self.bot.settings.get(context.guild.id).log_levels or dict())
+        if level == 'reset':
+            levels.pop(sink, None)
+        else:
+            levels[sink] = level
+        await self.bot.settings.update(context.guild.id, log_levels=levels or None)
+        file_level, channel_level = self.bot.log.guild_levels.get(context.guild.id, self.bot.log.levels)
+        embed = discord.Embed(
+            title="Log Level",
+            description=f"Log file level: **{level_names.get(file_level, file_level)}**\n"
+                        f"Log channel level: **{level_names.get(channel_level, channel_level)}**",
+            color=self.bot.default_color,
+            )
+        await context.send(embed=embed)
+        self.bot.log.info(f"Log {sink} level set to {level}", context.guild)
+
+    @commands.command( name="sync_commands", description="Force a sync of the application commands. Developer only command.", hidden=True)
+    async def synccommands(self, context: Context):
+        '''Force a sync of the application commands (global and rate limited, so only for the bot owner)'''
+        if context.author.id != self.owner_id:
+            embed = discord.Embed(
+                title="Unauthorized",
+                description="You are not authorized to use this command.",
+                color=discord.Color.red()
+            )
+            await context.send(embed=embed)
+            return
+        await self.bot.sync_command_tree(force=True)
+        embed = discord.Embed(
+            title="Application Commands :arrows_counterclockwise:",
+            description="Application commands have been synced.",
+            color=self.bot.default_color,
+            )
+        await context.send(embed=embed)
+        self.bot.log.info(f"Application commands synced by {context.author.name}", context.guild)
+
+    @commands.command( name="get_logs", description="Send the last lines of the log (default 500).")
     @commands.has_permissions(administrator=True)
-    async def getlogs(self, context: Context):
-        '''Get the recent log file'''
-        file_name = self.bot.log.log_file
-        with open(file_name, 'r') as f:
-            text = f.read()
-        file = discord.File(filename=file_name.split("/")[-1],
-                            fp=io.StringIO(text))
+    async def getlogs(self, context: Context, lines: int = 500):
+        '''Get the last lines of the log'''
+        lines = min(max(lines, 1), max_log_lines)
+        text = "".join(await asyncio.to_thread(tail_lines, self.bot.log.log_file, lines))
+        file = discord.File(filename=f"{self.bot.log.bot_name}_last_{lines}.log",
+                            fp=io.BytesIO(text.encode()))
         embed = discord.Embed(
             title="Log File :scroll:",
-            description="Here is the recent log file. :file_folder:",
+            description=f"Here are the last {lines} lines of the log. :file_folder:",
             color=self.bot.default_color,
             )
         await context.reply(embed=embed, file=file)
         self.bot.log.info(f"Log file sent to {context.author.name}", context.guild)
 
+    @commands.command( name="get_logs_between", description="Send the log between two UTC times (YYYY-MM-DD HH:MM).")
+    @commands.has_permissions(administrator=True)
+    async def getlogsbetween(self, context: Context, start: str, end: str = None):
+        '''Get the log records between two UTC times, e.g. get_logs_between "2026-01-31 18:00" "2026-01-31 19:30"'''
+        try:
+            start_time = datetime.strptime(start, "%Y-%m-%d %H:%M").replace(tzinfo=timezone.utc)
+            # The end minute is included
+            end_time = datetime.strptime(end, "%Y-%m-%d %H:%M").replace(tzinfo=timezone.utc, second=59) if end is not None else None
+        except ValueError:
+            embed = discord.Embed(
+                title="Invalid time :confused:",
+                description="Use the UTC format `YYYY-MM-DD HH:MM`, quoted, e.g. `\"2026-01-31 18:00\"`.",
+                color=self.bot.default_color,
+                )
+            await context.send(embed=embed)
+            return
+        # Stream the matching lines into a spooled file, only a bounded part stays in memory
+        output = tempfile.SpooledTemporaryFile(max_size=2**20)
+        def collect():
+            size = 0
+            for line in lines_between(self.bot.log.log_file, start_time, end_time):
+                data = line.encode()
+                if size + len(data) > max_log_upload:
+                    return True
+                output.write(data)
+                size += len(data)
+            return False
+        truncated = await asyncio.to_thread(collect)
+        output.seek(0)
+        file = discord.File(filename=f"{self.bot.log.bot_name}_{start_time.strftime('%Y%m%d%H%M')}.log", fp=output)
+        embed = discord.Embed(
+            title="Log File :scroll:",
+            description=f"Here is the log from {start} to {end or 'now'} (UTC). :file_folder:"
+                        + ("\nThe range was too large, it stops at the upload limit." if truncated else ""),
+            color=self.bot.default_color,
+            )
+        try:
+            await context.reply(embed=embed, file=file)
+        finally:
+            output.close()
+        self.bot.log.info(f"Log file sent to {context.author.name}", context.guild)
+
+    @commands.command( name="search_logs", description="Search the logs by user, command, level, time or text.")
+    @commands.has_permissions(administrator=True)
+    async def searchlogs(self, context: Context, *, query: str = ""):
+        '''Search the logs of this server, e.g. search_logs user=@member command=ban since=2h text="spam"
+        (filters: user, command, level, since, until, text; times are relative like 30m/2h/7d or UTC "YYYY-MM-DD HH:MM")'''
+        filters = {'guild_id': context.guild.id}
+        try:
+            for term in shlex.split(query):
+                key, _, value = term.partition("=")
+                if key == 'user':
+                    filters['user_id'] = int(value.strip("<@!>"))
+                elif key == 'command':
+                    filters['command'] = value
+                elif key == 'level':
+                    filters['level'] = value.upper()
+                elif key in ('since', 'until'):
+                    filters[key] = parse_log_time(value)
+                elif key == 'text':
+                    # Quoted for FTS5, so punctuation in the text is not read as query syntax
+                    filters['text'] = '"' + value.replace('"', '""') + '"'
+                elif key == 'guild' and context.author.id == self.owner_id:
+                    filters['guild_id'] = int(value) if value != "all" else None
+                else:
+                    raise ValueError(f"Unknown filter {key}")
+        except ValueError as e:
+            embed = discord.Embed(
+                title="Invalid search :confused:",
+                description=f"{e}\nUse `user=`, `command=`, `level=`, `since=`, `until=` and `text=`, "
+                            f"e.g. `search_logs user=@member since=2h text=\"spam\"`.",
+                color=self.bot.default_color,
+                )
+            await context.send(embed=embed)
+            return
+        results, total, elapsed = await asyncio.to_thread(self.bot.log.search, **filters)
+        lines = list()
+        for record in results:
+            line = f"`{record['time'].strftime('%m-%d %H:%M:%S')}` **{record['level']}**"
+            if record['command']:
+                line += f" `{record['command']}`"
+            if record['user_id']:
+                line += f" <@{record['user_id']}>"
+            lines.append(f"{line} {record['message'][:150]}")
+        description = f"{total} matching records, searched in {elapsed:.1f} ms"
+        for line in lines:
+            if len(description) + len(line) + 1 > 4000:
+                break
+            description += "\n" + line
+        embed = discord.Embed(
+            title="Log Search :mag:",
+            description=description,
+            color=self.bot.default_color,
+            )
+        await context.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
+        self.bot.log.info(f"Log search by {context.author.name}: {query}", context.guild)
+
     @commands.command( name="get_data", description="Send the data of the bot as zip file.")
     @commands.has_permissions(administrator=True)
     async def getdata(self, context: Context):
         '''Get the data of the bot'''
-        if os.path.exists(self.bot.guild_dir(context.guild.id)):
+        await self.bot.writer.flush()
+        if self.bot.has_guild(context.guild.id):
             dir_path = self.bot.guild_dir(context.guild.id)
             zip_file_path = os.path.join(self.bot.data_dir, f"{context.guild.id}.zip")
             with zipfile.ZipFile(zip_file_path, 'w') as zipf:
                 for root, dirs, files in os.walk(dir_path):
                     for file in files:
                         zipf.write(os.path.join(root, file), os.path.relpath(os.path.join(root, file), dir_path))
+                if self.bot.storage.name != 'yaml':
+                    # Documents are not files with this backend, export them as YAML
+                    for filename, data in self.bot.storage.documents(context.guild.id).items():
+                        zipf.writestr(filename, dump_yaml(data))
             file = discord.File(filename=f"{self.bot.name}_{context.guild.id}.zip",  
                                 fp=zip_file_path)
             embed = discord.Embed(
@@ -183,14 +356,172 @@ class Manage(commands.Cog, name="Manage"):
         self.bot.clear_guild_data(context.guild.id)
         self.bot.log.info(f"Data cleared", context.guild)
         self.bot.log.remove_log_channel(context.guild.id)
+        self.bot.log.set_guild_levels(context.guild.id, None)
         embed = discord.Embed(
             title="Data Cleared :wastebasket:",
             description="The data of the bot has been cleared. Cogs will be reloaded to apply changes.",
             color=self.bot.default_color,
             )
         await context.send(embed=embed)
-        await self.reload(context)
+        await self.reload(context, "all")
         
+    @commands.command( name="cache_stats", description="Show the data cache statistics.")
+    @commands.has_permissions(administrator=True)
+    async def cachestats(self, context: Context):
+        '''Show the data cache statistics'''
+        stats = self.bot.cache.stats()
+        embed = discord.Embed(
+            title="Data Cache :card_box:",
+            description=f"Hit rate: {stats['hit_rate']:.1%}",
+            color=self.bot.default_color,
+            )
+        embed.add_field(name="Entries", value=f"{stats['entries']} / {stats['max_entries']}", inline=True)
+        embed.add_field(name="Hits", value=stats['hits'], inline=True)
+        embed.add_field(name="Misses", value=stats['misses'], inline=True)
+        embed.add_field(name="Evictions", value=stats['evictions'], inline=True)
+        responses = self.bot.response_cache.stats()
+        embed.add_field(name="HTTP responses",
+                        value=f"{responses['entries']} / {responses['max_entries']} entries, {responses['hits']} hits, "
+                              f"{responses['stale']} stale, {responses['misses']} misses, {responses['coalesced']} coalesced, "
+                              f"{responses['fetches']} fetches ({responses['errors']} failed)",
+                        inline=False)
+        if self.bot.guild_states:
+            lines = list()
+            for name, state in self.bot.guild_states.items():
+                guild_stats = state.stats()
+                lines.append(f"{name}: {guild_stats['resident']} / {guild_stats['max_guilds']} guilds, {guild_stats['loads']} loads, "
+                             f"{guild_stats['sync_loads']} sync loads, {guild_stats['evictions']} evictions")
+            embed.add_field(name="Guild state", value="\n".join(lines), inline=False)
+        await context.send(embed=embed)
+        self.bot.log.info(f"Cache stats sent to {context.author.name}", context.guild)
+
+    @commands.command( name="stats", description="Show the command usage and latency statistics.")
+    @commands.has_permissions(administrator=True)
+    async def stats(self, context: Context):
+        '''Show the command usage and latency statistics'''
+        metrics = self.bot.command_metrics
+        def describe(stats):
+            latency = stats.latency
+            if latency.count == 0:
+                return f"{stats.uses} uses, {stats.errors} errors"
+            return (f"{stats.uses} uses, {stats.errors} errors | p50 {latency.quantile(0.5) * 1000:.0f} ms, "
+                    f"p95 {latency.quantile(0.95) * 1000:.0f} ms, p99 {latency.quantile(0.99) * 1000:.0f} ms")
+        guild_stats = metrics.stats['guild'].get(str(context.guild.id), None)
+        embed = discord.Embed(
+            title="Command Statistics :bar_chart:",
+            description=f"This server: {describe(guild_stats) if guild_stats is not None else 'no commands yet'}",
+            color=self.bot.default_color,
+            )
+        commands_value = "\n".join(f"`{name}` {describe(stats)}" for name, stats in metrics.top('command', 10))
+        cogs_value = "\n".join(f"`{name}` {describe(stats)}" for name, stats in metrics.top('cog', 10))
+        embed.add_field(name="Commands", value=commands_value[:1024] or "-", inline=False)
+        embed.add_field(name="Cogs", value=cogs_value[:1024] or "-", inline=False)
+        embed.add_field(name="Unknown commands", value=metrics.unknown, inline=True)
+        router = self.bot.router
+        handlers_value = "\n".join(f"`{name}` {describe(stats)}" for name, stats in
+                                   sorted(router.stats.items(), key=lambda item: item[1].uses, reverse=True))
+        embed.add_field(name=f"Message handlers ({router.messages} messages)", value=handlers_value[:1024] or "-", inline=False)
+        log_stats = self.bot.log.channel_queue.stats()
+        embed.add_field(name="Log channel",
+                        value=f"{log_stats['posts']} posts, {log_stats['coalesced']} coalesced, "
+                              f"{log_stats['dropped']} dropped, {log_stats['pending']} pending",
+                        inline=True)
+        send_stats = self.bot.sender.stats()
+        embed.add_field(name="Send queue",
+                        value=", ".join(f"{priority} {depth}" for priority, depth in send_stats['depths'].items()) +
+                              f" queued (max {send_stats['max_depth']} in a channel), "
+                              f"{sum(counters['sent'] for counters in send_stats['counters'].values())} sent",
+                        inline=False)
+        hosts = sorted(self.bot.http_client.hosts.items(), key=lambda item: item[1].requests, reverse=True)[:5]
+        http_value = "\n".join(f"`{host}` {stats.requests} requests, {stats.errors} errors | "
+                               f"p50 {stats.latency.quantile(0.5) * 1000:.0f} ms, p95 {stats.latency.quantile(0.95) * 1000:.0f} ms"
+                               for host, stats in hosts if stats.latency.count)
+        embed.add_field(name="HTTP", value=http_value[:1024] or "-", inline=False)
+        if self.bot.metrics_server is not None:
+            embed.add_field(name="Endpoint", value=f"`127.0.0.1:{self.bot.metrics_server.port}/metrics`", inline=True)
+        await context.send(embed=embed)
+        self.bot.log.info(f"Command stats sent to {context.author.name}", context.guild)
+
+    @commands.command( name="slow_callbacks", description="Show the recent event loop stalls and their blocking calls.")
+    @commands.has_permissions(administrator=True)
+    async def slowcallbacks(self, context: Context, count: int = 5):
+        '''Show the recent event loop stalls and their blocking calls'''
+        watchdog = self.bot.watchdog
+        if watchdog is None:
+            embed = discord.Embed(
+                title="Slow Callbacks :hourglass:",
+                description="The loop watchdog is disabled (`loop_lag_threshold` in config.yml).",
+                color=self.bot.default_color,
+                )
+            await context.send(embed=embed)
+            return
+        stats = watchdog.stats()
+        embed = discord.Embed(
+            title="Slow Callbacks :hourglass:",
+            description=f"{stats['stalls']} stalls over {stats['threshold']:.2f} s, longest {stats['max_lag']:.2f} s",
+            color=self.bot.default_color,
+            )
+        for entry in list(watchdog.slow_callbacks)[-min(max(count, 1), 10):][::-1]:
+            where = " / ".join(part for part in (entry['bot'], entry['cog'], entry['command']) if part) or "unattributed"
+            embed.add_field(name=f"{entry['time']} - {entry['lag']:.2f} s - {where}"[:256],
+                            value=f"`{entry['source']}`\nblocked in `{entry['blocking']}`"[:1024],
+                            inline=False)
+        await context.send(embed=embed)
+        self.bot.log.info(f"Slow callbacks sent to {context.author.name}", context.guild)
+
+    @commands.command( name="startup_report", description="Show the startup timings of the bot extensions.")
+    @commands.has_permissions(administrator=True)
+    async def startupreport(self, context: Context):
+        '''Show the startup timings of the bot extensions'''
+        report = self.bot.startup_report
+        setup = f"{report['setup']:.2f} s" if report['setup'] is not None else "-"
+        ready = f"{report['ready']:.2f} s" if report['ready'] is not None else "-"
+        dependencies = lazy.stats()
+        warm_up = f", warmed up in {report['warm_up']:.2f} s" if report.get('warm_up') is not None else ""
+        embed = discord.Embed(
+            title="Startup Report :stopwatch:",
+            description=f"Extensions loaded in {setup}, ready {ready} after launch.\n"
+                        f"Core on_ready: {report['on_ready'].get('core', 0.0):.3f} s\n"
+                        f"Lazy dependencies: {sum(1 for item in dependencies if item[2])}/{len(dependencies)} loaded{warm_up}",
+            color=self.bot.default_color,
+            )
+        for extension, timings in list(report['extensions'].items())[:24]:
+            value = (f"dependencies {timings.get('dependencies', 0.0):.3f} s | module + constructor {timings.get('constructor', 0.0):.3f} s | "
+                     f"cog_load {timings.get('cog_load', 0.0):.3f} s | on_ready {report['on_ready'].get(extension, 0.0):.3f} s")
+            if 'error' in timings:
+                value += f"\n:x: {timings['error'][:200]}"
+            embed.add_field(name=f"`{extension.removeprefix('bots.')}`", value=value, inline=False)
+        await context.send(embed=embed)
+        self.bot.log.info(f"Startup report sent to {context.author.name}", context.guild)
+
+    @commands.command( name="gateway_stats", description="Show the gateway profile, traffic and cache sizes.")
+    @commands.has_permissions(administrator=True)
+    async def gatewaystats(self, context: Context):
+        '''Show the gateway profile, traffic and cache sizes'''
+        stats = self.bot.gateway_stats
+        intents = [name for name, enabled in self.bot.intents if enabled]
+        member_cache = [name for name, enabled in self.bot._connection.member_cache_flags if enabled]
+        embed = discord.Embed(
+            title="Gateway :satellite:",
+            description=f"Memory: {memory_usage() / 2**20:.1f} MiB",
+            color=self.bot.default_color,
+            )
+        embed.add_field(name="Intents", value=", ".join(intents) or "none", inline=False)
+        embed.add_field(name="Member cache", value=", ".join(member_cache) or "none", inline=True)
+        embed.add_field(name="Message cache", value=f"{self.bot.max_messages}", inline=True)
+        embed.add_field(name="Cached", value="\n".join([f"{name}: {count}" for name, count in stats.cache_sizes(self.bot).items()]), inline=True)
+        received = f"{sum(stats.events.values())} events"
+        if self.bot.gateway_bytes:
+            received += f"\n{stats.messages} messages, {stats.bytes / 2**20:.2f} MiB of decoded payloads (not wire bytes)"
+        else:
+            received += "\nSet `gateway_bytes: true` in config.yml to count the payload sizes"
+        embed.add_field(name="Received", value=received, inline=False)
+        top_events = stats.events.most_common(10)
+        if top_events:
+            embed.add_field(name="Top events", value="\n".join([f"`{event}`: {count}" for event, count in top_events]), inline=False)
+        await context.send(embed=embed)
+        self.bot.log.info(f"Gateway stats sent to {context.author.name}", context.guild)
+
     @commands.command( name="get_update_log", description="Send the recent update log file.")
     @commands.has_permissions(administrator=True)
     async def getupdatelog(self, context: Context):
@@ -18,7 +18,10 @@ import functools
 import discord
 from discord.ext import commands
 from discord.ext.commands import Context
-import instaloader
+from bots.router import message_handler
+from bots.lazy import lazy_import, lazy_value
+
+instaloader = lazy_import('instaloader')
 
 tmp_download_dir = "tmp"
 instagram_regex = r"https?://(?:www\.)?instagram\.com/\S*"
@@ -26,16 +29,21 @@ instagram_regex = r"https?://(?:www\.)?instagram\.com/\S*"
 class Instagram(commands.Cog, name="Instagram"):
     def __init__(self, bot):
         self.bot = bot
-        self.loader = instaloader.Instaloader(sleep=True, quiet=True,
-                                              download_pictures = True, download_videos= True,
-                                              download_video_thumbnails = False, save_metadata= False)
+        self.loader = lazy_value(self.create_loader, 'Instagram.loader')
+
+    @staticmethod
+    def create_loader():
+        '''Create the instaloader session (on first use or at warm-up)'''
+        return instaloader.Instaloader(sleep=True, quiet=True,
+                                       download_pictures = True, download_videos= True,
+                                       download_video_thumbnails = False, save_metadata= False)
 
     @commands.command( name="show", description="Download a post from instagram.")
     async def show(self, context: Context, message: str):
         '''Download a media from instagram and show it'''
         match = re.match(instagram_regex, message)
         if match is not None:
-            await self.send_media(message, context.reply, context.guild)
+            await self.send_media(message, functools.partial(self.bot.send, context, reply=True, priority='broadcast'), context.guild)
         else:
             embed = discord.Embed(
                     title="Sorry! There is some problem. :sweat:",
@@ -44,16 +52,14 @@ class Instagram(commands.Cog, name="Instagram"):
                     )
             await context.reply(embed=embed)
     
-    @commands.Cog.listener()
-    async def on_message(self, message):
+    @message_handler(url=True)
+    async def show_linked_media(self, message):
         ''' Watch for instagram links in any channel and send the media'''
-        if message.guild is None or message.author.bot or message.content == "":
-            return
         match = re.search(instagram_regex, message.content)
         if match is not None and len(message.content.split("/")) >= 5:
             # Link is of a media - get the media and send it
-            self.bot.log.info("Got a link of a media from "+message.guild.name, message.guild)
-            await self.send_media(match.group(0), message.reply, message.guild)
+            self.bot.log.info(lambda: "Got a link of a media from "+message.guild.name, message.guild)
+            await self.send_media(match.group(0), functools.partial(self.bot.send, message, reply=True, priority='broadcast'), message.guild)
     
     async def send_media(self, instagram_url, replier, guild=None):
         ''' Download the media from instagram and send it'''
@@ -10,12 +10,14 @@
 #-------------------------------------------------------------------------------
 
 import os
-import gtts
 import asyncio
 import aiohttp
 import discord
 from discord.ext import commands
 from discord.ext.commands import Context
+from bots.lazy import lazy_import
+
+gtts = lazy_import('gtts')
 
 tmp = "tmp"
 
@@ -403,20 +405,29 @@ class Radio(commands.Cog, name="Radio FM"):
     async def check_streaming_url(self, radio_url: str):
         ''' Check if the streaming URL is valid '''
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(radio_url) as response:
-                    # Check if the URL responds with a status code 200 (OK)
-                    if response.status == 200:
-                        # Check the Content-Type header to ensure it's an audio stream
-                        content_type = response.headers.get('Content-Type', '').lower()
-                        if 'audio' in content_type:
-                            self.bot.log.info(f"Streaming URL {radio_url} is valid")
-                            return True
+            # An invalid stream is checked again after a minute, it may be back up by then
+            headers = await self.bot.response_cache.fetch('stream_headers', radio_url,
+                                                          lambda: self.fetch_stream_headers(radio_url), ttl=3600,
+                                                          valid=self.is_audio_stream, invalid_ttl=60)
+            if self.is_audio_stream(headers):
+                self.bot.log.info(f"Streaming URL {radio_url} is valid")
+                return True
         except Exception as e:
             self.bot.log.warning(f"Error checking streaming URL: {e}")
         self.bot.log.warning(f"Streaming URL {radio_url} is invalid")
         return False
 
+    @staticmethod
+    def is_audio_stream(headers: dict) -> bool:
+        ''' Whether the URL responds with a status code 200 (OK) and an audio Content-Type '''
+        return headers['status'] == 200 and 'audio' in headers['content_type']
+
+    async def fetch_stream_headers(self, radio_url: str):
+        ''' Get the status and content type of a stream '''
+        # Only the headers are read, the stream connection is dropped on exit
+        async with self.bot.http_client.get(radio_url, timeout=aiohttp.ClientTimeout(total=10)) as response:
+            return {'status': response.status, 'content_type': response.headers.get('Content-Type', '').lower()}
+
     @commands.Cog.listener()
     async def on_voice_state_update(self, member, before, after):
         ''' Disconnect bot when no one is in the voice channel '''
@@ -440,7 +451,7 @@ class Radio(commands.Cog, name="Radio FM"):
                     called_channel = self.called_channel.get(before.channel.guild.id,None)
                     if called_channel is not None:
                         await called_channel.send(embed=embed)
-                    self.bot.log.info(f"Disconnected from voice channel {before.channel.name} in {before.channel.guild.name}")
+                    self.bot.log.info(lambda: f"Disconnected from voice channel {before.channel.name} in {before.channel.guild.name}")
 
     async def _hard_disconnect(self, guild: discord.Guild, *, force: bool = True):
         ''' Forcefully disconnect the bot from the voice channel in the guild '''
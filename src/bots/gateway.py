@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Author: Kabilan Tamilmani
+# E-mail: kavikabilan37@gmail.com
+# Github: Kabilan-T
+
+''' Gateway profile of a bot: intents and caches from config.yml, checks and traffic counters '''
+
+#-------------------------------------------------------------------------------
+
+import discord
+from collections import Counter
+
+# Intents a listener needs to receive its event (any of them is enough)
+listener_intents = {
+    'on_member_join': ['members'],
+    'on_member_remove': ['members'],
+    'on_member_update': ['members'],
+    'on_raw_member_remove': ['members'],
+    'on_presence_update': ['presences'],
+    'on_message': ['guild_messages', 'dm_messages'],
+    'on_message_edit': ['guild_messages', 'dm_messages'],
+    'on_message_delete': ['guild_messages', 'dm_messages'],
+    'on_raw_message_edit': ['guild_messages', 'dm_messages'],
+    'on_raw_message_delete': ['guild_messages', 'dm_messages'],
+    'on_reaction_add': ['guild_reactions', 'dm_reactions'],
+    'on_reaction_remove': ['guild_reactions', 'dm_reactions'],
+    'on_raw_reaction_add': ['guild_reactions', 'dm_reactions'],
+    'on_raw_reaction_remove': ['guild_reactions', 'dm_reactions'],
+    'on_voice_state_update': ['voice_states'],
+    'on_typing': ['guild_typing', 'dm_typing'],
+    'on_guild_join': ['guilds'],
+    'on_guild_remove': ['guilds'],
+    'on_invite_create': ['invites'],
+    'on_scheduled_event_create': ['guild_scheduled_events'],
+}
+
+def build_intents(spec) -> discord.Intents:
+    '''Build the intents from config.yml: 'all', 'default', 'none' or a list of flag names (optionally starting from a preset)'''
+    presets = {'all': discord.Intents.all, 'default': discord.Intents.default, 'none': discord.Intents.none}
+    if spec is None:
+        return discord.Intents.all()
+    if isinstance(spec, str):
+        spec = [spec]
+    intents = discord.Intents.none()
+    for name in spec:
+        if name in presets:
+            intents.value |= presets[name]().value
+        elif name in discord.Intents.VALID_FLAGS:
+            setattr(intents, name, True)
+        else:
+            raise ValueError(f"Unknown intent {name}")
+    return intents
+
+def build_member_cache_flags(spec, intents: discord.Intents) -> discord.MemberCacheFlags:
+    '''Build the member cache flags from config.yml: 'from_intents', 'all', 'none' or a list of flag names'''
+    if spec is None or spec == 'from_intents':
+        return discord.MemberCacheFlags.from_intents(intents)
+    if spec == 'all':
+        return discord.MemberCacheFlags.all()
+    if spec == 'none':
+        return discord.MemberCacheFlags.none()
+    flags = discord.MemberCacheFlags.none()
+    for name in spec:
+        if name not in discord.MemberCacheFlags.VALID_FLAGS:
+            raise ValueError(f"Unknown member cache flag {name}")
+        setattr(flags, name, True)
+    return flags
+
+def check_listeners(bot) -> list:
+    '''Find the listeners of the loaded cogs whose events are not enabled by the bot intents'''
+    problems = list()
+    for cog_name, cog in bot.cogs.items():
+        for event, _ in cog.get_listeners():
+            required = listener_intents.get(event, None)
+            if required is not None and not any(getattr(bot.intents, intent) for intent in required):
+                problems.append(f"{cog_name} listens to {event} but the {' or '.join(required)} intent is disabled")
+            if event == 'on_message' and not bot.intents.message_content:
+                problems.append(f"{cog_name} listens to on_message but the message_content intent is disabled")
+    if not any(getattr(bot.intents, intent) for intent in listener_intents['on_message']):
+        problems.extend(f"Message handler {name} is registered but the guild_messages or dm_messages intent is disabled"
+                        for name, *_ in bot.router.handlers)
+    elif not bot.intents.message_content:
+        problems.extend(f"Message handler {name} is registered but the message_content intent is disabled"
+                        for name, *_ in bot.router.handlers)
+    if bot.all_commands and not bot.intents.message_content:
+        problems.append("Prefix commands need the message_content intent")
+    return problems
+
+class GatewayStats():
+    ''' Counters of the gateway traffic received by a bot '''
+
+    def __init__(self):
+        ''' Initialize the counters '''
+        self.events = Counter()
+        self.messages = 0
+        self.bytes = 0
+
+    def on_event_type(self, event_type):
+        '''Count a dispatched gateway event'''
+        self.events[event_type] += 1
+
+    def on_raw_receive(self, message):
+        '''Count a gateway message and its decoded payload size (needs enable_debug_events)
+
+        The library only exposes the decompressed payload, so this is not the size on the wire,
+        but it compares the traffic of two profiles all the same.
+        '''
+        self.messages += 1
+        self.bytes += len(message)
+
+    def cache_sizes(self, bot) -> dict:
+        '''Number of objects the bot keeps in its caches'''
+        return {'guilds': len(bot.guilds),
+                'members': sum(len(guild.members) for guild in bot.guilds),
+                'users': len(bot.users),
+                'messages': len(bot.cached_messages)}
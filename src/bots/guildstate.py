@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Author: Kabilan Tamilmani
+# E-mail: kavikabilan37@gmail.com
+# Github: Kabilan-T
+
+''' Per-guild state of the cogs, loaded on first access and evicted when idle
+
+A GuildState is used like the dict of guild documents the cogs kept before, but a guild
+is only read when it is first used. The cogs hydrate the guild of a command or event with
+"await state.hydrate(guild_id)", which reads it in a worker thread; an access to a guild
+that was not hydrated reads it synchronously (counted as a sync load). The least recently
+used guilds are evicted beyond the budget of resident guilds, and guilds idle for longer
+than the idle time are evicted as well. The cogs save every change through the bot, so an
+evicted guild is read again from the writer queue, the document cache or the storage.
+'''
+
+#-------------------------------------------------------------------------------
+
+import time
+import asyncio
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+class GuildState(MutableMapping):
+    ''' Lazy guild_id -> document mapping with an LRU budget (guilds without the document are not in it) '''
+
+    missing = object()   # Marks a guild known not to have the document
+
+    def __init__(self, name: str, loader, max_guilds: int = 256, idle_seconds: float = 1800):
+        ''' Initialize the state (loader(guild_id) returns the document, a falsy one counts as missing) '''
+        self.name = name
+        self.loader = loader
+        self.max_guilds = max_guilds
+        self.idle_seconds = idle_seconds
+        self.entries = OrderedDict()   # guild_id -> [value or missing, last access], least recently used first
+        self.loading = dict()          # guild_id -> load task
+        self.counters = {'loads': 0, 'sync_loads': 0, 'evictions': 0}
+
+    def load(self, guild_id):
+        '''Read the document of a guild'''
+        value = self.loader(guild_id)
+        return value if value else self.missing
+
+    def entry(self, guild_id, sync: bool = True):
+        '''Get the resident entry of a guild, reading it synchronously if needed'''
+        if guild_id is None:
+            return [self.missing, None] # direct messages
+        entry = self.entries.get(guild_id, None)
+        if entry is None:
+            if not sync:
+                return None
+            self.counters['sync_loads'] += 1
+            entry = self.store(guild_id, self.load(guild_id))
+        else:
+            entry[1] = time.monotonic()
+            self.entries.move_to_end(guild_id)
+        return entry
+
+    def store(self, guild_id, value) -> list:
+        '''Make a guild resident and apply the budget'''
+        entry = self.entries[guild_id] = [value, time.monotonic()]
+        self.entries.move_to_end(guild_id)
+        self.evict(keep=guild_id)
+        return entry
+
+    def evict(self, keep=None):
+        '''Evict the least recently used guilds beyond the budget and the idle ones'''
+        deadline = time.monotonic() - self.idle_seconds
+        while self.entries:
+            guild_id, (_, accessed) = next(iter(self.entries.items()))
+            if guild_id == keep or (len(self.entries) <= self.max_guilds and accessed >= deadline):
+                break
+            del self.entries[guild_id]
+            self.counters['evictions'] += 1
+
+    async def hydrate(self, guild_id):
+        '''Make a guild resident, reading it in a worker thread (concurrent calls share the read)'''
+        self.evict()
+        if guild_id is None or guild_id in self.entries:
+            return
+        task = self.loading.get(guild_id, None)
+        if task is None:
+            task = self.loading[guild_id] = asyncio.create_task(asyncio.to_thread(self.load, guild_id))
+            task.add_done_callback(lambda _: self.loading.pop(guild_id, None))
+            self.counters['loads'] += 1
+        value = await asyncio.shield(task)
+        if guild_id not in self.entries: # not written meanwhile
+            self.store(guild_id, value)
+
+    def invalidate(self, guild_id):
+        '''Forget a guild (its data was cleared), int and str IDs alike'''
+        for key in (guild_id, str(guild_id), int(guild_id) if str(guild_id).isdigit() else None):
+            self.entries.pop(key, None)
+
+    def __getitem__(self, guild_id):
+        value = self.entry(guild_id)[0]
+        if value is self.missing:
+            raise KeyError(guild_id)
+        return value
+
+    def __setitem__(self, guild_id, value):
+        entry = self.entries.get(guild_id, None)
+        if entry is None:
+            self.store(guild_id, value)
+        else:
+            entry[0], entry[1] = value, time.monotonic()
+            self.entries.move_to_end(guild_id)
+
+    def __delitem__(self, guild_id):
+        entry = self.entry(guild_id)
+        if entry[0] is self.missing:
+            raise KeyError(guild_id)
+        entry[0] = self.missing
+
+    def __contains__(self, guild_id):
+        return self.entry(guild_id)[0] is not self.missing
+
+    def __iter__(self):
+        '''Iterate over the resident guilds that have the document'''
+        return iter([guild_id for guild_id, entry in self.entries.items() if entry[0] is not self.missing])
+
+    def __len__(self):
+        return sum(1 for entry in self.entries.values() if entry[0] is not self.missing)
+
+    def stats(self) -> dict:
+        '''Get the state counters'''
+        return {**self.counters, 'resident': len(self.entries), 'max_guilds': self.max_guilds}
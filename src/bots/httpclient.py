@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Author: Kabilan Tamilmani
+# E-mail: kavikabilan37@gmail.com
+# Github: Kabilan-T
+
+''' Pooled HTTP client of a bot, with request counts and latencies per host '''
+
+#-------------------------------------------------------------------------------
+
+import time
+import aiohttp
+from bots.metrics import LatencyHistogram, render_histogram
+
+class HostStats():
+    ''' Counters and latency histogram of the requests to one host '''
+
+    __slots__ = ('requests', 'errors', 'latency')
+
+    def __init__(self):
+        ''' Initialize the counters '''
+        self.requests = 0
+        self.errors = 0
+        self.latency = LatencyHistogram()
+
+class HttpClient():
+    ''' One aiohttp session per bot: keep-alive pool, DNS cache, per-host limit and default timeout '''
+
+    def __init__(self, bot_name: str, timeout: float = 15, limit: int = 100, limit_per_host: int = 10, dns_ttl: int = 300):
+        ''' Initialize the client (the session needs the running loop, see open) '''
+        self.bot_name = bot_name
+        self.timeout = timeout
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self.session = None
+        self.hosts = dict()   # host -> HostStats
+
+    async def open(self):
+        '''Create the connection pool and the session'''
+        if self.session is not None:
+            return
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(self.on_request_start)
+        trace.on_request_end.append(self.on_request_end)
+        trace.on_request_exception.append(self.on_request_exception)
+        connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host,
+                                         ttl_dns_cache=self.dns_ttl, keepalive_timeout=30)
+        self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout),
+                                             trace_configs=[trace])
+
+    async def close(self):
+        '''Close the session and its connection pool'''
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def get(self, url: str, **kwargs):
+        '''GET request, used as "async with client.get(url) as response"'''
+        return self.session.get(url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        '''POST request, used as "async with client.post(url) as response"'''
+        return self.session.post(url, **kwargs)
+
+    async def get_json(self, url: str, **kwargs):
+        '''GET a JSON document'''
+        async with self.session.get(url, **kwargs) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+
+    async def get_text(self, url: str, **kwargs) -> str:
+        '''GET a text document'''
+        async with self.session.get(url, **kwargs) as response:
+            response.raise_for_status()
+            return await response.text()
+
+    def host_stats(self, url) -> HostStats:
+        '''Stats of the host of a URL'''
+        host = url.host or "unknown"
+        stats = self.hosts.get(host, None)
+        if stats is None:
+            stats = self.hosts[host] = HostStats()
+        return stats
+
+    async def on_request_start(self, session, context, params):
+        '''Trace hook: start timing a request'''
+        context.start = time.perf_counter()
+
+    async def on_request_end(self, session, context, params):
+        '''Trace hook: record a request that got a response (its headers)'''
+        stats = self.host_stats(params.url)
+        stats.requests += 1
+        if params.response.status >= 500:
+            stats.errors += 1
+        stats.latency.observe(time.perf_counter() - context.start)
+
+    async def on_request_exception(self, session, context, params):
+        '''Trace hook: record a request that failed'''
+        stats = self.host_stats(params.url)
+        stats.requests += 1
+        stats.errors += 1
+        stats.latency.observe(time.perf_counter() - context.start)
+
+    def prometheus(self) -> str:
+        '''Render the per-host metrics in the Prometheus text exposition format'''
+        bot = self.bot_name.replace('"', '')
+        lines = ["# HELP discord_bot_http_requests_total Outgoing HTTP requests per host",
+                 "# TYPE discord_bot_http_requests_total counter"]
+        for host, stats in self.hosts.items():
+            lines.append(f'discord_bot_http_requests_total{{bot="{bot}",host="{host}"}} {stats.requests}')
+        lines.append("# HELP discord_bot_http_errors_total Failed or 5xx outgoing HTTP requests per host")
+        lines.append("# TYPE discord_bot_http_errors_total counter")
+        for host, stats in self.hosts.items():
+            lines.append(f'discord_bot_http_errors_total{{bot="{bot}",host="{host}"}} {stats.errors}')
+        lines.append("# HELP discord_bot_http_latency_seconds Outgoing HTTP request latency per host")
+        lines.append("# TYPE discord_bot_http_latency_seconds histogram")
+        for host, stats in self.hosts.items():
+            lines.extend(render_histogram("discord_bot_http_latency_seconds", f'bot="{bot}",host="{host}"', stats.latency))
+        return "\n".join(lines) + "\n"
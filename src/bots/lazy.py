@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Author: Kabilan Tamilmani
+# E-mail: kavikabilan37@gmail.com
+# Github: Kabilan-T
+
+''' Heavy optional dependencies imported, and clients built, on first use
+
+An extension writes "gtts = lazy_import('gtts')" instead of "import gtts": the name stands
+in for the module and imports it the first time one of its attributes is used. lazy_value
+does the same for an object built by a factory, such as a client that needs credentials.
+Both are registered here so that the bot imports and builds them in a worker thread once
+it is ready (warm_up), before the first command needs them. Loading is thread safe.
+'''
+
+#-------------------------------------------------------------------------------
+
+import sys
+import time
+import importlib
+import threading
+
+registry = dict()   # (importer module, name) -> LazyModule or LazyValue
+
+class LazyModule():
+    ''' Stand-in for a module, imported on first attribute access '''
+
+    def __init__(self, name: str, importer: str):
+        ''' Initialize the stand-in (nothing is imported) '''
+        self.name = name
+        self.importer = importer
+        self.module = None
+        self.seconds = None   # Import time once loaded
+        self.lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.module is not None
+
+    def get(self):
+        '''Import the module if not imported yet'''
+        if self.module is None:
+            with self.lock:
+                if self.module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self.name)
+                    self.seconds = time.perf_counter() - start
+                    self.module = module
+        return self.module
+
+    def __getattr__(self, attribute):
+        return getattr(self.get(), attribute)
+
+    def __repr__(self):
+        return f"<lazy module {self.name} ({'loaded' if self.loaded else 'not loaded'})>"
+
+class LazyValue():
+    ''' Stand-in for an object built by a factory on first use (get() returns the object itself) '''
+
+    def __init__(self, factory, name: str, importer: str):
+        ''' Initialize the stand-in (nothing is built) '''
+        self.factory = factory
+        self.name = name
+        self.importer = importer
+        self.value = None
+        self.seconds = None   # Build time once loaded
+        self.lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.seconds is not None
+
+    def get(self):
+        '''Build the object if not built yet'''
+        if self.seconds is None:
+            with self.lock:
+                if self.seconds is None:
+                    start = time.perf_counter()
+                    self.value = self.factory()
+                    self.seconds = time.perf_counter() - start
+        return self.value
+
+    def __getattr__(self, attribute):
+        return getattr(self.get(), attribute)
+
+    def __repr__(self):
+        return f"<lazy value {self.name} ({'loaded' if self.loaded else 'not loaded'})>"
+
+def lazy_import(name: str) -> LazyModule:
+    '''Module stand-in, imported on first use (call at the top level of the importing module)'''
+    importer = sys._getframe(1).f_globals.get('__name__')
+    module = registry[(importer, name)] = LazyModule(name, importer)
+    return module
+
+def lazy_value(factory, name: str = None) -> LazyValue:
+    '''Stand-in for factory(), built on first use (a new one replaces the one of the same name)'''
+    importer = sys._getframe(1).f_globals.get('__name__')
+    name = name or factory.__qualname__
+    value = registry[(importer, name)] = LazyValue(factory, name, importer)
+    return value
+
+def pending() -> list:
+    '''Stand-ins of the imported modules that are not loaded yet'''
+    return [item for item in list(registry.values()) if not item.loaded and item.importer in sys.modules]
+
+def warm_up() -> dict:
+    '''Load the pending stand-ins (runs in a worker thread): {name: seconds or the exception}'''
+    results = dict()
+    for item in pending():
+        try:
+            item.get()
+            results[item.name] = item.seconds
+        except Exception as e:
+            results[item.name] = e
+    return results
+
+def stats() -> list:
+    '''(importer, name, loaded, seconds) of the stand-ins of the imported modules'''
+    return [(item.importer, item.name, item.loaded, item.seconds) for item in list(registry.values()) if item.importer in sys.modules]
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Author: Kabilan Tamilmani
+# E-mail: kavikabilan37@gmail.com
+# Github: Kabilan-T
+
+''' Keyed asyncio locks for serializing updates of the same guild document '''
+
+#-------------------------------------------------------------------------------
+
+import asyncio
+import contextlib
+
+class KeyedLocks():
+    ''' Registry of asyncio locks created on demand and dropped once nobody holds or waits for them '''
+
+    def __init__(self):
+        ''' Initialize the registry '''
+        self.locks = dict()   # key -> [lock, holders and waiters]
+        self.acquisitions = 0
+        self.contended = 0
+
+    @contextlib.asynccontextmanager
+    async def hold(self, key):
+        '''Hold the lock of a key for the duration of the block'''
+        entry = self.locks.get(key, None)
+        if entry is None:
+            entry = self.locks[key] = [asyncio.Lock(), 0]
+        elif entry[0].locked():
+            self.contended += 1
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                self.acquisitions += 1
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and self.locks.get(key, None) is entry:
+                del self.locks[key]
+
+    def locked(self, key) -> bool:
+        '''Whether the lock of a key is currently held'''
+        entry = self.locks.get(key, None)
+        return entry is not None and entry[0].locked()
+
+    def stats(self) -> dict:
+        '''Get the registry counters'''
+        return {'active': len(self.locks),
+                'acquisitions': self.acquisitions,
+                'contended': self.contended}
@@ -11,30 +11,85 @@
 
 import os
 import time
+import queue
+import atexit
 import discord
 import asyncio
 import logging
-from datetime import datetime, timezone
+import logging.handlers
+from collections import deque
+from bots.logfiles import RotatingLogHandler
+from bots.logindex import JsonFormatter, LogIndex, log_context
 
 base_log_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'logs')
 
+level_names = {logging.DEBUG: "debug", logging.INFO: "info", logging.WARNING: "warning", logging.ERROR: "error"}
+
+def parse_level(level, default: int = logging.INFO) -> int:
+    '''Level number of a level name ('debug', 'info', 'warning', 'error') or number'''
+    if level is None:
+        return default
+    if isinstance(level, int):
+        return level
+    number = logging.getLevelName(str(level).upper())
+    if not isinstance(number, int):
+        raise ValueError(f"Unknown log level {level}")
+    return number
+
 class Logger():
     ''' Logging class definition '''
 
-    def __init__(self, bot_name: str):
-        ''' Initialize the log '''
+    def __init__(self, bot_name: str, suffix: str = None, rotation: dict = None):
+        ''' Initialize the log (suffix tells apart the files of processes running the same bot,
+        rotation: max_bytes, rotate_hours, backups and retention_days of the log files) '''
         self.bot_name = bot_name.lower()
         self.log_channel = dict()
+        self.channel_queue = LogChannelQueue()
         self.log_dir = os.path.join(base_log_dir, self.bot_name)
         os.makedirs(self.log_dir, exist_ok=True)
-        self.log_file = os.path.join(self.log_dir, f'{self.bot_name}_{datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")}.log')
-        logging.basicConfig(filename= self.log_file,
-                            level= logging.INFO,
-                            format= "%(asctime)s [%(levelname)s] %(message)s",
-                            datefmt="%Y-%m-%d %H:%M:%S")
-        self.log = logging.getLogger(__name__)
+        file_name = self.bot_name if suffix is None else f'{self.bot_name}_{suffix}'
+        self.log_file = os.path.join(self.log_dir, f'{file_name}.log')
+        rotation = rotation or dict()
+        # Structured records are indexed for search_logs, the index forgets what the files forget
+        self.index = LogIndex(os.path.join(self.log_dir, f'{file_name}.index.db'), rotation.get('retention_days', 30))
+        # Each bot writes its own file, several bots may run in the same process
+        self.handler = RotatingLogHandler(self.log_file, **rotation, on_rotate=self.index.prune)
+        self.handler.setFormatter(JsonFormatter(self.bot_name))
+        # Every run starts a new segment, the previous one is compressed
+        self.handler.doRollover()
+        # The loop only queues the records, a listener thread writes (and rotates) the file
+        self.queue = queue.SimpleQueue()
+        self.queue_handler = logging.handlers.QueueHandler(self.queue)
+        self.queue_handler.setFormatter(logging.Formatter("%(message)s"))
+        self.listener = logging.handlers.QueueListener(self.queue, self.handler, self.index, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.close)
+        self.log = logging.getLogger(f"{__name__}.{self.bot_name}" + (f".{suffix}" if suffix is not None else ""))
+        # The minimum levels are checked by the Logger itself (per bot and per guild, file and channel)
+        self.log.setLevel(logging.DEBUG)
+        self.levels = (logging.INFO, logging.INFO)   # (file, channel) minimum levels of the bot
+        self.guild_levels = dict()                   # guild_id -> (file, channel) minimum levels
+        self.log.addHandler(self.queue_handler)
+        self.log.propagate = False
+        # The first logger of the process also collects the library logs
+        logging.basicConfig(level= logging.INFO, handlers=[self.queue_handler])
         logging.Formatter.converter = time.gmtime
 
+    def close(self):
+        ''' Write the queued records and stop the listener thread '''
+        if self.listener is None:
+            return
+        self.listener.stop()
+        self.listener = None
+        # Late records (e.g. library logs while shutting down) are written directly
+        for logger in (self.log, logging.getLogger()):
+            if self.queue_handler in logger.handlers:
+                logger.removeHandler(self.queue_handler)
+                logger.addHandler(self.handler)
+                logger.addHandler(self.index)
+        self.handler.flush()
+        self.index.flush()
+
     def set_log_channel(self, guild_id: int, log_channel: discord.TextChannel):
         ''' Set the log channel '''
         self.log_channel[guild_id] = log_channel
@@ -42,47 +97,223 @@ class Logger():
     def remove_log_channel(self, guild_id: int):
         ''' Remove the log channel '''
         self.log_channel.pop(guild_id, None)
+        self.channel_queue.discard(guild_id)
 
-    def info(self, log_message: str, guild: discord.Guild=None, send_log=True):
-        '''Logs an info message'''
-        self.log.info(log_message)
-        if send_log and guild is not None:
-            self.send_log_message(log_message, guild, "info")
+    def info(self, log_message, guild: discord.Guild=None, send_log=True, **fields):
+        '''Logs an info message (log_message may be a callable, only called if a sink takes the message)'''
+        self.write(logging.INFO, log_message, guild, send_log, fields)
     
-    def debug(self, log_message: str, guild: discord.Guild=None, send_log=True):
+    def debug(self, log_message, guild: discord.Guild=None, send_log=True, **fields):
         '''Logs a debug message'''
-        self.log.debug(log_message)
-        if send_log and guild is not None:
-            self.send_log_message(log_message, guild, "debug")
+        self.write(logging.DEBUG, log_message, guild, send_log, fields)
     
-    def warning(self, log_message: str, guild: discord.Guild=None, send_log=True):
+    def warning(self, log_message, guild: discord.Guild=None, send_log=True, **fields):
         '''Logs a warning message'''
-        self.log.warning(log_message)
-        if send_log and guild is not None:
-            self.send_log_message(log_message, guild, "warning")
+        self.write(logging.WARNING, log_message, guild, send_log, fields)
 
-    def error(self, log_message: str, guild: discord.Guild=None, send_log=True):
+    def error(self, log_message, guild: discord.Guild=None, send_log=True, **fields):
         '''Logs an error message'''
-        self.log.error(log_message)
-        if send_log and guild is not None:
-            self.send_log_message(log_message, guild, "error")
-    
+        self.write(logging.ERROR, log_message, guild, send_log, fields)
+
+    def write(self, level: int, log_message, guild: discord.Guild, send_log: bool, fields: dict):
+        '''Send a message to the file and log channel sinks whose minimum level it reaches'''
+        file_level, channel_level = self.levels if guild is None else self.guild_levels.get(guild.id, self.levels)
+        to_file = level >= file_level
+        to_channel = send_log and guild is not None and level >= channel_level and guild.id in self.log_channel
+        if not (to_file or to_channel):
+            return # filtered out before formatting anything
+        if callable(log_message):
+            log_message = log_message()
+        if to_file:
+            self.log.log(level, log_message, extra={'fields': self.fields(guild, fields)})
+        if to_channel:
+            self.send_log_message(log_message, guild, level_names.get(level, "error"))
+
+    def enabled(self, level: int, guild: discord.Guild=None) -> bool:
+        '''Whether a message of this level would reach any sink (to skip building costly messages)'''
+        file_level, channel_level = self.levels if guild is None else self.guild_levels.get(guild.id, self.levels)
+        return level >= min(file_level, channel_level)
+
+    def set_levels(self, file_level=None, channel_level=None):
+        '''Set the minimum levels of the bot (names or numbers, None keeps INFO)'''
+        self.levels = (parse_level(file_level), parse_level(channel_level))
+
+    def set_guild_levels(self, guild_id: int, levels: dict = None):
+        '''Set the minimum levels of a guild from its settings ({'file': ..., 'channel': ...}), None to use the bot levels'''
+        if not levels:
+            self.guild_levels.pop(guild_id, None)
+            return
+        self.guild_levels[guild_id] = (parse_level(levels.get('file', None), self.levels[0]),
+                                       parse_level(levels.get('channel', None), self.levels[1]))
+
+    def fields(self, guild: discord.Guild, fields: dict) -> dict:
+        '''Structured fields of a record: the running command, the guild and the explicit fields'''
+        context = log_context.get()
+        if context is not None:
+            fields = {**context, **fields}
+        if guild is not None and 'guild_id' not in fields:
+            fields['guild_id'] = guild.id
+        return fields
+
+    def search(self, **filters) -> tuple:
+        '''Search the indexed records (see LogIndex.search)'''
+        return self.index.search(**filters)
+
     def send_log_message(self, log_message: str, guild: discord.Guild=None, level: str="info"):
-        '''Sends a message to the log channel'''
+        '''Queues a message for the log channel (delivered in batches)'''
         log_channel = self.log_channel.get(guild.id, None)
         if log_channel is not None:
-            embed = discord.Embed()
-            if level == "info": 
-                embed.description = f':information_source: \t {log_message}'
-                embed.color = discord.Color.dark_grey()
-            elif level == "debug":
-                embed.description = f':mag: \t {log_message}'
-                embed.color = discord.Color.orange()
-            elif level == "warning": 
-                embed.title = ""
-                embed.description = f':warning: \t {log_message}'
-                embed.color = discord.Color.yellow()
-            elif level == "error": 
-                embed.description = f':interrobang: \t {log_message} \n{log_channel.guild.owner.mention}'
-                embed.color = discord.Color.red()
-            asyncio.ensure_future(log_channel.send(embed=embed))
\ No newline at end of file
+            if level == "error":
+                log_message = f'{log_message} \n<@{log_channel.guild.owner_id}>'
+            self.channel_queue.put(guild.id, log_channel, level, log_message)
+
+    async def flush(self):
+        '''Deliver the queued log channel messages now'''
+        await self.channel_queue.flush()
+
+class LogChannelQueue():
+    ''' Per-guild queues of log channel messages, coalesced into multi-embed posts
+
+    Consecutive lines of the same level share an embed, up to 10 embeds and a character
+    budget per post, and each guild gets at most one post per interval. When a guild queue
+    is full the oldest info/debug line is dropped (warnings and errors are kept as long as
+    possible) and the next post says how many lines were dropped.
+    '''
+
+    styles = {'info': (':information_source:', discord.Color.dark_grey()),
+              'debug': (':mag:', discord.Color.orange()),
+              'warning': (':warning:', discord.Color.yellow()),
+              'error': (':interrobang:', discord.Color.red())}
+    max_embeds = 10         # Embeds per message (Discord limit)
+    description_limit = 4096  # Characters per embed description (Discord limit)
+
+    def __init__(self, interval: float = 3.0, max_entries: int = 200, char_budget: int = 5500):
+        ''' Initialize the queues '''
+        self.interval = interval
+        self.max_entries = max_entries
+        self.char_budget = char_budget
+        self.queues = dict()     # guild_id -> deque of (level, message)
+        self.channels = dict()   # guild_id -> log channel
+        self.dropped = dict()    # guild_id -> lines dropped since the last post
+        self.tasks = dict()      # guild_id -> pending delivery task
+        self.sender = None       # SendScheduler of the bot, posts at the lowest priority
+        self.counters = {'queued': 0, 'posts': 0, 'coalesced': 0, 'dropped': 0, 'failed': 0}
+
+    def put(self, guild_id: int, channel, level: str, message: str):
+        '''Queue a line for the log channel of a guild'''
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.counters['dropped'] += 1 # not on the event loop, nothing can deliver it
+            return
+        queue = self.queues.get(guild_id, None)
+        if queue is None:
+            queue = self.queues[guild_id] = deque()
+        self.channels[guild_id] = channel
+        if len(queue) >= self.max_entries:
+            self.drop_one(guild_id, queue)
+        queue.append((level, message))
+        self.counters['queued'] += 1
+        if guild_id not in self.tasks:
+            self.tasks[guild_id] = loop.create_task(self.deliver_later(guild_id))
+
+    def drop_one(self, guild_id: int, queue: deque):
+        '''Make room in a full queue, preferring the oldest info/debug line'''
+        for index, (level, _) in enumerate(queue):
+            if level in ('info', 'debug'):
+                del queue[index]
+                break
+        else:
+            queue.popleft()
+        self.dropped[guild_id] = self.dropped.get(guild_id, 0) + 1
+        self.counters['dropped'] += 1
+
+    async def deliver_later(self, guild_id: int):
+        '''Wait for the interval then deliver the queue of a guild'''
+        await asyncio.sleep(self.interval)
+        self.tasks.pop(guild_id, None)
+        await self.deliver(guild_id)
+        if self.queues.get(guild_id, None) and guild_id not in self.tasks:
+            # Lines left over by the per-post limits go out after the next interval
+            self.tasks[guild_id] = asyncio.get_running_loop().create_task(self.deliver_later(guild_id))
+
+    def discard(self, guild_id: int):
+        '''Forget the queued lines of a guild (its log channel was removed)'''
+        task = self.tasks.pop(guild_id, None)
+        if task is not None:
+            task.cancel()
+        self.queues.pop(guild_id, None)
+        self.channels.pop(guild_id, None)
+        self.dropped.pop(guild_id, None)
+
+    def build_post(self, guild_id: int) -> list:
+        '''Take the lines of the next post out of a guild queue and build its embeds'''
+        queue = self.queues.get(guild_id, deque())
+        embeds = list()
+        budget = self.char_budget
+        dropped = self.dropped.pop(guild_id, 0)
+        if dropped:
+            notice = f':wastebasket: \t {dropped} log messages were dropped (log channel overloaded)'
+            embeds.append(discord.Embed(description=notice, color=discord.Color.dark_grey()))
+            budget -= len(notice)
+        current_level, lines = None, list()
+        while queue:
+            level, message = queue[0]
+            emoji, _ = self.styles.get(level, self.styles['info'])
+            line = f'{emoji} \t {message}'[:self.description_limit]
+            if level == current_level and sum(len(text) + 1 for text in lines) + len(line) <= self.description_limit \
+                    and len(line) + 1 <= budget:
+                lines.append(line)
+            elif len(embeds) + (1 if lines else 0) < self.max_embeds and len(line) <= budget:
+                if lines:
+                    embeds.append(self.embed(current_level, lines))
+                current_level, lines = level, [line]
+            else:
+                break
+            budget -= len(line) + 1
+            queue.popleft()
+        if lines:
+            embeds.append(self.embed(current_level, lines))
+        return embeds
+
+    def embed(self, level: str, lines: list) -> discord.Embed:
+        '''Embed of consecutive lines of one level'''
+        return discord.Embed(description="\n".join(lines), color=self.styles.get(level, self.styles['info'])[1])
+
+    async def deliver(self, guild_id: int):
+        '''Send one post with the queued lines of a guild'''
+        channel = self.channels.get(guild_id, None)
+        queue = self.queues.get(guild_id, None)
+        lines = len(queue) if queue else 0
+        embeds = self.build_post(guild_id)
+        if not embeds or channel is None:
+            return
+        lines -= len(self.queues.get(guild_id, ()))
+        try:
+            if self.sender is not None:
+                await self.sender.send(channel, embeds=embeds, priority='log')
+            else:
+                await channel.send(embeds=embeds)
+        except (discord.HTTPException, RuntimeError):
+            self.counters['failed'] += 1
+            return
+        self.counters['posts'] += 1
+        self.counters['coalesced'] += max(lines - 1, 0)
+        if not self.queues.get(guild_id, None):
+            self.queues.pop(guild_id, None)
+
+    async def flush(self):
+        '''Deliver every queued line now (used when the bot closes)'''
+        for task in list(self.tasks.values()):
+            task.cancel()
+        self.tasks.clear()
+        for guild_id in list(self.queues):
+            while self.queues.get(guild_id, None):
+                before = len(self.queues[guild_id])
+                await self.deliver(guild_id)
+                if len(self.queues.get(guild_id, ())) >= before:
+                    break # delivery failed
+
+    def stats(self) -> dict:
+        '''Get the queue counters'''
+        return {**self.counters, 'pending': sum(len(queue) for queue in self.queues.values())}
\ No newline at end of file
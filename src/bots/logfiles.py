@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Author: Kabilan Tamilmani
+# E-mail: kavikabilan37@gmail.com
+# Github: Kabilan-T
+
+''' Rotating, compressed log files and streaming readers for them
+
+The current segment is <name>.log, rotated segments are <name>.log.<UTC end time>.gz.
+The readers stream the segments line by line, so the memory they use is bounded by the
+number of lines they return, not by the size of the files.
+'''
+
+#-------------------------------------------------------------------------------
+
+import os
+import re
+import gzip
+import glob
+import time
+import shutil
+import logging.handlers
+from collections import deque
+from datetime import datetime, timezone
+
+segment_time_format = "%Y%m%d%H%M%S"
+record_time_format = "%Y-%m-%d %H:%M:%S"
+# Records are JSON lines starting with their time (older segments may be plain text lines)
+record_time_pattern = re.compile(r'^(?:\{"time": ")?(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})')
+
+class RotatingLogHandler(logging.handlers.BaseRotatingHandler):
+    ''' File handler rotating on size or age, gzipping the old segments and pruning them '''
+
+    def __init__(self, filename: str, max_bytes: int = 10 * 2**20, rotate_hours: float = 24,
+                 backups: int = 30, retention_days: float = 30, on_rotate=None):
+        ''' Initialize the handler (0 disables the corresponding limit, on_rotate is called after each rotation) '''
+        super().__init__(filename, 'a', encoding='utf-8', delay=False)
+        self.on_rotate = on_rotate
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_hours * 3600
+        self.backups = backups
+        self.retention_seconds = retention_days * 86400
+        self.opened = time.time()
+
+    def shouldRollover(self, record) -> bool:
+        '''Rotate when the segment is too large or too old'''
+        if self.stream is None:
+            return False
+        if self.rotate_seconds and record.created - self.opened >= self.rotate_seconds:
+            return True
+        return bool(self.max_bytes) and self.stream.tell() >= self.max_bytes
+
+    def doRollover(self):
+        '''Compress the current segment, prune the old ones and start a new one'''
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0:
+            end = datetime.now(timezone.utc).strftime(segment_time_format)
+            target = f"{self.baseFilename}.{end}.gz"
+            suffix = 1
+            while os.path.exists(target):
+                target = f"{self.baseFilename}.{end}-{suffix}.gz"
+                suffix += 1
+            with open(self.baseFilename, 'rb') as source, gzip.open(target, 'wb') as compressed:
+                shutil.copyfileobj(source, compressed)
+            os.remove(self.baseFilename)
+        self.prune()
+        self.stream = self._open()
+        self.opened = time.time()
+        if self.on_rotate is not None:
+            self.on_rotate()
+
+    def prune(self):
+        '''Delete the rotated segments beyond the backup count or the retention period'''
+        rotated = rotated_segments(self.baseFilename)
+        now = time.time()
+        for index, path in enumerate(reversed(rotated)): # newest first
+            too_many = self.backups and index >= self.backups
+            too_old = self.retention_seconds and now - os.path.getmtime(path) > self.retention_seconds
+            if too_many or too_old:
+                os.remove(path)
+
+def rotated_segments(log_file: str) -> list:
+    '''Rotated segments of a log file, oldest first'''
+    def order(path):
+        stamp, _, suffix = path[len(log_file) + 1:].removesuffix(".gz").partition("-")
+        return (stamp, int(suffix) if suffix.isdigit() else 0)
+    return sorted(glob.glob(glob.escape(log_file) + ".*.gz"), key=order)
+
+def segment_end(path: str, log_file: str):
+    '''UTC end time of a segment (None for the current one)'''
+    if path == log_file:
+        return None
+    stamp = path[len(log_file) + 1:].removesuffix(".gz").split("-")[0]
+    return datetime.strptime(stamp, segment_time_format).replace(tzinfo=timezone.utc)
+
+def open_segment(path: str):
+    '''Open a segment for reading text, compressed or not'''
+    if path.endswith(".gz"):
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, 'r', encoding='utf-8', errors='replace')
+
+def tail_lines(log_file: str, count: int) -> list:
+    '''Last lines of a log, reading the current segment backwards and older segments only if needed'''
+    lines = deque()
+    if os.path.exists(log_file):
+        lines.extendleft(reversed(read_backwards(log_file, count)))
+    for path in reversed(rotated_segments(log_file)):
+        if len(lines) >= count:
+            break
+        # Compressed segments can only be read forward, keep their last lines
+        with open_segment(path) as file:
+            last = deque(file, maxlen=count - len(lines))
+        lines.extendleft(reversed(last))
+    return list(lines)
+
+def read_backwards(path: str, count: int, block_size: int = 65536) -> list:
+    '''Last lines of a plain text file, reading blocks from its end'''
+    with open(path, 'rb') as file:
+        file.seek(0, os.SEEK_END)
+        position = file.tell()
+        data = b""
+        while position > 0 and data.count(b"\n") <= count:
+            size = min(block_size, position)
+            position -= size
+            file.seek(position)
+            data = file.read(size) + data
+    lines = data.decode('utf-8', errors='replace').splitlines(keepends=True)
+    return lines[-count:] if count > 0 else []
+
+def lines_between(log_file: str, start: datetime, end: datetime = None):
+    '''Stream the lines of the records logged between two UTC times (continuation lines follow their record)'''
+    segments = rotated_segments(log_file) + ([log_file] if os.path.exists(log_file) else [])
+    start_text = start.strftime(record_time_format)
+    end_text = end.strftime(record_time_format) if end is not None else None
+    for path in segments:
+        finished = segment_end(path, log_file)
+        if finished is not None and finished < start:
+            continue # the segment ended before the range
+        inside = False
+        with open_segment(path) as file:
+            for line in file:
+                match = record_time_pattern.match(line)
+                if match is not None:
+                    stamp = match.group(1)
+                    if end_text is not None and stamp > end_text:
+                        return
+                    inside = stamp >= start_text
+                if inside:
+                    yield line
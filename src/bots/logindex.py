@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Author: Kabilan Tamilmani
+# E-mail: kavikabilan37@gmail.com
+# Github: Kabilan-T
+
+''' Structured log records: JSON lines for the log files and a SQLite index to search them '''
+
+#-------------------------------------------------------------------------------
+
+import json
+import time
+import sqlite3
+import logging
+import contextvars
+from datetime import datetime, timezone
+
+# Fields of the command being run by the current task (set by BaseBot.invoke)
+log_context = contextvars.ContextVar('log_context', default=None)
+
+record_fields = ('guild_id', 'channel_id', 'user_id', 'command', 'duration')
+
+class JsonFormatter(logging.Formatter):
+    ''' One JSON object per record: time, level, bot, guild_id, channel_id, user_id, command, duration, message '''
+
+    def __init__(self, bot_name: str):
+        ''' Initialize the formatter '''
+        super().__init__()
+        self.bot_name = bot_name
+
+    def format(self, record: logging.LogRecord) -> str:
+        '''Format a record as a JSON line (the time comes first, the log readers rely on it)'''
+        data = {'time': f"{time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(record.created))}.{int(record.msecs):03d}",
+                'level': record.levelname,
+                'bot': self.bot_name}
+        fields = getattr(record, 'fields', None)
+        if fields:
+            data.update((key, value) for key, value in fields.items() if value is not None)
+        if not record.name.startswith("bots."):
+            data['source'] = record.name # library record
+        data['message'] = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exception'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+class LogIndex(logging.Handler):
+    ''' SQLite index of the log records (FTS5 on the messages), written by the log listener thread '''
+
+    def __init__(self, db_path: str, retention_days: float = 30, batch_size: int = 200, commit_interval: float = 1.0):
+        ''' Initialize the index '''
+        super().__init__(level=logging.INFO)
+        self.db_path = db_path
+        self.retention_seconds = retention_days * 86400
+        self.batch_size = batch_size
+        self.commit_interval = commit_interval
+        self.pending = list()
+        self.committed = time.monotonic()
+        self.connection = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS records ("
+                                "id INTEGER PRIMARY KEY, time REAL NOT NULL, level TEXT NOT NULL, "
+                                "guild_id INTEGER, channel_id INTEGER, user_id INTEGER, command TEXT, duration REAL, "
+                                "message TEXT NOT NULL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS records_time ON records (time)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS records_guild ON records (guild_id, time)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS records_user ON records (user_id, time)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS records_command ON records (command, time)")
+        self.connection.execute("CREATE VIRTUAL TABLE IF NOT EXISTS records_fts USING fts5("
+                                "message, content='records', content_rowid='id')")
+        self.connection.execute("CREATE TRIGGER IF NOT EXISTS records_insert AFTER INSERT ON records BEGIN "
+                                "INSERT INTO records_fts (rowid, message) VALUES (new.id, new.message); END")
+        self.connection.execute("CREATE TRIGGER IF NOT EXISTS records_delete AFTER DELETE ON records BEGIN "
+                                "INSERT INTO records_fts (records_fts, rowid, message) VALUES ('delete', old.id, old.message); END")
+
+    def emit(self, record: logging.LogRecord):
+        '''Queue a record, the batch is committed by size or age'''
+        fields = getattr(record, 'fields', None) or dict()
+        self.pending.append((record.created, record.levelname, *(fields.get(key, None) for key in record_fields),
+                             record.getMessage()))
+        if len(self.pending) >= self.batch_size or time.monotonic() - self.committed >= self.commit_interval:
+            self.commit()
+
+    def commit(self):
+        '''Write the queued records (call with the handler lock held or from emit)'''
+        self.committed = time.monotonic()
+        if not self.pending or self.connection is None:
+            return
+        rows, self.pending = self.pending, list()
+        try:
+            self.connection.execute("BEGIN")
+            self.connection.executemany("INSERT INTO records (time, level, guild_id, channel_id, user_id, command, duration, message) "
+                                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self.connection.execute("COMMIT")
+        except sqlite3.Error:
+            if self.connection.in_transaction:
+                self.connection.execute("ROLLBACK")
+
+    def flush(self):
+        '''Commit the queued records'''
+        self.acquire()
+        try:
+            self.commit()
+        finally:
+            self.release()
+
+    def prune(self):
+        '''Drop the records older than the retention period (called when the log file rotates)'''
+        if not self.retention_seconds:
+            return
+        self.acquire()
+        try:
+            self.commit()
+            self.connection.execute("DELETE FROM records WHERE time < ?", (time.time() - self.retention_seconds,))
+        finally:
+            self.release()
+
+    def search(self, guild_id: int = None, user_id: int = None, command: str = None, level: str = None,
+               since: datetime = None, until: datetime = None, text: str = None, limit: int = 20) -> tuple:
+        '''Find the most recent matching records: ([row dict], total matches, elapsed ms)'''
+        start = time.perf_counter()
+        self.flush()
+        conditions, parameters = list(), list()
+        for column, value in (('guild_id', guild_id), ('user_id', user_id), ('command', command), ('level', level)):
+            if value is not None:
+                conditions.append(f"records.{column} = ?")
+                parameters.append(value)
+        if since is not None:
+            conditions.append("records.time >= ?")
+            parameters.append(since.timestamp())
+        if until is not None:
+            conditions.append("records.time <= ?")
+            parameters.append(until.timestamp())
+        if text:
+            conditions.append("records.id IN (SELECT rowid FROM records_fts WHERE records_fts MATCH ?)")
+            parameters.append(text)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        # A reader connection per search, the writer keeps committing meanwhile (WAL)
+        connection = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, timeout=30)
+        try:
+            total = connection.execute(f"SELECT COUNT(*) FROM records{where}", parameters).fetchone()[0]
+            rows = connection.execute(f"SELECT records.time, records.level, records.guild_id, records.channel_id, records.user_id, "
+                                      f"records.command, records.duration, records.message FROM records{where} "
+                                      f"ORDER BY records.time DESC LIMIT ?", parameters + [limit]).fetchall()
+        finally:
+            connection.close()
+        columns = ('time', 'level', *record_fields, 'message')
+        results = [dict(zip(columns, row)) for row in rows]
+        for result in results:
+            result['time'] = datetime.fromtimestamp(result['time'], timezone.utc)
+        return results, total, (time.perf_counter() - start) * 1000
+
+    def close(self):
+        '''Commit and close the index'''
+        self.acquire()
+        try:
+            self.commit()
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+        finally:
+            self.release()
+        super().close()
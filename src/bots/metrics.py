@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Author: Kabilan Tamilmani
+# E-mail: kavikabilan37@gmail.com
+# Github: Kabilan-T
+
+''' Command metrics: counts and latency histograms per command, cog and guild, in Prometheus text format '''
+
+#-------------------------------------------------------------------------------
+
+import time
+import bisect
+from aiohttp import web
+
+# Upper bounds of the latency buckets in seconds (the last bucket is +Inf)
+latency_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class LatencyHistogram():
+    ''' Fixed-bucket latency histogram with interpolated quantiles '''
+
+    __slots__ = ('counts', 'count', 'sum')
+
+    def __init__(self):
+        ''' Initialize the histogram '''
+        self.counts = [0] * (len(latency_buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        '''Record one duration'''
+        self.counts[bisect.bisect_left(latency_buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> float:
+        '''Estimate a quantile by linear interpolation inside its bucket (None if empty)'''
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = latency_buckets[index - 1] if index > 0 else 0.0
+                if index == len(latency_buckets):
+                    return lower # +Inf bucket, the best estimate is its lower bound
+                return lower + (latency_buckets[index] - lower) * (rank - seen) / count
+            seen += count
+        return latency_buckets[-1]
+
+def render_histogram(name: str, labels: str, histogram: LatencyHistogram) -> list:
+    '''Prometheus lines of a histogram: cumulative buckets, sum and count (labels: 'bot="x",host="y"')'''
+    lines = list()
+    cumulative = 0
+    for bound, count in zip(latency_buckets + (float('inf'),), histogram.counts):
+        cumulative += count
+        le = "+Inf" if bound == float('inf') else repr(bound)
+        lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+    lines.append(f'{name}_sum{{{labels}}} {histogram.sum:.6f}')
+    lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+    return lines
+
+class CommandStats():
+    ''' Counters and latency histogram of one command, cog or guild '''
+
+    __slots__ = ('uses', 'errors', 'latency')
+
+    def __init__(self):
+        ''' Initialize the counters '''
+        self.uses = 0
+        self.errors = 0
+        self.latency = LatencyHistogram()
+
+class CommandMetrics():
+    ''' Command metrics of a bot, fed by on_command, on_command_completion and on_command_error '''
+
+    def __init__(self, bot_name: str):
+        ''' Initialize the metrics '''
+        self.bot_name = bot_name
+        self.stats = {'command': dict(), 'cog': dict(), 'guild': dict()}
+        self.unknown = 0   # Messages with the prefix that matched no command
+
+    @staticmethod
+    def labels(context) -> dict:
+        '''Command, cog and guild labels of an invocation'''
+        return {'command': context.command.qualified_name,
+                'cog': context.cog.qualified_name if context.cog is not None else "none",
+                'guild': str(context.guild.id) if context.guild is not None else "dm"}
+
+    def start(self, context):
+        '''Mark the start of an invocation'''
+        context.metrics_start = time.perf_counter()
+
+    def finish(self, context, failed: bool = False):
+        '''Record the end of an invocation'''
+        if context.command is None:
+            self.unknown += 1
+            return
+        start = getattr(context, 'metrics_start', None)
+        duration = time.perf_counter() - start if start is not None else None
+        for kind, label in self.labels(context).items():
+            stats = self.stats[kind].get(label, None)
+            if stats is None:
+                stats = self.stats[kind][label] = CommandStats()
+            stats.uses += 1
+            if failed:
+                stats.errors += 1
+            # Errors raised before on_command (e.g. unparsable arguments) have no duration
+            if duration is not None:
+                stats.latency.observe(duration)
+
+    def top(self, kind: str, limit: int = 10) -> list:
+        '''Most used entries of a kind: [(label, stats)]'''
+        return sorted(self.stats[kind].items(), key=lambda item: item[1].uses, reverse=True)[:limit]
+
+    def prometheus(self) -> str:
+        '''Render the metrics in the Prometheus text exposition format'''
+        bot = self.bot_name.replace('"', '')
+        lines = list()
+        for kind in ('command', 'cog', 'guild'):
+            name = f"discord_bot_{kind}"
+            lines.append(f"# HELP {name}_uses_total Invocations per {kind}")
+            lines.append(f"# TYPE {name}_uses_total counter")
+            for label, stats in self.stats[kind].items():
+                lines.append(f'{name}_uses_total{{bot="{bot}",{kind}="{label}"}} {stats.uses}')
+            lines.append(f"# HELP {name}_errors_total Failed invocations per {kind}")
+            lines.append(f"# TYPE {name}_errors_total counter")
+            for label, stats in self.stats[kind].items():
+                lines.append(f'{name}_errors_total{{bot="{bot}",{kind}="{label}"}} {stats.errors}')
+            lines.append(f"# HELP {name}_latency_seconds Invocation latency per {kind}")
+            lines.append(f"# TYPE {name}_latency_seconds histogram")
+            for label, stats in self.stats[kind].items():
+                lines.extend(render_histogram(f"{name}_latency_seconds", f'bot="{bot}",{kind}="{label}"', stats.latency))
+        lines.append("# HELP discord_bot_unknown_commands_total Prefixed messages that matched no command")
+        lines.append("# TYPE discord_bot_unknown_commands_total counter")
+        lines.append(f'discord_bot_unknown_commands_total{{bot="{bot}"}} {self.unknown}')
+        return "\n".join(lines) + "\n"
+
+class MetricsServer():
+    ''' Localhost HTTP endpoint serving /metrics in Prometheus text format '''
+
+    def __init__(self, render, port: int, host: str = "127.0.0.1"):
+        ''' Initialize the server (render returns the metrics text) '''
+        self.render = render
+        self.port = port
+        self.host = host
+        self.runner = None
+
+    async def start(self):
+        '''Start serving'''
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+
+    async def handle(self, request):
+        '''Serve the metrics'''
+        return web.Response(text=self.render(), headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    async def close(self):
+        '''Stop serving'''
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Author: Kabilan Tamilmani
+# E-mail: kavikabilan37@gmail.com
+# Github: Kabilan-T
+
+''' One-shot migration of the guild and bot-level YAML documents between storage backends '''
+
+#-------------------------------------------------------------------------------
+
+import os
+import argparse
+from bots.base import config_file, data
+from bots.storage import create_storage
+from bots.codec import load_yaml
+
+def migrate(bot_name: str, source: str = 'yaml', target: str = 'sqlite') -> dict:
+    '''Copy every guild and bot-level document of a bot from the source to the target backend
+    (counts per guild ID, None for the bot-level documents)'''
+    with open(config_file, 'r') as file:
+        config = load_yaml(file).get(bot_name, None)
+    if config is None:
+        raise ValueError(f"Configuration not found for {bot_name}")
+    data_dir = os.path.join(data, config.get('name', None))
+    source_storage = create_storage(source, data_dir)
+    target_storage = create_storage(target, data_dir)
+    counts = dict()
+    try:
+        for guild_id in source_storage.list_guild_ids():
+            target_storage.ensure_guild(guild_id)
+            documents = source_storage.documents(guild_id)
+            for filename, document in documents.items():
+                target_storage.save(guild_id, filename, document)
+            counts[guild_id] = len(documents)
+        documents = source_storage.documents(None)
+        for filename, document in documents.items():
+            target_storage.save(None, filename, document)
+        counts[None] = len(documents)
+    finally:
+        source_storage.close()
+        target_storage.close()
+    return counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate the guild and bot-level data of a bot between storage backends.")
+    parser.add_argument("bot_name", help="Bot key in config.yml (auto, eve, mo, go4)")
+    parser.add_argument("--source", default='yaml', help="Backend to read from (default: yaml)")
+    parser.add_argument("--target", default='sqlite', help="Backend to write to (default: sqlite)")
+    args = parser.parse_args()
+    counts = migrate(args.bot_name, args.source, args.target)
+    for guild_id, count in counts.items():
+        print(f"{'bot' if guild_id is None else guild_id}: {count} documents")
+    print(f"Migrated {sum(counts.values())} documents of {len(counts) - 1} guilds and the bot from {args.source} to {args.target}.")
+    print(f"Set 'storage: {args.target}' for {args.bot_name} in config.yml to use the migrated data.")
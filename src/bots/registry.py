@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Author: Kabilan Tamilmani
+# E-mail: kavikabilan37@gmail.com
+# Github: Kabilan-T
+
+''' In-memory registry of the guilds a bot has data for '''
+
+#-------------------------------------------------------------------------------
+
+import threading
+
+class GuildRegistry():
+    ''' Guild IDs registered with the storage backend, scanned once and kept up to date by the bot '''
+
+    def __init__(self, storage, owns_guild):
+        ''' Initialize the registry (owns_guild filters the guilds of other cluster workers) '''
+        self.storage = storage
+        self.owns_guild = owns_guild
+        self.guild_ids = None      # Built on first use
+        self.left = set()          # Guilds the bot left since it started, their data is kept
+        self.listed = None         # Sorted IDs of the last listing, until the registry changes
+        self.recent = set()        # Guilds registered while a reconcile scan runs
+        self.lock = threading.Lock()   # Extensions read it from worker threads
+        self.scans = 0
+
+    def scan(self) -> set:
+        '''Registered guild IDs of the storage backend served by this process'''
+        self.scans += 1
+        return {int(guild_id) for guild_id in self.storage.list_guild_ids() if self.owns_guild(guild_id)}
+
+    def load(self):
+        '''Build the registry from the storage backend if not built yet (call with the lock held)'''
+        if self.guild_ids is None:
+            self.guild_ids = self.scan()
+
+    def list(self) -> list:
+        '''Sorted IDs of the registered guilds the bot is still in'''
+        with self.lock:
+            if self.listed is None:
+                self.load()
+                self.listed = sorted(self.guild_ids - self.left)
+            return list(self.listed)
+
+    def contains(self, guild_id) -> bool:
+        '''Whether a guild is registered'''
+        with self.lock:
+            self.load()
+            return int(guild_id) in self.guild_ids
+
+    def ensure(self, guild_id) -> bool:
+        '''Register a guild with the storage backend unless already known, True if it is new'''
+        guild_id = int(guild_id)
+        with self.lock:
+            self.load()
+            if guild_id in self.left:
+                self.left.discard(guild_id) # joined again
+                self.listed = None
+            if guild_id in self.guild_ids:
+                return False
+            is_new = self.storage.ensure_guild(guild_id)
+            self.guild_ids.add(guild_id)
+            self.recent.add(guild_id)
+            self.listed = None
+            return is_new
+
+    def add(self, guild_id):
+        '''Record a guild registered by a document save'''
+        guild_id = int(guild_id)
+        with self.lock:
+            if self.guild_ids is not None and guild_id not in self.guild_ids:
+                self.guild_ids.add(guild_id)
+                self.recent.add(guild_id)
+                self.listed = None
+
+    def forget(self, guild_id):
+        '''Drop a guild whose data was cleared (ensure registers it again)'''
+        with self.lock:
+            if self.guild_ids is not None:
+                self.guild_ids.discard(int(guild_id))
+                self.listed = None
+
+    def leave(self, guild_id):
+        '''Stop listing a guild the bot was removed from'''
+        with self.lock:
+            self.left.add(int(guild_id))
+            self.listed = None
+
+    def reconcile(self) -> tuple:
+        '''Rescan the storage backend (in a worker thread): (added IDs, removed IDs)'''
+        with self.lock:
+            self.recent.clear()
+        scanned = self.scan()
+        with self.lock:
+            scanned |= self.recent # registered during the scan
+            if self.guild_ids is None:
+                self.guild_ids = scanned
+                return set(), set()
+            added, removed = scanned - self.guild_ids, self.guild_ids - scanned
+            self.guild_ids = scanned
+            if added or removed:
+                self.listed = None
+            return added, removed
+
+    def stats(self) -> dict:
+        '''Get the registry counters'''
+        with self.lock:
+            return {'guilds': len(self.guild_ids) if self.guild_ids is not None else None, 'left': len(self.left), 'scans': self.scans}
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Author: Kabilan Tamilmani
+# E-mail: kavikabilan37@gmail.com
+# Github: Kabilan-T
+
+''' Cache of slow-changing external responses: a memory LRU over a SQLite store
+
+An entry is fresh for the TTL of its source, then stale for a while: a stale entry is
+served at once while a single background fetch refreshes it. Identical fetches in flight
+share one request. The entries are kept in data/<BOT>/bot/responses.db so they survive
+restarts, and an expired entry is still served when its refresh fails.
+'''
+
+#-------------------------------------------------------------------------------
+
+import json
+import time
+import copy
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict
+
+class ResponseCache():
+    ''' Responses keyed by (source, request) with per-source TTLs '''
+
+    def __init__(self, db_path: str, max_entries: int = 512, ttls: dict = None, log=None):
+        ''' Initialize the cache (ttls overrides the TTL of sources in seconds, see open) '''
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttls = ttls or dict()
+        self.log = log
+        self.entries = OrderedDict()   # key -> (fetched, fresh until, stale until, value)
+        self.inflight = dict()         # key -> fetch task
+        self.lock = threading.Lock()   # The store is written from worker threads
+        self.connection = None
+        self.counters = {'hits': 0, 'stale': 0, 'misses': 0, 'coalesced': 0, 'fetches': 0, 'errors': 0}
+
+    async def open(self):
+        '''Open the store, drop its expired entries and load the most recent ones in memory'''
+        await asyncio.to_thread(self.load)
+
+    def load(self):
+        '''Open the store (runs in a worker thread)'''
+        with self.lock:
+            self.connection = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, isolation_level=None)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS responses ("
+                                    "key TEXT PRIMARY KEY, fetched REAL NOT NULL, fresh REAL NOT NULL, "
+                                    "stale REAL NOT NULL, value TEXT NOT NULL) WITHOUT ROWID")
+            self.connection.execute("DELETE FROM responses WHERE stale < ?", (time.time(),))
+            rows = self.connection.execute("SELECT key, fetched, fresh, stale, value FROM responses "
+                                           "ORDER BY fetched DESC LIMIT ?", (self.max_entries,)).fetchall()
+        for key, fetched, fresh, stale, value in reversed(rows):
+            self.entries[key] = (fetched, fresh, stale, json.loads(value))
+
+    def read(self, key):
+        '''Read an entry evicted from memory (runs in a worker thread)'''
+        with self.lock:
+            if self.connection is None:
+                return None
+            row = self.connection.execute("SELECT fetched, fresh, stale, value FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return (row[0], row[1], row[2], json.loads(row[3]))
+
+    def write(self, key, entry):
+        '''Store an entry (runs in a worker thread)'''
+        value = json.dumps(entry[3])
+        with self.lock:
+            if self.connection is None:
+                return
+            self.connection.execute("INSERT OR REPLACE INTO responses (key, fetched, fresh, stale, value) VALUES (?, ?, ?, ?, ?)",
+                                    (key, *entry[:3], value))
+
+    def remember(self, key, entry):
+        '''Put an entry in the memory LRU'''
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def fetch(self, source: str, request: str, loader, ttl: float, stale: float = None,
+                    valid=None, invalid_ttl: float = 60):
+        '''Get a response, calling the loader coroutine function only when it is missing or stale
+
+        source names the API (its TTL can be overridden in config.yml), request identifies the
+        response within it. A stale entry is kept for stale seconds after its TTL (the TTL by default).
+        A response for which valid(response) is false is only kept for invalid_ttl seconds, not stale.
+        '''
+        ttl = self.ttls.get(source, ttl)
+        stale = ttl if stale is None else stale
+        key = f"{source}:{request}"
+        entry = self.entries.get(key, None)
+        if entry is None and self.connection is not None:
+            entry = await asyncio.to_thread(self.read, key)
+            if entry is not None:
+                self.remember(key, entry)
+        now = time.time()
+        if entry is not None:
+            self.entries.move_to_end(key)
+            if now < entry[1]:
+                self.counters['hits'] += 1
+                return copy.deepcopy(entry[3])
+            if now < entry[2]:
+                self.counters['stale'] += 1
+                self.refresh(key, loader, ttl, stale, valid, invalid_ttl)
+                return copy.deepcopy(entry[3])
+        self.counters['misses'] += 1
+        try:
+            value = await asyncio.shield(self.refresh(key, loader, ttl, stale, valid, invalid_ttl))
+        except Exception as e:
+            if entry is None:
+                raise
+            # The source is down, an expired response is better than none
+            if self.log is not None:
+                self.log.warning(f"Serving an expired {source} response: {type(e).__name__}: {e}")
+            return copy.deepcopy(entry[3])
+        return copy.deepcopy(value)
+
+    def refresh(self, key, loader, ttl: float, stale: float, valid=None, invalid_ttl: float = 60) -> asyncio.Task:
+        '''Start fetching a response, or join the fetch already in flight'''
+        task = self.inflight.get(key, None)
+        if task is not None:
+            self.counters['coalesced'] += 1
+            return task
+        task = self.inflight[key] = asyncio.create_task(self.load_response(key, loader, ttl, stale, valid, invalid_ttl))
+        task.add_done_callback(self.fetched)
+        return task
+
+    async def load_response(self, key, loader, ttl: float, stale: float, valid=None, invalid_ttl: float = 60):
+        '''Fetch a response and store it'''
+        self.counters['fetches'] += 1
+        try:
+            value = await loader()
+        finally:
+            self.inflight.pop(key, None)
+        if valid is not None and not valid(value):
+            ttl, stale = invalid_ttl, 0
+        now = time.time()
+        entry = (now, now + ttl, now + ttl + stale, value)
+        self.remember(key, entry)
+        await asyncio.to_thread(self.write, key, entry)
+        return value
+
+    def fetched(self, task: asyncio.Task):
+        '''Count the failed fetches (background refreshes have no caller to raise to)'''
+        if not task.cancelled() and task.exception() is not None:
+            self.counters['errors'] += 1
+
+    def invalidate(self, source: str, request: str = None):
+        '''Drop a response, or every response of a source'''
+        prefix = f"{source}:" if request is None else f"{source}:{request}"
+        for key in [key for key in self.entries if (key.startswith(prefix) if request is None else key == prefix)]:
+            del self.entries[key]
+        with self.lock:
+            if self.connection is not None:
+                if request is None:
+                    self.connection.execute("DELETE FROM responses WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+                else:
+                    self.connection.execute("DELETE FROM responses WHERE key = ?", (prefix,))
+
+    def stats(self) -> dict:
+        '''Get the cache counters'''
+        return {**self.counters, 'entries': len(self.entries), 'max_entries': self.max_entries, 'inflight': len(self.inflight)}
+
+    async def close(self):
+        '''Stop the fetches in flight and close the store'''
+        for task in list(self.inflight.values()):
+            task.cancel()
+        await asyncio.gather(*self.inflight.values(), return_exceptions=True)
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Author: Kabilan Tamilmani
+# E-mail: kavikabilan37@gmail.com
+# Github: Kabilan-T
+
+''' Message router: classifies each message once and runs only the cog handlers interested in it '''
+
+#-------------------------------------------------------------------------------
+
+import time
+import asyncio
+import discord
+from bots.metrics import CommandStats, render_histogram
+
+class MessageInfo():
+    ''' Classification of a message shared by the handlers '''
+
+    __slots__ = ('message', 'dm', 'from_bot', 'own', 'prefix', 'prefixed', 'reply', 'url', 'empty')
+
+    def __init__(self, message: discord.Message, prefix: str, user):
+        ''' Classify a message '''
+        content = message.content
+        self.message = message
+        self.dm = message.guild is None
+        self.from_bot = message.author.bot
+        self.own = user is not None and message.author.id == user.id
+        self.prefix = prefix
+        self.prefixed = bool(prefix) and content.startswith(prefix)
+        self.reply = message.reference is not None
+        self.url = "http://" in content or "https://" in content
+        self.empty = not content.strip()
+
+def message_handler(dm: bool = False, from_bot: bool = False, own: bool = False, prefixed: bool = None,
+                    reply: bool = None, url: bool = None, empty: bool = False, predicate=None):
+    '''Mark a cog method as a handler of the messages it is interested in
+
+    True or False requires that classification of the message, None accepts both. The defaults
+    take the non-empty guild messages of users. predicate(cog, info) is checked last, for the
+    interests that depend on the cog state. The method is called with the message.
+    '''
+    def decorator(function):
+        function.__message_interest__ = {'dm': dm, 'from_bot': from_bot, 'own': own, 'prefixed': prefixed,
+                                         'reply': reply, 'url': url, 'empty': empty, 'predicate': predicate}
+        return function
+    return decorator
+
+class MessageRouter():
+    ''' Handlers registered by the cogs of a bot, with run counts and latencies per handler '''
+
+    def __init__(self, bot_name: str, log):
+        ''' Initialize the router '''
+        self.bot_name = bot_name
+        self.log = log
+        self.handlers = list()   # (name, cog, method, interest)
+        self.stats = dict()      # handler name -> CommandStats
+        self.tasks = set()       # running handlers
+        self.messages = 0
+
+    def register(self, cog):
+        '''Register the message handlers of a cog'''
+        for name in dir(type(cog)):
+            function = getattr(type(cog), name, None)
+            interest = getattr(function, '__message_interest__', None)
+            if interest is not None:
+                self.handlers.append((f"{cog.qualified_name}.{name}", cog, getattr(cog, name), interest))
+
+    def unregister(self, cog):
+        '''Remove the message handlers of a cog'''
+        self.handlers = [handler for handler in self.handlers if handler[1] is not cog]
+
+    @staticmethod
+    def interested(interest: dict, cog, info: MessageInfo) -> bool:
+        '''Whether a handler wants a message'''
+        for flag in ('dm', 'from_bot', 'own', 'prefixed', 'reply', 'url', 'empty'):
+            wanted = interest[flag]
+            if wanted is not None and wanted != getattr(info, flag):
+                return False
+        predicate = interest['predicate']
+        return predicate is None or predicate(cog, info)
+
+    def dispatch(self, info: MessageInfo):
+        '''Start the handlers interested in a message, each in its own task'''
+        self.messages += 1
+        for name, cog, method, interest in self.handlers:
+            if self.interested(interest, cog, info):
+                task = asyncio.create_task(self.run(name, method, info.message), name=f"message handler {name}")
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+
+    async def run(self, name: str, method, message: discord.Message):
+        '''Run a handler, timing it and logging its errors'''
+        stats = self.stats.get(name, None)
+        if stats is None:
+            stats = self.stats[name] = CommandStats()
+        stats.uses += 1
+        start = time.perf_counter()
+        try:
+            await method(message)
+        except Exception as e:
+            stats.errors += 1
+            self.log.error(f"Message handler {name} failed\n{type(e).__name__}: {e}", message.guild)
+        finally:
+            stats.latency.observe(time.perf_counter() - start)
+
+    def prometheus(self) -> str:
+        '''Render the handler metrics in the Prometheus text exposition format'''
+        bot = self.bot_name.replace('"', '')
+        lines = ["# HELP discord_bot_messages_routed_total Messages classified by the router",
+                 "# TYPE discord_bot_messages_routed_total counter",
+                 f'discord_bot_messages_routed_total{{bot="{bot}"}} {self.messages}',
+                 "# HELP discord_bot_message_handler_runs_total Runs per message handler",
+                 "# TYPE discord_bot_message_handler_runs_total counter"]
+        for name, stats in self.stats.items():
+            lines.append(f'discord_bot_message_handler_runs_total{{bot="{bot}",handler="{name}"}} {stats.uses}')
+        lines.append("# HELP discord_bot_message_handler_errors_total Failed runs per message handler")
+        lines.append("# TYPE discord_bot_message_handler_errors_total counter")
+        for name, stats in self.stats.items():
+            lines.append(f'discord_bot_message_handler_errors_total{{bot="{bot}",handler="{name}"}} {stats.errors}')
+        lines.append("# HELP discord_bot_message_handler_latency_seconds Run time per message handler")
+        lines.append("# TYPE discord_bot_message_handler_latency_seconds histogram")
+        for name, stats in self.stats.items():
+            lines.extend(render_histogram("discord_bot_message_handler_latency_seconds", f'bot="{bot}",handler="{name}"', stats.latency))
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Author: Kabilan Tamilmani
+# E-mail: kavikabilan37@gmail.com
+# Github: Kabilan-T
+
+''' Outbound message scheduler: per-channel priority queues paced by the Discord rate limits
+
+Every channel gets a queue drained by one task. The queue is ordered by priority class
+(moderation, then command replies, then broadcasts, then log messages) and in order of
+arrival inside a class. Before each send the task waits until the channel bucket (5
+messages per 5 seconds) and the bot-wide bucket (50 requests per second) have room, so
+the library rarely hits a 429, and a moderation reply queued meanwhile goes out before
+the broadcasts already waiting in that channel.
+'''
+
+#-------------------------------------------------------------------------------
+
+import time
+import heapq
+import asyncio
+import itertools
+import discord
+from collections import deque
+from discord.ext.commands import Context
+from bots.metrics import LatencyHistogram, render_histogram
+
+# Priority classes, lower is sent first
+priorities = {'moderation': 0, 'reply': 1, 'broadcast': 2, 'log': 3}
+
+class SendScheduler():
+    ''' Per-channel priority queues of outbound messages '''
+
+    def __init__(self, bot_name: str, channel_rate: tuple = (5, 5.0), global_rate: tuple = (50, 1.0)):
+        ''' Initialize the scheduler (rates are (messages, seconds)) '''
+        self.bot_name = bot_name
+        self.channel_rate = channel_rate
+        self.global_rate = global_rate
+        self.queues = dict()          # channel key -> heap of (priority, sequence, queued time, future, send, args, kwargs)
+        self.sent_times = dict()      # channel key -> deque of recent send times
+        self.global_times = deque()   # recent send times of the bot
+        self.tasks = dict()           # channel key -> drain task
+        self.sequence = itertools.count()
+        self.counters = {name: {'queued': 0, 'sent': 0, 'failed': 0, 'rate_limited': 0} for name in priorities}
+        self.waits = {name: LatencyHistogram() for name in priorities}
+        self.max_depth = 0
+
+    @staticmethod
+    def route(target, reply: bool):
+        '''Channel key and send coroutine function of a destination'''
+        if isinstance(target, discord.Message):
+            return target.channel.id, target.reply if reply else target.channel.send
+        if isinstance(target, Context):
+            return target.channel.id, target.reply if reply else target.send
+        if isinstance(target, (discord.User, discord.Member)):
+            return ('user', target.id), target.send # DM channel, which may not exist yet
+        return target.id, target.send
+
+    async def send(self, target, *args, priority: str = 'reply', reply: bool = False, **kwargs):
+        '''Queue a message and wait until it is sent (returns the message, raises the send errors)'''
+        if priority not in priorities:
+            raise ValueError(f"Unknown send priority {priority}")
+        key, send = self.route(target, reply)
+        queue = self.queues.get(key, None)
+        if queue is None:
+            queue = self.queues[key] = list()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(queue, (priorities[priority], next(self.sequence), time.monotonic(), future, send, args, kwargs))
+        self.counters[priority]['queued'] += 1
+        self.max_depth = max(self.max_depth, len(queue))
+        if key not in self.tasks:
+            self.tasks[key] = asyncio.create_task(self.drain(key))
+        return await future
+
+    def bucket_wait(self, key) -> float:
+        '''Seconds until both the channel and the bot-wide buckets have room'''
+        now = time.monotonic()
+        wait = 0.0
+        for times, (limit, period) in ((self.sent_times.get(key, ()), self.channel_rate), (self.global_times, self.global_rate)):
+            while times and now - times[0] >= period:
+                times.popleft()
+            if len(times) >= limit:
+                wait = max(wait, times[0] + period - now)
+        return wait
+
+    async def drain(self, key):
+        '''Send the queued messages of a channel, highest priority first'''
+        queue = self.queues[key]
+        names = list(priorities)
+        try:
+            while queue:
+                wait = self.bucket_wait(key)
+                if wait > 0:
+                    # Pick again after the wait, a more urgent message may have been queued
+                    await asyncio.sleep(wait)
+                    continue
+                rank, sequence, queued, future, send, args, kwargs = heapq.heappop(queue)
+                if future.done():
+                    continue # the caller was cancelled
+                priority = names[rank]
+                now = time.monotonic()
+                self.sent_times.setdefault(key, deque()).append(now)
+                self.global_times.append(now)
+                self.waits[priority].observe(now - queued)
+                try:
+                    message = await send(*args, **kwargs)
+                except discord.RateLimited as e:
+                    # The library gave up on a long rate limit: keep the message and its place
+                    self.counters[priority]['rate_limited'] += 1
+                    heapq.heappush(queue, (rank, sequence, queued, future, send, args, kwargs))
+                    await asyncio.sleep(e.retry_after)
+                except Exception as e:
+                    self.counters[priority]['failed'] += 1
+                    if not future.done():
+                        future.set_exception(e)
+                except BaseException:
+                    future.cancel() # the scheduler is closing
+                    raise
+                else:
+                    self.counters[priority]['sent'] += 1
+                    if not future.done():
+                        future.set_result(message)
+        finally:
+            self.tasks.pop(key, None)
+            if not queue:
+                self.queues.pop(key, None)
+                # The send times matter for one more period only
+                asyncio.get_running_loop().call_later(self.channel_rate[1], self.forget, key)
+
+    def forget(self, key):
+        '''Drop the send times of an idle channel'''
+        if key not in self.queues:
+            self.sent_times.pop(key, None)
+
+    def depths(self) -> dict:
+        '''Queued messages per priority class'''
+        names = list(priorities)
+        depths = {name: 0 for name in names}
+        for queue in self.queues.values():
+            for entry in queue:
+                depths[names[entry[0]]] += 1
+        return depths
+
+    def stats(self) -> dict:
+        '''Get the queue depths and counters'''
+        return {'depths': self.depths(), 'channels': len(self.queues), 'max_depth': self.max_depth,
+                'counters': self.counters, 'waits': self.waits}
+
+    async def close(self):
+        '''Stop the drain tasks and fail the messages still queued'''
+        for task in list(self.tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+        for queue in self.queues.values():
+            for entry in queue:
+                if not entry[3].done():
+                    entry[3].set_exception(RuntimeError("Bot closed before the message was sent"))
+        self.queues.clear()
+
+    def prometheus(self) -> str:
+        '''Render the queue metrics in the Prometheus text exposition format'''
+        bot = self.bot_name.replace('"', '')
+        lines = ["# HELP discord_bot_send_queue_depth Queued outbound messages per priority",
+                 "# TYPE discord_bot_send_queue_depth gauge"]
+        for priority, depth in self.depths().items():
+            lines.append(f'discord_bot_send_queue_depth{{bot="{bot}",priority="{priority}"}} {depth}')
+        for counter in ('sent', 'failed', 'rate_limited'):
+            lines.append(f"# HELP discord_bot_send_{counter}_total Outbound messages {counter.replace('_', ' ')} per priority")
+            lines.append(f"# TYPE discord_bot_send_{counter}_total counter")
+            for priority, counters in self.counters.items():
+                lines.append(f'discord_bot_send_{counter}_total{{bot="{bot}",priority="{priority}"}} {counters[counter]}')
+        lines.append("# HELP discord_bot_send_wait_seconds Time outbound messages spent queued per priority")
+        lines.append("# TYPE discord_bot_send_wait_seconds histogram")
+        for priority, histogram in self.waits.items():
+            lines.extend(render_histogram("discord_bot_send_wait_seconds", f'bot="{bot}",priority="{priority}"', histogram))
+        return "\n".join(lines) + "\n"
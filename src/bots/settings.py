@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Author: Kabilan Tamilmani
+# E-mail: kavikabilan37@gmail.com
+# Github: Kabilan-T
+
+''' Guild settings service: the single in-memory copy of each guild's settings.yml
+
+Every reader gets its settings from here instead of keeping its own copy. An update builds
+a new settings object from the current one, saves it while holding the document lock and
+then swaps it in, so readers see either the old or the new settings. The callbacks
+subscribed to a field are called with (guild_id, old value, new value) after it changed.
+'''
+
+#-------------------------------------------------------------------------------
+
+import inspect
+
+class GuildSettings():
+    ''' Settings of a guild, the keys of settings.yml that the bot knows are attributes '''
+
+    fields = ('prefix', 'log_channel', 'log_levels', 'default_role', 'role_channel')
+    __slots__ = ('guild_id', 'extra') + fields
+
+    def __init__(self, guild_id, document: dict = None):
+        ''' Build the settings from a settings.yml document (unknown keys are kept as they are) '''
+        document = dict(document or dict())
+        self.guild_id = guild_id
+        for field in self.fields:
+            setattr(self, field, document.pop(field, None))
+        self.extra = document
+
+    def replace(self, **changes) -> 'GuildSettings':
+        '''Copy of the settings with some fields changed (None removes the key)'''
+        for field in changes:
+            if field not in self.fields:
+                raise AttributeError(f"Unknown guild setting {field}")
+        return GuildSettings(self.guild_id, {**self.document(), **changes})
+
+    def document(self) -> dict:
+        '''The settings.yml document of the settings'''
+        document = dict(self.extra)
+        for field in self.fields:
+            value = getattr(self, field)
+            if value is not None:
+                document[field] = value
+        return document
+
+class SettingsService():
+    ''' Settings of the guilds of a bot with atomic updates and change notifications '''
+
+    filename = 'settings.yml'
+
+    def __init__(self, bot):
+        ''' Initialize the service '''
+        self.bot = bot
+        self.guilds = dict()        # guild_id -> GuildSettings
+        self.subscribers = dict()   # field -> [callback(guild_id, old, new)]
+
+    def load(self, guild_id) -> GuildSettings:
+        '''Read the settings of a guild from the storage backend (can run in a worker thread)'''
+        return GuildSettings(guild_id, self.bot.load_guild_yaml(guild_id, self.filename))
+
+    def put(self, settings: GuildSettings):
+        '''Keep settings read by load'''
+        self.guilds[settings.guild_id] = settings
+
+    def get(self, guild_id) -> GuildSettings:
+        '''Get the settings of a guild, reading them if not in memory yet (defaults outside guilds)'''
+        if guild_id is None:
+            return GuildSettings(None)
+        settings = self.guilds.get(guild_id, None)
+        if settings is None:
+            settings = self.guilds[guild_id] = self.load(guild_id)
+        return settings
+
+    def prefix(self, guild_id) -> str:
+        '''Command prefix of a guild'''
+        return self.get(guild_id).prefix or self.bot.default_prefix
+
+    async def update(self, guild_id, **changes) -> GuildSettings:
+        '''Change settings of a guild, save them and notify the subscribers of the changed fields'''
+        async with self.bot.locks.hold(self.bot.cache.make_key(guild_id, self.filename)):
+            old = self.get(guild_id)
+            new = old.replace(**changes)
+            self.bot.save_guild_yaml(guild_id, self.filename, new.document())
+            self.guilds[guild_id] = new
+        for field in changes:
+            if getattr(old, field) != getattr(new, field):
+                await self.publish(field, guild_id, getattr(old, field), getattr(new, field))
+        return new
+
+    async def publish(self, field: str, guild_id, old, new):
+        '''Call the subscribers of a field (a failing subscriber does not stop the others)'''
+        for callback in list(self.subscribers.get(field, list())):
+            try:
+                result = callback(guild_id, old, new)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                self.bot.log.error(f"Settings subscriber of {field} failed\n{type(e).__name__}: {e}")
+
+    def subscribe(self, field: str, callback):
+        '''Call callback(guild_id, old, new) whenever a field changes (coroutine functions are awaited)'''
+        if field not in GuildSettings.fields:
+            raise AttributeError(f"Unknown guild setting {field}")
+        self.subscribers.setdefault(field, list()).append(callback)
+
+    def unsubscribe(self, owner):
+        '''Remove the callbacks of an object, e.g. of a cog being removed'''
+        for field, callbacks in self.subscribers.items():
+            self.subscribers[field] = [callback for callback in callbacks
+                                       if callback is not owner and getattr(callback, '__self__', None) is not owner]
+
+    def forget(self, guild_id):
+        '''Drop the settings of a guild (left or cleared), they are read again when needed'''
+        self.guilds.pop(guild_id, None)
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Author: Kabilan Tamilmani
+# E-mail: kavikabilan37@gmail.com
+# Github: Kabilan-T
+
+''' Resources shared by several bots running in one process '''
+
+#-------------------------------------------------------------------------------
+
+import os
+import asyncio
+import aiohttp
+import resource
+from concurrent.futures import ThreadPoolExecutor
+from bots.cache import DocumentCache
+
+def memory_usage() -> int:
+    '''Current resident set size of the process in bytes (peak RSS where /proc is unavailable)'''
+    try:
+        with open("/proc/self/statm", 'r') as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+class SharedConnector(aiohttp.TCPConnector):
+    ''' TCP connector used by the HTTP sessions of every bot, only the owner really closes it '''
+
+    def close(self):
+        '''Closing a bot's HTTP session must not close the connection pool of the other bots'''
+        return asyncio.sleep(0)
+
+    async def close_shared(self):
+        '''Close the connection pool once every bot is done'''
+        await super().close()
+
+class SharedResources():
+    ''' Document cache, executor pool, HTTP connection pool and loop watchdog shared by the bots of a launcher '''
+
+    def __init__(self, cache_size: int = 4096, max_workers: int = None):
+        ''' Initialize the shared resources (the connector needs the running loop, see open) '''
+        self.cache = DocumentCache(cache_size)
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix="bots")
+        self.connector = None
+        self.watchdog = None   # Loop watchdog of the launcher, set before the bots are created
+
+    async def open(self):
+        '''Create the connection pool and make the executor the default one of the loop'''
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(self.executor)
+        self.connector = SharedConnector(limit=0)
+
+    async def close(self):
+        '''Release the shared resources once every bot is closed'''
+        if self.connector is not None:
+            await self.connector.close_shared()
+            self.connector = None
+        # Don't block the loop on running cog threads (the bots already flushed their writers),
+        # asyncio.run joins the default executor off the loop when it finishes
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Author: Kabilan Tamilmani
+# E-mail: kavikabilan37@gmail.com
+# Github: Kabilan-T
+
+''' Storage backends for the bot data documents '''
+
+#-------------------------------------------------------------------------------
+
+import os
+import time
+import shutil
+import sqlite3
+import tempfile
+import threading
+from bots.codec import load_yaml, dump_yaml
+
+def write_atomic(file_path, data):
+    '''Write a YAML file via temp file + fsync + rename so readers never see a partial file'''
+    directory = os.path.dirname(file_path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(file_path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w') as file:
+            dump_yaml(data, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+class YamlStorage():
+    ''' One YAML file per document under data/<BOT>/guilds/<id>/ (and data/<BOT>/bot/) '''
+
+    name = 'yaml'
+
+    def __init__(self, data_dir: str):
+        ''' Initialize the storage '''
+        self.data_dir = data_dir
+        self.guilds_dir = os.path.join(data_dir, "guilds")
+
+    def path(self, guild_id, filename) -> str:
+        '''Get the file path of a document (guild_id None for bot-level documents)'''
+        if guild_id is None:
+            return os.path.join(self.data_dir, "bot", filename)
+        return os.path.join(self.guilds_dir, str(guild_id), filename)
+
+    def signature(self, guild_id, filename):
+        '''Get the (mtime, size) signature of a document or None if it doesn't exist'''
+        try:
+            stat = os.stat(self.path(guild_id, filename))
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def load(self, guild_id, filename):
+        '''Load a document, None if it doesn't exist'''
+        file_path = self.path(guild_id, filename)
+        if not os.path.exists(file_path):
+            return None
+        with open(file_path, 'r') as file:
+            return load_yaml(file)
+
+    def save(self, guild_id, filename, data):
+        '''Save a document'''
+        file_path = self.path(guild_id, filename)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        write_atomic(file_path, data)
+
+    def delete(self, guild_id, filename):
+        '''Delete a document'''
+        file_path = self.path(guild_id, filename)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+    def ensure_guild(self, guild_id) -> bool:
+        '''Register a guild by creating its directory, True if it is new'''
+        guild_dir = os.path.join(self.guilds_dir, str(guild_id))
+        if os.path.isdir(guild_dir):
+            return False
+        os.makedirs(guild_dir, exist_ok=True)
+        return True
+
+    def has_guild(self, guild_id) -> bool:
+        '''Whether the guild is registered'''
+        return os.path.isdir(os.path.join(self.guilds_dir, str(guild_id)))
+
+    def clear(self, guild_id):
+        '''Delete every document of a guild'''
+        guild_dir = os.path.join(self.guilds_dir, str(guild_id))
+        if os.path.exists(guild_dir):
+            shutil.rmtree(guild_dir)
+
+    def list_guild_ids(self) -> list:
+        '''List all guild IDs that have a data directory'''
+        if not os.path.exists(self.guilds_dir):
+            return []
+        return [int(guild_id) for guild_id in os.listdir(self.guilds_dir)
+                if guild_id.isdigit() and os.path.isdir(os.path.join(self.guilds_dir, guild_id))]
+
+    def documents(self, guild_id) -> dict:
+        '''Load every document of a guild as {filename: data} (guild_id None for bot-level documents)'''
+        guild_dir = os.path.dirname(self.path(guild_id, ""))
+        if not os.path.exists(guild_dir):
+            return dict()
+        return {filename: self.load(guild_id, filename) for filename in sorted(os.listdir(guild_dir))
+                if filename.endswith(('.yml', '.yaml')) and os.path.isfile(os.path.join(guild_dir, filename))}
+
+    def close(self):
+        '''Release the storage'''
+        pass
+
+class SQLiteStorage():
+    ''' Keyed documents per guild in a single SQLite database (WAL mode) '''
+
+    name = 'sqlite'
+    bot_scope = ''   # Scope of the bot-level documents
+
+    def __init__(self, db_path: str):
+        ''' Initialize the storage '''
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS documents ("
+                                "scope TEXT NOT NULL, name TEXT NOT NULL, body TEXT NOT NULL, updated REAL NOT NULL, "
+                                "PRIMARY KEY (scope, name)) WITHOUT ROWID")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS guilds (guild_id INTEGER PRIMARY KEY)")
+
+    def scope(self, guild_id) -> str:
+        '''Get the scope of a guild (guild_id None for bot-level documents)'''
+        return self.bot_scope if guild_id is None else str(guild_id)
+
+    def signature(self, guild_id, filename):
+        '''Get the update time of a document or None if it doesn't exist (changes with every save,
+        also by the other processes sharing the database such as cluster workers)'''
+        with self.lock:
+            row = self.connection.execute("SELECT updated FROM documents WHERE scope = ? AND name = ?",
+                                          (self.scope(guild_id), filename)).fetchone()
+        return None if row is None else row[0]
+
+    def load(self, guild_id, filename):
+        '''Load a document, None if it doesn't exist'''
+        with self.lock:
+            row = self.connection.execute("SELECT body FROM documents WHERE scope = ? AND name = ?",
+                                          (self.scope(guild_id), filename)).fetchone()
+        if row is None:
+            return None
+        return load_yaml(row[0])
+
+    def save(self, guild_id, filename, data):
+        '''Save a document'''
+        body = dump_yaml(data)
+        with self.lock:
+            self.connection.execute("BEGIN")
+            try:
+                # updated grows with every save, even two within the clock resolution, as it is the signature
+                self.connection.execute("INSERT OR REPLACE INTO documents (scope, name, body, updated) VALUES (?, ?, ?, "
+                                        "MAX(?, COALESCE((SELECT updated FROM documents WHERE scope = ? AND name = ?), 0) + 1e-6))",
+                                        (self.scope(guild_id), filename, body, time.time(), self.scope(guild_id), filename))
+                if guild_id is not None:
+                    self.connection.execute("INSERT OR IGNORE INTO guilds (guild_id) VALUES (?)", (int(guild_id),))
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+
+    def delete(self, guild_id, filename):
+        '''Delete a document'''
+        with self.lock:
+            self.connection.execute("DELETE FROM documents WHERE scope = ? AND name = ?", (self.scope(guild_id), filename))
+
+    def ensure_guild(self, guild_id) -> bool:
+        '''Register a guild, True if it is new'''
+        with self.lock:
+            cursor = self.connection.execute("INSERT OR IGNORE INTO guilds (guild_id) VALUES (?)", (int(guild_id),))
+            return cursor.rowcount > 0
+
+    def has_guild(self, guild_id) -> bool:
+        '''Whether the guild is registered'''
+        with self.lock:
+            return self.connection.execute("SELECT 1 FROM guilds WHERE guild_id = ?", (int(guild_id),)).fetchone() is not None
+
+    def clear(self, guild_id):
+        '''Delete every document of a guild'''
+        with self.lock:
+            self.connection.execute("DELETE FROM documents WHERE scope = ?", (self.scope(guild_id),))
+
+    def list_guild_ids(self) -> list:
+        '''List all registered guild IDs'''
+        with self.lock:
+            return [row[0] for row in self.connection.execute("SELECT guild_id FROM guilds")]
+
+    def documents(self, guild_id) -> dict:
+        '''Load every document of a guild as {filename: data} (guild_id None for bot-level documents)'''
+        with self.lock:
+            rows = self.connection.execute("SELECT name, body FROM documents WHERE scope = ? ORDER BY name",
+                                           (self.scope(guild_id),)).fetchall()
+        return {name: load_yaml(body) for name, body in rows}
+
+    def close(self):
+        '''Checkpoint the WAL and close the database'''
+        with self.lock:
+            self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.connection.close()
+
+def create_storage(backend: str, data_dir: str):
+    '''Create the storage backend selected in config.yml'''
+    if backend == YamlStorage.name:
+        return YamlStorage(data_dir)
+    if backend == SQLiteStorage.name:
+        return SQLiteStorage(os.path.join(data_dir, "data.db"))
+    raise ValueError(f"Unknown storage backend {backend}")
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Author: Kabilan Tamilmani
+# E-mail: kavikabilan37@gmail.com
+# Github: Kabilan-T
+
+''' Event loop lag watchdog: finds the blocking calls that stall every bot on the loop
+
+A heartbeat task on the loop measures how late it wakes up. A daemon thread watches the
+heartbeat and, when it is overdue by the threshold, captures the stack of the loop thread
+while it is still blocked. Once the loop is back, the stall is attributed to the cog and
+command (or listener) found in that stack, logged and kept in a rolling report.
+'''
+
+#-------------------------------------------------------------------------------
+
+import os
+import sys
+import time
+import asyncio
+import threading
+from collections import deque
+from datetime import datetime, timezone
+
+bots_dir = os.path.dirname(os.path.abspath(__file__))
+cogs_dir = os.path.join(bots_dir, "cogs")
+
+class LoopWatchdog():
+    ''' Watches the lag of the running event loop and reports the blocking frames '''
+
+    def __init__(self, log, threshold: float = 0.25, interval: float = 0.1, report_size: int = 50, stack_depth: int = 8):
+        ''' Initialize the watchdog '''
+        self.log = log
+        self.threshold = threshold
+        self.interval = interval
+        self.stack_depth = stack_depth
+        self.slow_callbacks = deque(maxlen=report_size)
+        self.bots = list()
+        self.stalls = 0
+        self.max_lag = 0.0
+        self.loop_thread = None
+        self.heartbeat = None
+        self.task = None
+        self.thread = None
+        self.stopped = threading.Event()
+        self.captured = None   # (heartbeat, frames) of the current stall, written by the watchdog thread
+
+    def attach(self, bot):
+        '''Attribute the stalls to the cogs of a bot'''
+        if bot not in self.bots:
+            self.bots.append(bot)
+
+    def detach(self, bot):
+        '''Stop attributing stalls to a bot'''
+        if bot in self.bots:
+            self.bots.remove(bot)
+
+    def start(self):
+        '''Start the heartbeat on the running loop and the watchdog thread'''
+        if self.task is not None:
+            return
+        self.loop_thread = threading.get_ident()
+        self.heartbeat = time.monotonic()
+        self.stopped.clear()
+        self.task = asyncio.create_task(self.beat())
+        self.thread = threading.Thread(target=self.watch, name="loop-watchdog", daemon=True)
+        self.thread.start()
+
+    async def stop(self):
+        '''Stop the heartbeat and the watchdog thread'''
+        self.stopped.set()
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        if self.thread is not None:
+            await asyncio.to_thread(self.thread.join, self.interval * 2)
+            self.thread = None
+
+    async def beat(self):
+        '''Heartbeat: measure how late the loop wakes us up'''
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = now - expected
+            captured = self.captured
+            self.heartbeat = now
+            if lag >= self.threshold:
+                self.captured = None
+                self.report(lag, captured[1] if captured is not None else None)
+
+    def watch(self):
+        '''Watchdog thread: capture the loop thread stack while the heartbeat is overdue'''
+        while not self.stopped.wait(self.interval / 2):
+            heartbeat = self.heartbeat
+            overdue = time.monotonic() - heartbeat - self.interval
+            if overdue < self.threshold:
+                continue
+            if self.captured is not None and self.captured[0] == heartbeat:
+                continue # already captured this stall
+            frame = sys._current_frames().get(self.loop_thread, None)
+            if frame is not None:
+                self.captured = (heartbeat, self.extract(frame))
+
+    def extract(self, frame) -> list:
+        '''Stack of a frame, innermost first: [(filename, lineno, qualname, code)]'''
+        frames = list()
+        while frame is not None:
+            code = frame.f_code
+            frames.append((code.co_filename, frame.f_lineno, getattr(code, 'co_qualname', code.co_name), code))
+            frame = frame.f_back
+        return frames
+
+    def attribute(self, frames: list) -> dict:
+        '''Find the cog, command or listener and the blocking call of a captured stack'''
+        culprit = None
+        for entry in frames:
+            if entry[0].startswith(cogs_dir):
+                culprit = entry
+                break
+        if culprit is None:
+            culprit = next((entry for entry in frames if entry[0].startswith(bots_dir)), frames[0])
+        filename, lineno, qualname, code = culprit
+        source = f"{os.path.relpath(filename, os.path.dirname(bots_dir))}:{lineno} in {qualname}"
+        bot_name, cog_name, command_name = None, None, None
+        for bot in self.bots:
+            for cog in bot.cogs.values():
+                if getattr(sys.modules.get(cog.__module__, None), '__file__', None) == filename:
+                    bot_name, cog_name = bot.name, cog.qualified_name
+            for command in bot.walk_commands():
+                if getattr(command.callback, '__code__', None) is code:
+                    bot_name, command_name = bot.name, command.qualified_name
+            for event, listeners in bot.extra_events.items():
+                if any(getattr(listener, '__code__', None) is code or
+                       getattr(getattr(listener, '__func__', None), '__code__', None) is code for listener in listeners):
+                    bot_name, command_name = bot.name, f"listener {event}"
+            for name, _, method, _ in bot.router.handlers:
+                if getattr(getattr(method, '__func__', None), '__code__', None) is code:
+                    bot_name, command_name = bot.name, f"message handler {name}"
+        return {'bot': bot_name, 'cog': cog_name, 'command': command_name, 'source': source,
+                'blocking': f"{os.path.basename(frames[0][0])}:{frames[0][1]} in {frames[0][2]}"}
+
+    def report(self, lag: float, frames: list):
+        '''Log a stall and add it to the slow_callbacks report'''
+        self.stalls += 1
+        self.max_lag = max(self.max_lag, lag)
+        entry = {'time': datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"), 'lag': lag}
+        if frames:
+            entry.update(self.attribute(frames))
+            entry['stack'] = [f"{os.path.basename(filename)}:{lineno} in {qualname}"
+                              for filename, lineno, qualname, _ in frames[:self.stack_depth]]
+        else:
+            entry.update({'bot': None, 'cog': None, 'command': None, 'source': "unknown", 'blocking': "unknown", 'stack': []})
+        self.slow_callbacks.append(entry)
+        where = " / ".join(part for part in (entry['bot'], entry['cog'], entry['command']) if part) or "unattributed"
+        stack = "\n    ".join(entry['stack'])
+        self.log.warning(f"Event loop blocked for {lag:.3f} s by {where} at {entry['source']}\n    {stack}")
+
+    def stats(self) -> dict:
+        '''Get the watchdog counters'''
+        return {'stalls': self.stalls, 'max_lag': self.max_lag, 'threshold': self.threshold}
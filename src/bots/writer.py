@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Author: Kabilan Tamilmani
+# E-mail: kavikabilan37@gmail.com
+# Github: Kabilan-T
+
+''' Write-behind persistence for the bot data files '''
+
+#-------------------------------------------------------------------------------
+
+import copy
+import asyncio
+
+DELETE = object()   # Pending operation marker for a document deletion
+
+class DocumentWriter():
+    ''' Coalescing writer that persists the latest version of each document off the event loop '''
+
+    def __init__(self, storage, log, delay: float = 0.5, executor=None):
+        ''' Initialize the writer '''
+        self.storage = storage
+        self.log = log
+        self.delay = delay
+        self.executor = executor
+        self.pending = dict()    # (guild_id, filename) -> (data or DELETE, on_written)
+        self.inflight = dict()   # (guild_id, filename) -> (data or DELETE, on_written)
+        self.discarded = set()
+        self.wakeups = dict()
+        self.tasks = dict()
+        self.writes = 0
+        self.coalesced = 0
+
+    def lookup(self, key):
+        '''Get the not yet persisted version of a document: (found, data)'''
+        operation = self.pending.get(key, None) or self.inflight.get(key, None)
+        if operation is None:
+            return False, None
+        data = operation[0]
+        return True, (None if data is DELETE else copy.deepcopy(data))
+
+    def write(self, key, data, on_written=None):
+        '''Queue a write of the document, replacing any write still waiting for the same key'''
+        self._schedule(key, (copy.deepcopy(data), on_written))
+
+    def delete(self, key):
+        '''Queue the deletion of the document, ordered after earlier writes of the same key'''
+        self._schedule(key, (DELETE, None))
+
+    def discard(self, keys):
+        '''Drop queued operations of the given keys (and undo writes already running)'''
+        for key in keys:
+            self.pending.pop(key, None)
+            if key in self.inflight:
+                self.discarded.add(key)
+
+    def keys(self):
+        '''Keys that have queued or running operations'''
+        return set(self.pending) | set(self.inflight)
+
+    def _schedule(self, key, operation):
+        '''Queue an operation and make sure a task is draining the key'''
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (e.g. offline scripts), persist right away
+            self.pending.pop(key, None)
+            self._run(key, operation)
+            if operation[1] is not None:
+                operation[1](operation[0])
+            return
+        if key in self.pending:
+            self.coalesced += 1
+        self.pending[key] = operation
+        self.discarded.discard(key)
+        if key not in self.tasks:
+            self.wakeups[key] = asyncio.Event()
+            self.tasks[key] = loop.create_task(self._drain(key))
+
+    def _run(self, key, operation):
+        '''Execute a write or delete operation (runs in the executor)'''
+        guild_id, filename = key
+        if operation[0] is DELETE:
+            self.storage.delete(guild_id, filename)
+        else:
+            self.storage.save(guild_id, filename, operation[0])
+
+    async def _drain(self, key):
+        '''Wait for the debounce window then persist the latest operation of a key'''
+        loop = asyncio.get_running_loop()
+        try:
+            while key in self.pending:
+                try:
+                    await asyncio.wait_for(self.wakeups[key].wait(), timeout=self.delay)
+                except asyncio.TimeoutError:
+                    pass
+                operation = self.pending.pop(key, None)
+                if operation is None:
+                    break
+                self.inflight[key] = operation
+                try:
+                    await loop.run_in_executor(self.executor, self._run, key, operation)
+                    self.writes += 1
+                    if key in self.discarded:
+                        await loop.run_in_executor(self.executor, self._run, key, (DELETE, None))
+                    elif operation[1] is not None:
+                        operation[1](operation[0])
+                except Exception as e:
+                    self.log.error(f"Failed to persist {key[1]} of {key[0] or 'bot'}\n{type(e).__name__}: {e}")
+                finally:
+                    self.inflight.pop(key, None)
+                    self.discarded.discard(key)
+        finally:
+            self.tasks.pop(key, None)
+            self.wakeups.pop(key, None)
+
+    async def flush(self):
+        '''Persist every queued operation immediately and wait for completion'''
+        while self.tasks:
+            for wakeup in self.wakeups.values():
+                wakeup.set()
+            await asyncio.gather(*list(self.tasks.values()), return_exceptions=True)
+
+    def stats(self) -> dict:
+        '''Get the writer counters'''
+        return {'pending': len(self.pending),
+                'inflight': len(self.inflight),
+                'writes': self.writes,
+                'coalesced': self.coalesced}
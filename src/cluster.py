@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Author: Kabilan Tamilmani
+# E-mail: kavikabilan37@gmail.com
+# Github: Kabilan-T
+
+''' Run a bot as a cluster of sharded worker processes with a local coordinator '''
+
+#-------------------------------------------------------------------------------
+
+import os
+import signal
+import asyncio
+import aiohttp
+import argparse
+import secrets
+import multiprocessing
+from bots.log import Logger
+from bots.base import ShardedBot
+from bots.cluster import Coordinator, ClusterClient, shard_ranges
+
+summary_interval = 60 # seconds between two metrics summaries of the coordinator
+join_timeout = 30 # seconds to wait for a worker to close its bot
+
+async def recommended_shards(token: str) -> int:
+    '''Ask Discord for the recommended shard count of the bot'''
+    async with aiohttp.ClientSession() as session:
+        async with session.get("https://discord.com/api/v10/gateway/bot",
+                               headers={"Authorization": f"Bot {token}"}) as response:
+            response.raise_for_status()
+            return (await response.json())['shards']
+
+async def worker_main(bot_name: str, worker_id: int, shard_ids: list, shard_count: int, port: int, secret: str):
+    '''Run the shards of one worker until the bot is closed'''
+    token = os.getenv(f"{bot_name.upper()}_BOT_TOKEN", None)
+    bot = ShardedBot(bot_name, shard_ids, shard_count)
+    bot.cluster = ClusterClient(bot, worker_id, port, secret)
+    await bot.cluster.connect()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, lambda: asyncio.create_task(bot.close()))
+    async with bot:
+        bot.log.info(f"Starting {bot.name} worker {worker_id} with shards {shard_ids} of {shard_count}")
+        await bot.start(token, reconnect=True)
+
+def run_worker(bot_name: str, worker_id: int, shard_ids: list, shard_count: int, port: int, secret: str):
+    '''Worker process entry point'''
+    asyncio.run(worker_main(bot_name, worker_id, shard_ids, shard_count, port, secret))
+
+async def main(bot_name: str, workers: int, shard_count: int = None):
+    '''Start the coordinator and the workers, stop everything on SIGINT/SIGTERM'''
+    log = Logger(bot_name, "cluster")
+    token = os.getenv(f"{bot_name.upper()}_BOT_TOKEN", None)
+    if token is None:
+        log.error(f"Token not found for {bot_name}. Please set {bot_name.upper()}_BOT_TOKEN as environment variable.")
+        return
+    if shard_count is None:
+        shard_count = await recommended_shards(token)
+    secret = secrets.token_hex(16)
+    coordinator = Coordinator(log, secret)
+    await coordinator.start()
+    context = multiprocessing.get_context("spawn")
+    processes = list()
+    for worker_id, shard_ids in enumerate(shard_ranges(shard_count, workers)):
+        process = context.Process(target=run_worker, name=f"{bot_name}-worker-{worker_id}",
+                                  args=(bot_name, worker_id, shard_ids, shard_count, coordinator.port, secret))
+        process.start()
+        processes.append(process)
+        log.info(f"Worker {worker_id} started (pid {process.pid}) with shards {shard_ids} of {shard_count}")
+
+    loop = asyncio.get_running_loop()
+    stopping = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+    while not stopping.is_set() and any(process.is_alive() for process in processes):
+        try:
+            await asyncio.wait_for(stopping.wait(), timeout=summary_interval)
+        except asyncio.TimeoutError:
+            log.info(f"Cluster: {coordinator.summary()}")
+    log.info("Shutting down the cluster")
+    await coordinator.shutdown()
+    for process in processes:
+        await loop.run_in_executor(None, process.join, join_timeout)
+        if process.is_alive():
+            log.warning(f"{process.name} did not stop in time, terminating it")
+            process.terminate()
+    log.info("Cluster terminated")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run a bot as a cluster of sharded worker processes.")
+    parser.add_argument("bot_name", help="Bot key in config.yml (auto, eve, mo, go4)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes (default: CPU count)")
+    parser.add_argument("--shards", type=int, default=None, help="Total shard count (default: recommended by Discord)")
+    args = parser.parse_args()
+    asyncio.run(main(args.bot_name, args.workers, args.shards))
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Author: Kabilan Tamilmani
+# E-mail: kavikabilan37@gmail.com
+# Github: Kabilan-T
+
+''' Launch several bots in one process sharing the event loop and resources '''
+
+#-------------------------------------------------------------------------------
+
+import os
+import time
+import signal
+import asyncio
+import argparse
+from bots.log import Logger
+from bots.base import BaseBot, config_file
+from bots.codec import load_yaml
+from bots.shared import SharedResources, memory_usage
+from bots.watchdog import LoopWatchdog
+
+ready_timeout = 120 # seconds to wait for a bot to be ready before starting the next one
+
+def bot_names() -> list:
+    '''Bots defined in config.yml'''
+    with open(config_file, 'r') as file:
+        return list(load_yaml(file).keys())
+
+def loop_lag_threshold(names: list):
+    '''Lowest loop_lag_threshold of the bots in config.yml (None if all of them disable the watchdog)'''
+    with open(config_file, 'r') as file:
+        config = load_yaml(file)
+    thresholds = [config.get(name, dict()).get('loop_lag_threshold', 0.25) for name in names]
+    thresholds = [threshold for threshold in thresholds if threshold]
+    return min(thresholds) if thresholds else None
+
+class Launcher():
+    ''' Runs a set of bots inside one asyncio loop '''
+
+    def __init__(self, names: list):
+        ''' Initialize the launcher '''
+        self.names = names
+        self.log = Logger("launcher")
+        self.bots = dict()
+        self.tasks = dict()
+        self.report = dict()
+        self.shared = SharedResources()
+        # One watchdog for the shared loop, as sensitive as the most demanding bot
+        threshold = loop_lag_threshold(names)
+        self.shared.watchdog = LoopWatchdog(self.log, threshold) if threshold else None
+        self.stopping = None
+
+    async def start_bot(self, name: str):
+        '''Create a bot, start it and wait until it is ready'''
+        token = os.getenv(f"{name.upper()}_BOT_TOKEN", None)
+        if token is None:
+            self.log.error(f"Token not found for {name}. Please set {name.upper()}_BOT_TOKEN as environment variable.")
+            return
+        memory_before = memory_usage()
+        start = time.perf_counter()
+        bot = BaseBot(name, self.shared)
+        self.bots[name] = bot
+        self.tasks[name] = asyncio.create_task(self.run_bot(bot, token))
+        ready = asyncio.create_task(bot.wait_until_ready())
+        done, _ = await asyncio.wait({ready, self.tasks[name]}, timeout=ready_timeout, return_when=asyncio.FIRST_COMPLETED)
+        if ready in done:
+            self.report[name] = {'startup': time.perf_counter() - start,
+                                 'memory': memory_usage() - memory_before}
+            self.log.info(f"{bot.name} ready in {self.report[name]['startup']:.2f} s, "
+                          f"+{self.report[name]['memory'] / 2**20:.1f} MiB")
+        else:
+            ready.cancel()
+            self.log.warning(f"{bot.name} was not ready within {ready_timeout} s")
+
+    async def run_bot(self, bot: BaseBot, token: str):
+        '''Run a bot until it is closed'''
+        try:
+            async with bot:
+                self.log.info(f"Starting {bot.name} bot execution")
+                await bot.start(token, reconnect=True)
+        except Exception as e:
+            self.log.error(f"{bot.name} stopped\n{type(e).__name__}: {e}")
+
+    async def run(self):
+        '''Start the bots one after another and wait until all of them stop'''
+        loop = asyncio.get_running_loop()
+        self.stopping = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stopping.set)
+        await self.shared.open()
+        if self.shared.watchdog is not None:
+            self.shared.watchdog.start()
+        baseline = memory_usage()
+        self.log.info(f"Launcher started with {baseline / 2**20:.1f} MiB for {', '.join(self.names)}")
+        try:
+            for name in self.names:
+                if self.stopping.is_set():
+                    break
+                await self.start_bot(name)
+            self.log_report(baseline)
+            if self.tasks:
+                stopped = asyncio.create_task(self.stopping.wait())
+                await asyncio.wait({stopped, asyncio.gather(*self.tasks.values())}, return_when=asyncio.FIRST_COMPLETED)
+                stopped.cancel()
+        finally:
+            await self.shutdown()
+
+    async def shutdown(self):
+        '''Close every bot (flushing their data) then release the shared resources'''
+        self.log.info("Shutting down the bots")
+        await asyncio.gather(*[bot.close() for bot in self.bots.values()], return_exceptions=True)
+        await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+        if self.shared.watchdog is not None:
+            await self.shared.watchdog.stop()
+        await self.shared.close()
+        self.log.info("Launcher terminated")
+
+    def log_report(self, baseline: int):
+        '''Log the startup time and memory of each bot'''
+        for name, entry in self.report.items():
+            self.log.info(f"{name}: startup {entry['startup']:.2f} s, memory +{entry['memory'] / 2**20:.1f} MiB")
+        self.log.info(f"Total: {len(self.report)} bots ready, {memory_usage() / 2**20:.1f} MiB "
+                      f"(launcher baseline {baseline / 2**20:.1f} MiB)")
+
+if __name__ == '__main__':
+    available = bot_names()
+    parser = argparse.ArgumentParser(description="Run several bots in one process.")
+    parser.add_argument("bots", nargs='*', help=f"Bots to start: {', '.join(available)} (default: all)")
+    args = parser.parse_args()
+    unknown = [name for name in args.bots if name not in available]
+    if unknown:
+        parser.error(f"Unknown bots: {', '.join(unknown)}")
+    asyncio.run(Launcher(args.bots or available).run())